@@ -0,0 +1,287 @@
+import argparse
+import json
+import os
+import time
+import cv2
+import numpy as np
+from ModelRegistry import get_model
+from InspectionPipeline import InspectionPipeline, ConsoleLogger, COLOR_MAP, get_config_path
+from AnnotationStore import annotation_store
+from ResultStore import next_indexed_path
+from Profiler import profiler
+from ImageSource import ImageSource
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+STAGES = ["detect", "crop", "bands", "compare", "total"]  # 电阻定位 / 裁剪 / 色环检测与排序 / 阻值计算与比对 / 整张
+MISSING = "无"  # 混淆矩阵中表示漏检或多检的色环
+
+
+def resistance_value(pipeline, bands):
+    """计算阻值（不含误差），色环无效时返回 None"""
+    text = pipeline.calculate_resistance_from_bands(list(bands))
+    if text.startswith("(色环") or text == "(错误)":
+        return None
+    return text.strip("()").split()[0]
+
+
+def percentiles(values):
+    """耗时统计（毫秒）"""
+    if not values:
+        return {"count": 0}
+    data = np.asarray(values) * 1000
+    p50, p90, p99 = np.percentile(data, [50, 90, 99])
+    return {"count": len(values), "mean": round(float(data.mean()), 3), "p50": round(float(p50), 3),
+            "p90": round(float(p90), 3), "p99": round(float(p99), 3), "max": round(float(data.max()), 3)}
+
+
+class AccuracyStats:
+    """累计色环、整只电阻和阻值的准确率以及色环混淆矩阵"""
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.label_index = {label: i for i, label in enumerate(self.labels)}
+        self.confusion = np.zeros((len(self.labels), len(self.labels)), dtype=np.int64)
+        self.band_total = self.band_correct = 0
+        self.position_total = {}  # {色环位置: 数量}
+        self.position_correct = {}
+        self.resistor_total = self.resistor_correct = 0
+        self.resistance_total = self.resistance_correct = 0
+        self.count_mismatch = 0  # 色环数量与标注不一致的电阻
+        self.undetected = 0  # 标注中存在但未被定位到的电阻
+
+    def index(self, label):
+        """颜色在混淆矩阵中的下标，标注中出现 COLOR_MAP 以外的颜色时追加"""
+        if label not in self.label_index:
+            self.label_index[label] = len(self.labels)
+            self.labels.append(label)
+            size = len(self.labels)
+            confusion = np.zeros((size, size), dtype=np.int64)
+            confusion[:size - 1, :size - 1] = self.confusion
+            self.confusion = confusion
+        return self.label_index[label]
+
+    def add(self, expected, detected, expected_value=None, detected_value=None):
+        """
+        记录一只电阻的比对结果
+        :param expected: 标注的色环元组
+        :param detected: 检测到的色环元组（未定位到时为 None）
+        """
+        self.resistor_total += 1
+        if detected is None:
+            self.undetected += 1
+            detected = ()
+        if len(detected) != len(expected):
+            self.count_mismatch += 1
+        self.resistor_correct += detected == expected
+
+        # 按位置逐环比对，多出或缺少的色环记为“无”
+        for position in range(max(len(expected), len(detected))):
+            truth = expected[position] if position < len(expected) else MISSING
+            pred = detected[position] if position < len(detected) else MISSING
+            self.confusion[self.index(truth), self.index(pred)] += 1
+            if truth == MISSING:
+                continue
+            self.band_total += 1
+            self.position_total[position + 1] = self.position_total.get(position + 1, 0) + 1
+            if truth == pred:
+                self.band_correct += 1
+                self.position_correct[position + 1] = self.position_correct.get(position + 1, 0) + 1
+
+        if expected_value is not None:
+            self.resistance_total += 1
+            self.resistance_correct += detected_value == expected_value
+
+    @staticmethod
+    def ratio(correct, total):
+        return round(correct / total, 4) if total else None
+
+    def summary(self):
+        return {
+            "resistors": self.resistor_total,
+            "undetected": self.undetected,
+            "band_count_mismatch": self.count_mismatch,
+            "band_accuracy": self.ratio(self.band_correct, self.band_total),
+            "band_accuracy_by_position": {
+                position: self.ratio(self.position_correct.get(position, 0), total)
+                for position, total in sorted(self.position_total.items())
+            },
+            "resistor_accuracy": self.ratio(self.resistor_correct, self.resistor_total),
+            "resistance_accuracy": self.ratio(self.resistance_correct, self.resistance_total),
+            "confusion": {"labels": self.labels, "matrix": self.confusion.tolist()}  # 行为标注，列为检测
+        }
+
+
+def find_samples(image_folder, config_dir):
+    """查找存在标注配置的图像，返回 [(图像路径, 配置路径)]"""
+    samples = []
+    for name in sorted(os.listdir(image_folder)):
+        if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        config_path = get_config_path(name, config_dir)
+        if config_path.exists():
+            samples.append((os.path.join(image_folder, name), str(config_path)))
+    return samples
+
+
+def evaluate_image(pipeline, image, expected, stats, timings):
+    """对单张图像执行完整的两阶段检测，分阶段计时并累计准确率"""
+    start = time.perf_counter()
+    results = pipeline.detect_board(image)
+    t_detect = time.perf_counter()
+    crops = pipeline.crop_resistors(image, results)
+    t_crop = time.perf_counter()
+    tht_colors = pipeline.detect_colors([crop[4] for crop in crops])
+    t_bands = time.perf_counter()
+    rows = [pipeline.build_row(crop, tht_color, expected) for crop, tht_color in zip(crops, tht_colors)]
+    end = time.perf_counter()
+
+    for stage, seconds in zip(STAGES, (t_detect - start, t_crop - t_detect, t_bands - t_crop,
+                                       end - t_bands, end - start)):
+        timings[stage].append(seconds)
+
+    detected = {row["resistor_id"]: row for row in rows}
+    passed = 0
+    for resistor_id, expected_bands in expected.items():
+        row = detected.get(resistor_id)
+        bands = None
+        if row is not None:
+            bands = tuple(row["bands"].split()) if row["bands"] not in ("未识别到色环", "色环检测错误") else ()
+        passed += bands == expected_bands
+        stats.add(expected_bands, bands, resistance_value(pipeline, expected_bands),
+                  resistance_value(pipeline, bands) if bands else None)
+    return {"resistors": len(expected), "detected": len(rows), "passed": passed,
+            "seconds": round(end - start, 4)}
+
+
+def compare_reports(report, baseline_path):
+    """与之前保存的结果对比主要指标"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n与基准对比: {baseline_path}")
+    for key in ("band_accuracy", "resistor_accuracy", "resistance_accuracy"):
+        old, new = baseline["accuracy"].get(key), report["accuracy"].get(key)
+        if old is None or new is None:
+            continue
+        print(f"  {key:<22}{old:>8.4f} -> {new:.4f} ({new - old:+.4f})")
+    for stage in STAGES:
+        old = baseline["latency_ms"].get(stage, {}).get("p50")
+        new = report["latency_ms"].get(stage, {}).get("p50")
+        if old is None or new is None:
+            continue
+        print(f"  {stage + ' p50 (ms)':<22}{old:>8.1f} -> {new:.1f} ({new - old:+.1f})")
+
+
+def benchmark(model_path, tht_model_path, image_folder, config_dir="AnnotationConfig", output=None,
+              conf=0.05, batch_size=16, imgsz=640, tile_size=0, warmup=1, baseline=None, verbose=False,
+              trace=None, classic=False, oriented=False):
+    """
+    在带标注配置的电路板图像上评估完整检测流程的准确率和各阶段耗时
+    :param model_path: 电阻定位模型路径
+    :param tht_model_path: 色环检测模型路径
+    :param image_folder: 电路板图像文件夹
+    :param config_dir: 标注配置文件夹（{图像名}_config.json）
+    :param output: 结果 JSON 路径，为空时在 BenchmarkResult 下按编号生成
+    :param batch_size: 色环检测批大小（1 表示逐个检测）
+    :param tile_size: 分块检测的分块边长（0 表示整图检测）
+    :param warmup: 计时前预热的图像数量
+    :param baseline: 用于对比的历史结果 JSON
+    :param trace: Chrome Trace 输出路径，不为空时记录流程内部各阶段的计时
+    :param classic: 是否先使用 HSV 传统色环识别，未通过的电阻再交给色环模型
+    :param oriented: 是否将倾斜电阻旋转到统一尺寸的水平条带后再做色环检测
+    """
+    samples = find_samples(image_folder, config_dir)
+    if not samples:
+        print(f"警告: 在文件夹 {image_folder} 中未找到带标注配置的图像")
+        return None
+
+    pipeline = InspectionPipeline(
+        get_model(model_path), get_model(tht_model_path), ConsoleLogger(verbose),
+        conf=conf, tht_batch_mode=batch_size > 1, tht_batch_size=max(1, batch_size), tht_imgsz=imgsz,
+        use_cache=False, tile_size=tile_size or None, classic_mode=classic,
+        oriented_crops=oriented
+    )
+    stats = AccuracyStats(list(COLOR_MAP.values()) + [MISSING])
+    timings = {stage: [] for stage in STAGES}
+
+    for image_path, _ in samples[:warmup]:
+        image = cv2.imread(image_path)
+        if image is not None:
+            pipeline.inspect(image)
+
+    if trace:
+        profiler.clear()
+        profiler.set_enabled(True)
+
+    per_image = []
+    # 后续图像在后台线程中解码，计时只包含检测流程
+    images = ImageSource([image_path for image_path, _ in samples])
+    for i, ((_, config_path), (image_path, image)) in enumerate(zip(samples, images), start=1):
+        if image is None:
+            per_image.append({"image": os.path.basename(image_path), "error": "无法读取图像"})
+            continue
+        expected = annotation_store.expected_colors(config_path) or {}
+        item = evaluate_image(pipeline, image, expected, stats, timings)
+        per_image.append({"image": os.path.basename(image_path), **item})
+        print(f"[{i}/{len(samples)}] {per_image[-1]}")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "model": os.path.abspath(model_path),
+        "tht_model": os.path.abspath(tht_model_path),
+        "params": {"conf": conf, "batch_size": batch_size, "imgsz": imgsz, "tile_size": tile_size,
+                   "classic": classic, "oriented": oriented},
+        "images": len(per_image),
+        "accuracy": stats.summary(),
+        "latency_ms": {stage: percentiles(values) for stage, values in timings.items()},
+        "per_image": per_image
+    }
+    if trace:
+        profiler.set_enabled(False)
+        report["spans"] = {name: {key: value for key, value in item.items() if key != "histogram"}
+                           for name, item in profiler.stats().items()}
+        profiler.export_chrome_trace(trace)
+        print(f"Trace 已保存到 {trace}")
+
+    accuracy = report["accuracy"]
+    print(f"\n图像 {report['images']} 张，标注电阻 {accuracy['resistors']} 只（未定位 {accuracy['undetected']}）")
+    for key, label in (("band_accuracy", "色环准确率"), ("resistor_accuracy", "整只电阻准确率"),
+                       ("resistance_accuracy", "阻值准确率")):
+        value = accuracy[key]
+        print(f"{label:<12}{'-' if value is None else f'{value:.4f}':>10}")
+    print(f"{'阶段':<10}{'p50':>10}{'p90':>10}{'p99':>10}  (ms)")
+    for stage, item in report["latency_ms"].items():
+        if item["count"]:
+            print(f"{stage:<10}{item['p50']:>10.1f}{item['p90']:>10.1f}{item['p99']:>10.1f}")
+
+    output = output or next_indexed_path("BenchmarkResult", "Accuracy", ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f"评估结果已保存到 {output}")
+
+    if baseline:
+        compare_reports(report, baseline)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="基于标注配置的两阶段检测准确率与耗时评估")
+    parser.add_argument("images", help="电路板图像文件夹")
+    parser.add_argument("-m", "--model", required=True, help="电阻定位模型路径 (*.pt)")
+    parser.add_argument("-t", "--tht-model", required=True, help="色环检测模型路径 (*.pt)")
+    parser.add_argument("-c", "--config-dir", default="AnnotationConfig", help="标注配置文件夹")
+    parser.add_argument("-o", "--output", help="结果 JSON 路径（默认 BenchmarkResult/AccuracyN.json）")
+    parser.add_argument("--conf", type=float, default=0.05, help="电阻定位置信度阈值")
+    parser.add_argument("--batch-size", type=int, default=16, help="色环检测批大小（1 表示逐个检测）")
+    parser.add_argument("--imgsz", type=int, default=640, help="色环检测统一输入尺寸")
+    parser.add_argument("--tile-size", type=int, default=0, help="分块检测的分块边长（0 表示整图检测）")
+    parser.add_argument("--warmup", type=int, default=1, help="计时前预热的图像数量")
+    parser.add_argument("--baseline", help="与之前保存的结果 JSON 对比")
+    parser.add_argument("--trace", help="导出流程内部各阶段计时的 Chrome Trace JSON")
+    parser.add_argument("--classic", action="store_true", help="先使用 HSV 传统色环识别，未通过时交给色环模型")
+    parser.add_argument("--oriented", action="store_true", help="旋转校正：倾斜电阻旋转到水平条带后再做色环检测")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志")
+    args = parser.parse_args()
+    benchmark(args.model, args.tht_model, args.images, args.config_dir, args.output, args.conf,
+              args.batch_size, args.imgsz, args.tile_size, args.warmup, args.baseline, args.verbose,
+              args.trace, args.classic, args.oriented)
@@ -0,0 +1,86 @@
+import copy
+import json
+import os
+import threading
+
+
+class AnnotationStore:
+    """
+    标注配置缓存：每个配置文件只读取一次，
+    之后按文件修改时间判断是否需要重新读取，标注窗口保存后直接写入缓存
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger
+        self.entries = {}  # {绝对路径: (修改时间, 原始配置, {电阻编号: 预期色环元组})}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def build_expected(data):
+        """将配置整理为 {电阻编号: 预期色环元组}（去掉未使用的空色环）"""
+        return {resistor_id: tuple(c for c in config.get("colors", []) if c)
+                for resistor_id, config in data.items()}
+
+    def load(self, config_path):
+        """读取配置（命中缓存且文件未修改时不读文件），不存在或读取失败时返回 None"""
+        if not config_path:
+            return None
+        path = os.path.abspath(config_path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            with self.lock:
+                self.entries.pop(path, None)
+            return None
+
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            if self.logger:
+                self.logger.log(f"配置文件读取失败: {str(e)}", "ERROR")
+            return None
+
+        entry = (mtime, data, self.build_expected(data))
+        with self.lock:
+            self.entries[path] = entry
+        return entry
+
+    def get(self, config_path):
+        """获取原始配置 {电阻编号: {"type": ..., "colors": [...]}}"""
+        entry = self.load(config_path)
+        return entry[1] if entry else None
+
+    def expected_colors(self, config_path):
+        """获取预期色环 {电阻编号: (颜色, ...)}，用于逐个电阻的字典查找比对"""
+        entry = self.load(config_path)
+        return entry[2] if entry else None
+
+    def put(self, config_path, data):
+        """配置文件写入后更新缓存，避免下次检测重新读取"""
+        path = os.path.abspath(config_path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.invalidate(config_path)
+            return
+        data = copy.deepcopy(data)  # 调用方可能继续修改原字典
+        with self.lock:
+            self.entries[path] = (mtime, data, self.build_expected(data))
+
+    def invalidate(self, config_path=None):
+        """清除指定配置（为空时清除全部）的缓存"""
+        with self.lock:
+            if config_path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(os.path.abspath(config_path), None)
+
+
+# 全局共享的标注配置缓存
+annotation_store = AnnotationStore()
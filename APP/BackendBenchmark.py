@@ -0,0 +1,108 @@
+import argparse
+import os
+import time
+import numpy as np
+import torch
+from InferenceBackend import load_model, resolve_model_path
+from InspectionPipeline import InspectionPipeline
+from ImageSource import ImageSource
+
+
+def load_images(image_folder):
+    """读取文件夹中的所有电路板图像"""
+    with ImageSource(image_folder) as source:
+        return [image for _, image in source if image is not None]
+
+
+def run_backend(pipeline, images, repeats):
+    """
+    对每张图像执行完整的两阶段检测
+    :return: (每张耗时列表, 每张图像的 [(电阻数量, 色环字符串列表)])
+    """
+    seconds, outputs = [], []
+    for _ in range(repeats):
+        outputs = []
+        for image in images:
+            start = time.perf_counter()
+            results, rows = pipeline.inspect(image)
+            seconds.append(time.perf_counter() - start)
+            outputs.append((len(results.boxes), [row["bands"] for row in rows]))
+    return seconds, outputs
+
+
+def agreement(reference, outputs):
+    """与参考后端相比：电阻数量一致的图像比例、色环结果一致的电阻比例"""
+    same_count = same_bands = total_bands = 0
+    for (ref_count, ref_bands), (count, bands) in zip(reference, outputs):
+        same_count += ref_count == count
+        total_bands += len(ref_bands)
+        same_bands += sum(a == b for a, b in zip(ref_bands, bands))
+    return same_count / max(len(reference), 1), same_bands / total_bands if total_bands else 1.0
+
+
+def benchmark(model_path, tht_model_path, image_folder, backends=("torch", "onnx"), threads=(0,),
+              conf=0.05, batch_size=16, imgsz=640, repeats=3):
+    """
+    在样本图像上对比各推理后端和线程数下的完整检测耗时及结果一致性（以第一个配置为参考）
+    :param model_path: 电阻定位模型路径（.pt，其他后端使用旁边已导出的模型）
+    :param tht_model_path: 色环检测模型路径（.pt）
+    :param backends: 待比较的后端
+    :param threads: 待比较的 CPU 推理线程数（0 表示自动）
+    :param repeats: 重复测试次数
+    """
+    images = load_images(image_folder)
+    if not images:
+        print(f"警告: 在文件夹 {image_folder} 中未找到图像文件")
+        return []
+
+    default_threads = torch.get_num_threads()
+    reference = None
+    report = []
+    print(f"图像数量: {len(images)}，重复 {repeats} 次")
+    print(f"{'后端':<10}{'线程':>6}{'p50(ms)':>10}{'p90(ms)':>10}{'张/秒':>10}{'数量一致':>10}{'色环一致':>10}")
+    for backend in backends:
+        detect_path = resolve_model_path(os.path.abspath(model_path), backend)
+        tht_path = resolve_model_path(os.path.abspath(tht_model_path), backend)
+        if backend != "torch" and detect_path.endswith(".pt"):
+            print(f"{backend:<10}未找到已导出的模型，请先运行 InferenceBackend.py 导出")
+            continue
+
+        for thread_count in threads:
+            torch.set_num_threads(thread_count or default_threads)
+            pipeline = InspectionPipeline(
+                load_model(detect_path, thread_count), load_model(tht_path, thread_count),
+                conf=conf, tht_batch_mode=batch_size > 1, tht_batch_size=max(1, batch_size), tht_imgsz=imgsz,
+                use_cache=False
+            )
+            pipeline.inspect(images[0])  # 预热
+            seconds, outputs = run_backend(pipeline, images, repeats)
+            if reference is None:
+                reference = outputs
+            count_ratio, band_ratio = agreement(reference, outputs)
+
+            p50, p90 = np.percentile(np.asarray(seconds) * 1000, [50, 90])
+            fps = len(seconds) / sum(seconds)
+            print(f"{backend:<10}{thread_count or '自动':>6}{p50:>10.1f}{p90:>10.1f}{fps:>10.2f}"
+                  f"{count_ratio:>10.1%}{band_ratio:>10.1%}")
+            report.append({"backend": backend, "threads": thread_count, "p50_ms": p50, "p90_ms": p90,
+                           "images_per_second": fps, "count_agreement": count_ratio, "band_agreement": band_ratio})
+
+    torch.set_num_threads(default_threads)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PyTorch / ONNX Runtime / OpenVINO 推理后端耗时与一致性对比")
+    parser.add_argument("images", help="电路板图像文件夹")
+    parser.add_argument("-m", "--model", required=True, help="电阻定位模型路径 (*.pt)")
+    parser.add_argument("-t", "--tht-model", required=True, help="色环检测模型路径 (*.pt)")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"],
+                        choices=["torch", "onnx", "openvino"], help="待比较的后端（第一个作为参考）")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="CPU 推理线程数列表（0 表示自动）")
+    parser.add_argument("--conf", type=float, default=0.05, help="电阻定位置信度阈值")
+    parser.add_argument("--batch-size", type=int, default=16, help="色环检测批大小（1 表示逐个检测）")
+    parser.add_argument("--imgsz", type=int, default=640, help="色环检测统一输入尺寸")
+    parser.add_argument("--repeats", type=int, default=3, help="重复测试次数")
+    args = parser.parse_args()
+    benchmark(args.model, args.tht_model, args.images, args.backends, args.threads,
+              args.conf, args.batch_size, args.imgsz, args.repeats)
@@ -0,0 +1,192 @@
+import cv2
+import numpy as np
+
+
+def to_numpy(data):
+    """将 torch 张量或数组统一转换为 numpy 数组（只发生一次设备同步）"""
+    if hasattr(data, "cpu"):
+        data = data.cpu()
+    if hasattr(data, "numpy"):
+        data = data.numpy()
+    return np.asarray(data)
+
+
+def extract_detections(boxes, min_conf=0.5, colors=None, logger=None):
+    """
+    一次性取出全部检测框并按置信度过滤
+    :param boxes: YOLO结果中的 boxes
+    :param min_conf: 置信度阈值，低于该值的框被跳过
+    :param colors: 颜色字典 {class_id: color_name}，仅用于日志
+    :param logger: 日志对象（可为空）
+    :return: (xyxy 整数坐标 N×4, 置信度 N, 类别 N)
+    """
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    # boxes.data 每行为 [x1, y1, x2, y2, (track_id), conf, cls]，整体只传输一次
+    data = to_numpy(boxes.data).reshape(len(boxes), -1)
+    xyxy = data[:, :4].astype(np.int64)
+    conf = data[:, -2].astype(np.float64)
+    cls = data[:, -1].astype(np.int64)
+
+    keep = conf >= min_conf
+    if logger and logger.enabled("WARNING") and not keep.all():
+        for class_id, score in zip(cls[~keep], conf[~keep]):
+            color_name = colors.get(int(class_id), f"Unknown_{class_id}") if colors else str(class_id)
+            logger.log(f"跳过低置信度检测框: {color_name} {score:.2f}", "WARNING")
+    return xyxy[keep], conf[keep], cls[keep]
+
+
+def box_centers(xyxy):
+    """检测框中心点（整数，与逐框计算的 (x1 + x2) // 2 一致）"""
+    return (xyxy[:, :2] + xyxy[:, 2:]) // 2
+
+
+def adjacent_distances(points):
+    """相邻点之间的欧氏距离"""
+    delta = (points[1:] - points[:-1]).astype(np.float64)
+    return np.sqrt((delta * delta).sum(axis=1))
+
+
+def reject_outliers(centers, conf, logger=None):
+    """
+    异常框处理：按检测顺序计算相邻框距离，
+    过近的框对保留置信度较高者，前后距离都过远的孤立框被移除
+    :return: 保留框的布尔掩码
+    """
+    n = len(centers)
+    valid = np.ones(n, dtype=bool)
+    if n <= 1:
+        return valid
+
+    distances = adjacent_distances(centers)
+    avg_distance = distances.sum() / len(distances)
+    min_threshold = avg_distance * 0.3  # 小于平均距离30%视为过近
+    max_threshold = avg_distance * 2.0  # 大于平均距离200%视为过远
+
+    # 处理过近的框对
+    too_close = distances < min_threshold
+    keep_first = conf[:-1] > conf[1:]
+    valid[1:] &= ~(too_close & keep_first)
+    valid[:-1] &= ~(too_close & ~keep_first)
+
+    # 处理过远的异常框（最后一个框的前后距离都取最后一段距离）
+    prev_dist = distances
+    next_dist = np.empty_like(distances)
+    next_dist[:-1] = distances[1:]
+    next_dist[-1] = distances[-1]
+    isolated = (prev_dist > max_threshold) & (next_dist > max_threshold)
+    valid[1:] &= ~isolated
+
+    if logger and logger.enabled("WARNING"):
+        for i in np.flatnonzero(too_close):
+            logger.log(f"检测到过近框对 {i}-{i + 1}，距离{distances[i]:.1f}", "WARNING")
+        for i in np.flatnonzero(isolated) + 1:
+            logger.log(f"检测到孤立异常框 {i}，前后距离{prev_dist[i - 1]:.1f}/{next_dist[i - 1]:.1f}", "WARNING")
+    return valid
+
+
+def order_bands(centers, logger=None):
+    """
+    判断电阻方向并按色环间隔确定读数顺序
+    :param centers: 过滤后的中心点 N×2
+    :return: 排序后的索引
+    """
+    if len(centers) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # 判断图像方向（横向或纵向），按对应坐标排序
+    spans = centers.max(axis=0) - centers.min(axis=0)
+    horizontal = spans[0] > spans[1]
+    order = np.argsort(centers[:, 0 if horizontal else 1], kind="stable")
+    # 逐个电阻的排序过程属于调试信息，默认级别下跳过
+    debug = logger is not None and logger.enabled("DEBUG")
+    if debug:
+        logger.log("检测到横向电阻，按X坐标排序" if horizontal else "检测到纵向电阻，按Y坐标排序", "DEBUG")
+
+    if len(order) < 2:
+        return order
+
+    # 最大间隔位于误差环一侧，据此判断顺序或逆序
+    distances = adjacent_distances(centers[order])
+    max_dist_idx = int(distances.argmax())
+    if max_dist_idx == 0:
+        if debug:
+            logger.log("检测到顺序排列的色环", "DEBUG")
+        return order[::-1]
+    if max_dist_idx == len(distances) - 1:
+        if debug:
+            logger.log("检测到逆序排列的色环", "DEBUG")
+        return order
+    if debug:
+        logger.log("检测到非常规排列的色环，已尝试调整", "DEBUG")
+    return np.concatenate((order[max_dist_idx + 1:], order[:max_dist_idx + 1]))
+
+
+def order_left_to_right(centers):
+    """
+    简单从左到右排序（THTColorDetect 使用）：先按到其他框的总距离从大到小排列（离群程度），
+    再按中心 x 稳定排序，x 相同的框保持离群程度的顺序。
+    距离矩阵一次算出，按行顺序累加，与逐对相加的浮点结果完全一致
+    :param centers: 中心点 N×2
+    :return: 排序后的索引
+    """
+    delta = (centers[:, None, :] - centers[None, :, :]).astype(np.float64)
+    total_dist = np.cumsum(np.sqrt((delta * delta).sum(axis=2)), axis=1)[:, -1]
+    order = np.argsort(-total_dist, kind="stable")
+    return order[np.argsort(centers[order, 0], kind="stable")]
+
+
+def draw_detections(image, xyxy, conf, cls, colors):
+    """在图像副本上绘制检测框和颜色标签"""
+    img = image.copy()
+    for (x1, y1, x2, y2), score, class_id in zip(xyxy.tolist(), conf.tolist(), cls.tolist()):
+        color_name = colors.get(class_id, f"Unknown_{class_id}")
+
+        # 绘制矩形框
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        # 绘制标签背景
+        label = f"{color_name} {score:.2f}"
+        (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+        cv2.rectangle(img, (x1, y1 - 20), (x1 + w, y1), (0, 255, 0), -1)
+
+        # 绘制标签文本
+        cv2.putText(img, label, (x1, y1 - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+    return img
+
+
+def plot_predictions(image, results, colors, logger=None, draw=True):
+    """
+    在图像上绘制预测框和颜色标签，并按照色环顺序排序
+    增加异常框处理逻辑：
+    - 处理过于接近的相邻框
+    - 处理过于分散的异常框
+    :param image: 原始图像
+    :param results: YOLO预测结果
+    :param colors: 颜色字典 {class_id: color_name}
+    :param logger: 日志对象（可为空）
+    :param draw: 是否绘制结果图，为 False 时直接返回原图以节省拷贝和绘制开销
+    :return: 绘制后的图像和按顺序排列的颜色信息
+    """
+    xyxy, conf, cls = extract_detections(results[0].boxes, colors=colors, logger=logger)
+    if len(conf) == 0:
+        if logger:
+            logger.log("未检测到有效色环", "WARNING")
+        return (image.copy() if draw else image), []
+
+    centers = box_centers(xyxy)
+    valid = reject_outliers(centers, conf, logger)
+    if not valid.any():
+        if logger:
+            logger.log("异常框过滤后无有效色环保留", "WARNING")
+        return (image.copy() if draw else image), []
+
+    xyxy, conf, cls, centers = xyxy[valid], conf[valid], cls[valid], centers[valid]
+    order = order_bands(centers, logger)
+    xyxy, conf, cls = xyxy[order], conf[order], cls[order]
+
+    color_info = [colors.get(class_id, f"Unknown_{class_id}") for class_id in cls.tolist()]
+    img = draw_detections(image, xyxy, conf, cls, colors) if draw else image
+    return img, color_info
@@ -0,0 +1,190 @@
+import time
+import numpy as np
+from BandOrdering import plot_predictions
+
+try:
+    import torch
+except ImportError:  # 无 torch 时以 numpy 数组模拟，逐框实现的开销会被低估
+    torch = None
+
+
+class FakeBoxes:
+    """
+    按 ultralytics Boxes 的结构模拟检测框：属性是对 data 的切片，逐框迭代时每次构造新对象。
+    已安装 torch 时使用 torch 张量，与真实推理结果一致
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, -2]
+
+    @property
+    def cls(self):
+        return self.data[:, -1]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, idx):
+        return FakeBoxes(self.data[idx:idx + 1])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class FakeResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def legacy_plot_predictions(results, colors):
+    """原逐框实现（只保留排序部分），作为一致性对照"""
+    boxes = results[0].boxes
+    detections = []
+    for box in boxes:
+        class_id = int(box.cls.item())  # 原实现为 int(box.cls)，numpy 单元素数组需用 item()
+        color_name = colors.get(class_id, f"Unknown_{class_id}")
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
+        conf = float(box.conf.item())
+        if conf < 0.5:
+            continue
+        detections.append({'center': (center_x, center_y), 'color': color_name, 'conf': conf})
+
+    if not detections:
+        return []
+
+    if len(detections) > 1:
+        distances = []
+        for i in range(len(detections) - 1):
+            p1 = detections[i]['center']
+            p2 = detections[i + 1]['center']
+            distances.append(np.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2))
+        avg_distance = np.mean(distances)
+        min_threshold = avg_distance * 0.3
+        max_threshold = avg_distance * 2.0
+        valid_indices = set(range(len(detections)))
+        for i in range(len(distances)):
+            if distances[i] < min_threshold:
+                if detections[i]['conf'] > detections[i + 1]['conf']:
+                    valid_indices.discard(i + 1)
+                else:
+                    valid_indices.discard(i)
+        for i in range(len(detections)):
+            if i == 0:
+                continue
+            prev_dist = distances[i - 1] if i < len(distances) else distances[-1]
+            next_dist = distances[i] if i < len(distances) else distances[-1]
+            if prev_dist > max_threshold and next_dist > max_threshold:
+                valid_indices.discard(i)
+        filtered_detections = [detections[i] for i in sorted(valid_indices)]
+    else:
+        filtered_detections = detections.copy()
+
+    if not filtered_detections:
+        return []
+
+    x_coords = [d['center'][0] for d in filtered_detections]
+    y_coords = [d['center'][1] for d in filtered_detections]
+    horizontal = (max(x_coords) - min(x_coords)) > (max(y_coords) - min(y_coords))
+    filtered_detections.sort(key=lambda x: x['center'][0 if horizontal else 1])
+
+    distances = []
+    for i in range(len(filtered_detections) - 1):
+        x1, y1 = filtered_detections[i]['center']
+        x2, y2 = filtered_detections[i + 1]['center']
+        distances.append(np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2))
+
+    if len(distances) > 0:
+        max_dist_idx = np.argmax(distances)
+        if max_dist_idx == 0:
+            ordered_detections = list(reversed(filtered_detections))
+        elif max_dist_idx == len(distances) - 1:
+            ordered_detections = filtered_detections
+        else:
+            ordered_detections = filtered_detections[max_dist_idx + 1:] + filtered_detections[:max_dist_idx + 1]
+    else:
+        ordered_detections = filtered_detections
+    return [det['color'] for det in ordered_detections]
+
+
+def random_case(rng):
+    """生成一组随机色环检测框（含低置信度框、重复框、离群框和随机方向）"""
+    n = int(rng.integers(1, 9))
+    spacing = rng.uniform(20, 60)
+    positions = np.arange(n) * spacing + rng.normal(0, spacing * 0.15, n)
+    positions[-1] += spacing * rng.uniform(0, 1.5)  # 误差环前的较大间隔
+    if rng.random() < 0.5:
+        positions = positions[::-1]
+    angle = rng.uniform(0, np.pi)
+    cx = 320 + positions * np.cos(angle)
+    cy = 320 + positions * np.sin(angle)
+    if rng.random() < 0.3:  # 离群框
+        cx[rng.integers(n)] += rng.uniform(200, 400)
+    w, h = rng.uniform(8, 20), rng.uniform(30, 60)
+    xyxy = np.stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2), axis=1).astype(np.float32)
+    conf = rng.uniform(0.3, 1.0, n).astype(np.float32)
+    cls = rng.integers(0, 11, n).astype(np.float32)
+    data = np.concatenate((xyxy, conf[:, None], cls[:, None]), axis=1)
+    if torch is not None:
+        data = torch.from_numpy(data)
+    return [FakeResult(FakeBoxes(data))]
+
+
+def benchmark(colors, cases=5000, seed=0):
+    """
+    对比逐框实现与向量化实现的输出一致性和耗时
+    :param colors: 颜色字典
+    :param cases: 随机用例数量
+    :param seed: 随机种子
+    """
+    rng = np.random.default_rng(seed)
+    samples = [random_case(rng) for _ in range(cases)]
+    image = np.zeros((640, 640, 3), dtype=np.uint8)
+
+    mismatches = sum(
+        1 for results in samples
+        if legacy_plot_predictions(results, colors) != plot_predictions(image, results, colors, draw=False)[1]
+    )
+
+    start = time.perf_counter()
+    for results in samples:
+        legacy_plot_predictions(results, colors)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for results in samples:
+        plot_predictions(image, results, colors, draw=False)
+    vectorized_time = time.perf_counter() - start
+
+    print(f"用例数量: {cases}，数据类型: {'torch' if torch is not None else 'numpy'}，结果不一致数量: {mismatches}")
+    print(f"逐框实现: {legacy_time / cases * 1e6:.1f} us/次")
+    print(f"向量化实现: {vectorized_time / cases * 1e6:.1f} us/次")
+    print(f"加速比: {legacy_time / vectorized_time:.2f}x")
+    return mismatches
+
+
+if __name__ == '__main__':
+    # 颜色映射字典 {class_id: color_name}
+    COLOR_MAP = {
+        0: "red",
+        1: "yellow",
+        2: "black",
+        3: "gold",
+        4: "orange",
+        5: "blue",
+        6: "brown",
+        7: "green",
+        8: "purple",
+        9: "white",
+        10: "gray"
+    }
+    # 结果不一致时以非零状态退出，便于在脚本中检查
+    raise SystemExit(1 if benchmark(COLOR_MAP) else 0)
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import cv2
+from ModelRegistry import get_model
+from InspectionPipeline import InspectionPipeline, ConsoleLogger, get_config_path
+from DetectionCache import image_hash
+from ResultStore import ResultStore, CSV_HEADERS
+from ImageSource import ImageSource
+from CropWriter import CropWriter
+from ResultCache import ResultCache, DEFAULT_CACHE_PATH
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+# 每个工作进程独立持有的检测流程和结果库连接
+_pipeline = None
+_store = None
+_model_name = None
+
+
+def init_worker(model_path, tht_model_path, options):
+    """工作进程初始化：每个进程加载一份模型"""
+    global _pipeline, _store, _model_name
+    backend, threads = options["backend"], options["threads"]
+    _pipeline = InspectionPipeline(
+        get_model(model_path, backend=backend, threads=threads),
+        get_model(tht_model_path, backend=backend, threads=threads),
+        ConsoleLogger(options["verbose"]),
+        conf=options["conf"],
+        tht_batch_mode=options["batch_size"] > 1,
+        tht_batch_size=max(1, options["batch_size"]),
+        tht_imgsz=options["imgsz"],
+        use_cache=False,  # 每张图片只检测一次，无需缓存
+        tile_size=options["tile_size"] or None,
+        tile_overlap=options["tile_overlap"],
+        tile_batch_size=options["tile_batch_size"],
+        classic_mode=options["classic"],
+        crop_writer=CropWriter(options["crop_dir"]) if options["crop_dir"] else None,
+        oriented_crops=options["oriented"],
+        result_cache=ResultCache(options["result_cache"]) if options["result_cache"] else None
+    )
+    _store = ResultStore(options["store"]) if options["store"] else None
+    _model_name = os.path.basename(model_path)
+
+
+def write_csv(csv_path, rows):
+    """按输出窗口的格式写入CSV"""
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADERS)
+        for index, row in enumerate(rows, start=1):
+            writer.writerow([
+                index,
+                f"({row['coords'][0]:.1f}, {row['coords'][1]:.1f})",
+                row['class'],
+                f"{row['confidence']:.2f}",
+                row['text']
+            ])
+
+
+def inspect_image(image_path, output_folder, config_dir, image=None):
+    """检测单张电路板图像并写出 CSV/JSON 结果（image 为已解码的图像，为空时从文件读取）"""
+    start = time.perf_counter()
+    if image is None:
+        image = cv2.imread(image_path)
+    if image is None:
+        return {"image": os.path.basename(image_path), "error": "无法读取图像"}
+
+    stem = Path(image_path).stem
+    _, rows = _pipeline.inspect(image, get_config_path(image_path, config_dir), name=stem)
+    run_id = None
+    if _store is not None:
+        run_id = _store.add_run(rows, image_path=os.path.abspath(image_path), image_hash=image_hash(image),
+                                model=_model_name)
+
+    write_csv(os.path.join(output_folder, f"{stem}.csv"), rows)
+    with open(os.path.join(output_folder, f"{stem}.json"), 'w', encoding='utf-8') as f:
+        json.dump({"image": os.path.basename(image_path), "resistors": rows}, f, ensure_ascii=False, indent=4)
+    if _pipeline.crop_writer is not None:
+        _pipeline.crop_writer.flush()  # 工作进程退出时不会等待后台线程，每张图像结束前写完裁剪图像
+
+    return {
+        "image": os.path.basename(image_path),
+        "resistors": len(rows),
+        "run_id": run_id,
+        "passed": sum(1 for row in rows if row["comparison"] == " ✔"),
+        "failed": sum(1 for row in rows if row["comparison"].startswith(" ✘")),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def _run_safely(image_path, output_folder, config_dir, image=None):
+    """检测单张图像，异常时返回错误信息而不中断整批任务"""
+    try:
+        return inspect_image(image_path, output_folder, config_dir, image)
+    except Exception as e:
+        return {"image": os.path.basename(image_path), "error": str(e)}
+
+
+def process_folder(input_folder, output_folder, model_path, tht_model_path,
+                   config_dir="AnnotationConfig", workers=1, conf=0.05, batch_size=16, imgsz=640, verbose=False,
+                   tile_size=0, tile_overlap=0.25, tile_batch_size=8, store_path=None, backend="torch", threads=0,
+                   classic=False, crop_dir=None, oriented=False, result_cache=DEFAULT_CACHE_PATH):
+    """
+    批量检测文件夹中的所有电路板图像
+    :param input_folder: 输入文件夹路径
+    :param output_folder: 输出文件夹路径
+    :param model_path: 电阻定位模型路径
+    :param tht_model_path: 色环检测模型路径
+    :param config_dir: 标注配置文件夹（用于比对）
+    :param workers: 工作进程数量
+    :param conf: 电阻定位置信度阈值
+    :param batch_size: 色环检测批大小（1 表示逐个检测）
+    :param imgsz: 色环检测统一的输入尺寸
+    :param verbose: 是否输出详细日志
+    :param tile_size: 分块检测的分块边长（0 表示整图检测）
+    :param tile_overlap: 相邻分块重叠比例
+    :param tile_batch_size: 每批推理的分块数量
+    :param store_path: 结果库路径，为空时不写入结果库
+    :param backend: 推理后端（torch / onnx / openvino，非 torch 时使用 .pt 旁边已导出的模型）
+    :param threads: 每个工作进程的 CPU 推理线程数（0 表示自动，多进程时建议设为 核心数/进程数）
+    :param classic: 是否先使用 HSV 传统色环识别，置信度不足或阻值校验失败时再交给色环模型
+    :param crop_dir: 裁剪图像导出文件夹（调试用），为空时裁剪图像不写入磁盘
+    :param oriented: 是否将倾斜电阻旋转到统一尺寸的水平条带后再做色环检测
+    :param result_cache: 磁盘结果缓存路径（与检测页面共用），已检测过的图像直接读取结果；为空时不使用
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    image_files = sorted(os.path.join(input_folder, f) for f in os.listdir(input_folder)
+                         if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS)
+    if not image_files:
+        print(f"警告: 在文件夹 {input_folder} 中未找到图像文件")
+        return []
+
+    options = {"conf": conf, "batch_size": batch_size, "imgsz": imgsz, "verbose": verbose,
+               "tile_size": tile_size, "tile_overlap": tile_overlap, "tile_batch_size": tile_batch_size,
+               "store": store_path, "backend": backend, "threads": threads, "classic": classic,
+               "crop_dir": crop_dir, "oriented": oriented, "result_cache": result_cache}
+    summary = []
+    start = time.perf_counter()
+
+    if workers <= 1:
+        init_worker(model_path, tht_model_path, options)
+        # 检测当前图像时后台线程解码后续图像
+        for i, (image_path, image) in enumerate(ImageSource(image_files), start=1):
+            summary.append(_run_safely(image_path, output_folder, config_dir, image))
+            print(f"[{i}/{len(image_files)}] {summary[-1]}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(model_path, tht_model_path, options)) as executor:
+            futures = [executor.submit(_run_safely, image_path, output_folder, config_dir)
+                       for image_path in image_files]
+            for i, future in enumerate(as_completed(futures), start=1):
+                summary.append(future.result())
+                print(f"[{i}/{len(image_files)}] {summary[-1]}")
+
+    summary.sort(key=lambda item: item["image"])
+    with open(os.path.join(output_folder, "summary.json"), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=4)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n共处理 {len(image_files)} 张图像，耗时 {elapsed:.1f} s（{len(image_files) / elapsed:.2f} 张/秒）")
+    print(f"检测结果已保存到 {output_folder}")
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="无界面批量电路板电阻检测")
+    parser.add_argument("input", help="电路板图像文件夹")
+    parser.add_argument("-o", "--output", default="BatchResult", help="结果输出文件夹")
+    parser.add_argument("-m", "--model", required=True, help="电阻定位模型路径 (*.pt)")
+    parser.add_argument("-t", "--tht-model", required=True, help="色环检测模型路径 (*.pt)")
+    parser.add_argument("-c", "--config-dir", default="AnnotationConfig", help="标注配置文件夹")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="工作进程数量")
+    parser.add_argument("--conf", type=float, default=0.05, help="电阻定位置信度阈值")
+    parser.add_argument("--batch-size", type=int, default=16, help="色环检测批大小（1 表示逐个检测）")
+    parser.add_argument("--imgsz", type=int, default=640, help="色环检测统一输入尺寸")
+    parser.add_argument("--tile-size", type=int, default=0, help="分块检测的分块边长（0 表示整图检测）")
+    parser.add_argument("--tile-overlap", type=float, default=0.25, help="相邻分块重叠比例")
+    parser.add_argument("--tile-batch", type=int, default=8, help="每批推理的分块数量")
+    parser.add_argument("--store", help="同时写入的结果库路径（如 DetectResult/results.db）")
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx", "openvino"], help="推理后端")
+    parser.add_argument("--threads", type=int, default=0, help="每个进程的 CPU 推理线程数（0 表示自动）")
+    parser.add_argument("--classic", action="store_true", help="先使用 HSV 传统色环识别，未通过时交给色环模型")
+    parser.add_argument("--oriented", action="store_true", help="旋转校正：倾斜电阻旋转到水平条带后再做色环检测")
+    parser.add_argument("--result-cache", default=str(DEFAULT_CACHE_PATH), help="磁盘结果缓存路径")
+    parser.add_argument("--no-result-cache", action="store_true", help="不使用磁盘结果缓存")
+    parser.add_argument("--export-crops", metavar="DIR", help="同时导出裁剪图像到该文件夹（调试用）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    process_folder(
+        input_folder=args.input,
+        output_folder=args.output,
+        model_path=args.model,
+        tht_model_path=args.tht_model,
+        config_dir=args.config_dir,
+        workers=args.workers,
+        conf=args.conf,
+        batch_size=args.batch_size,
+        imgsz=args.imgsz,
+        verbose=args.verbose,
+        tile_size=args.tile_size,
+        tile_overlap=args.tile_overlap,
+        tile_batch_size=args.tile_batch,
+        store_path=args.store,
+        backend=args.backend,
+        threads=args.threads,
+        classic=args.classic,
+        crop_dir=args.export_crops,
+        oriented=args.oriented,
+        result_cache=None if args.no_result_cache else args.result_cache
+    )
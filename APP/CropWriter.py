@@ -0,0 +1,66 @@
+import os
+import queue
+import threading
+import cv2
+
+
+class CropWriter:
+    """
+    裁剪图像异步保存（调试/导出用）
+    检测流程直接使用内存中的裁剪视图，只有开启导出时才由后台线程写出 PNG；
+    队列有界，写盘跟不上时提交方等待，内存占用不会无限增长
+    """
+
+    def __init__(self, folder="CropResult", max_queue=64, logger=None):
+        """
+        :param folder: 导出文件夹
+        :param max_queue: 等待写出的裁剪图像数量上限
+        :param logger: 日志对象（写出失败时记录）
+        """
+        self.folder = folder
+        self.logger = logger
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.written = 0
+        self.failed = 0
+
+    def save(self, name, crops):
+        """
+        提交一张电路板的裁剪结果，文件名为 {name}_{电阻编号}.png（同名文件直接覆盖）
+        :param crops: crop_resistors 的返回值，裁剪图像可以是原图的视图
+        """
+        if self.thread is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self.thread = threading.Thread(target=self._run, name="CropWriter", daemon=True)
+            self.thread.start()
+        for i, _, _, _, crop_img in crops:
+            self.queue.put((os.path.join(self.folder, f"{name}_{i + 1}.png"), crop_img))
+
+    def _run(self):
+        """写出线程"""
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                path, crop_img = item
+                if cv2.imwrite(path, crop_img):
+                    self.written += 1
+                else:
+                    self.failed += 1
+                    if self.logger:
+                        self.logger.log(f"裁剪图像保存失败: {path}", "ERROR")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """等待已提交的裁剪图像全部写出"""
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        """写完剩余的裁剪图像后结束写出线程"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
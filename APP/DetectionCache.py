@@ -0,0 +1,101 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def image_hash(image):
+    """计算图像内容哈希（包含尺寸信息，相同像素内容得到相同结果）"""
+    data = np.ascontiguousarray(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((data.shape, data.dtype.str)).encode())
+    digest.update(memoryview(data).cast("B"))
+    return digest.hexdigest()
+
+
+def model_key(model):
+    """
+    模型的缓存标识：注册表中的键（解析后的权重路径, 修改时间, 线程数），
+    不在注册表中的模型取权重路径和修改时间；无法确定权重文件时返回 None（此时不使用缓存）
+    """
+    key = getattr(model, "registry_key", None)
+    if key is not None:
+        return key
+    path = getattr(model, "path", None) or getattr(model, "ckpt_path", None)
+    if not isinstance(path, (str, os.PathLike)) or not os.path.exists(path):
+        return None
+    path = os.path.abspath(path)
+    return path, os.path.getmtime(path)
+
+
+class DetectionCache:
+    """
+    内存中的检测结果缓存，按 (图像哈希, 模型权重, 推理参数) 索引，
+    供检测页面与标注窗口共享，避免对同一张图片重复推理。
+    只保存检测结果，不持有模型对象，注册表淘汰的模型可以正常释放
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # {(图像哈希, 模型标识, 参数): 检测结果}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_key, model, params):
+        """缓存键，无法确定模型权重时返回 None"""
+        key = model_key(model)
+        if key is None:
+            return None
+        return image_key, key, tuple(sorted(params.items()))
+
+    def get(self, image_key, model, **params):
+        """命中时返回检测结果，否则返回 None"""
+        key = self.make_key(image_key, model, params)
+        if key is None:
+            return None
+        with self.lock:
+            results = self.entries.get(key)
+            if results is not None:
+                self.entries.move_to_end(key)
+            return results
+
+    def put(self, image_key, model, results, **params):
+        key = self.make_key(image_key, model, params)
+        if key is None:
+            return
+        with self.lock:
+            self.entries[key] = results
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def detect(self, model, image, image_key=None, force=False, predict=None, **params):
+        """
+        获取检测结果，未命中或 force=True 时执行推理并写入缓存
+        :param model: YOLO模型
+        :param image: 输入图像
+        :param image_key: 预先计算的图像哈希，为空时自动计算
+        :param force: 是否强制重新推理
+        :param predict: 自定义推理函数 predict(image) -> 检测结果（如分块检测），为空时直接调用模型
+        :param params: 推理参数（同时作为缓存键的一部分）
+        :return: 单张图像的检测结果
+        """
+        if image_key is None:
+            image_key = image_hash(image)
+        if not force:
+            results = self.get(image_key, model, **params)
+            if results is not None:
+                return results
+
+        results = predict(image) if predict else model(image, **params)[0]
+        self.put(image_key, model, results, **params)
+        return results
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# 全局共享的检测结果缓存
+detection_cache = DetectionCache()
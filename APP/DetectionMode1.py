@@ -1,14 +1,17 @@
-import json
-
-import numpy as np
 from PySide6 import QtWidgets, QtCore, QtGui
 import cv2
-import copy
 import os
-import shutil
-from ultralytics import YOLO
+from ModelRegistry import get_model
 from pathlib import Path
 from THTAnnotationWindow import AnnotationWindow
+from InspectionPipeline import InspectionPipeline, get_config_path, DEFAULT_THT_MODEL_PATH
+from InferenceWorker import InferenceEngine, InferenceJob
+from DetectionCache import image_hash
+from ImageRenderer import ImageRenderer
+from Profiler import profiler
+from ImageSource import ImageSource, list_images
+from CropWriter import CropWriter
+from ResultCache import result_cache
 
 
 class DetectionModePage1(QtWidgets.QWidget):
@@ -18,39 +21,78 @@ class DetectionModePage1(QtWidgets.QWidget):
         self.image_name = None
         self.model = None
         self.model_path = None
+        self.model_file = None  # 模型完整路径（切换推理后端时重新加载）
         self.base_result_image = None  # 存储基础检测图
         self.results = None  # 存储检测结果对象
         self.logger = logger
         self.output_window = None
-        self.cache_annotation = {}
+        self.mode_id = None  # 本页面的结果模式
         self.image_path = None
+        self.image_source = None  # 当前图片所在文件夹中后续图片的预读来源（下一张）
+        self.image_key = None  # 当前图片内容哈希，用于复用检测结果
+        self.engine = InferenceEngine(parent=self)
+        self.original_renderer = ImageRenderer()  # 原图显示缓存
+        self.result_renderer = ImageRenderer()  # 检测结果图显示缓存
+
+        # 色环检测模型（首次检测时从模型注册表加载）
+        self.tht_model_path = DEFAULT_THT_MODEL_PATH
+        self.tht_model = None
+        self.tht_batch_mode = True  # 是否批量进行色环检测
+        self.tht_batch_size = 16  # 每批裁剪图像数量
+        self.tht_imgsz = 640  # 批量检测时统一的输入尺寸
+
+        # 分块检测设置（高分辨率图像中的小电阻）
+        self.tiled_mode = False
+        self.tile_size = 1024  # 分块边长
+        self.tile_overlap = 0.25  # 相邻分块重叠比例
+        self.tile_batch_size = 8  # 每批推理的分块数量
+
+        # 推理后端（onnx 时优先加载 .pt 旁边已导出的 .onnx 模型）
+        self.backend = "torch"
+
+        # 传统色环识别（HSV 颜色范围），置信度不足时交给色环模型
+        self.classic_mode = False
+        self.classic_min_confidence = 0.6
 
-        # 加载色环检测模型
-        self.tht_model = YOLO(r'/Users/wfcy/Dev/PycharmProj/YOLOTrain/APP/Module/THTColorDetect/New/best.pt')
-        self.COLOR_MAP = {
-            0: "红",
-            1: "黄",
-            2: "黑",
-            3: "金",
-            4: "橙",
-            5: "蓝",
-            6: "棕",
-            7: "绿",
-            8: "紫",
-            9: "白",
-            10: "灰"
-        }
-
-        # 定义颜色配置
-        self.base_colors = ["黑", "棕", "红", "橙", "黄", "绿", "蓝", "紫", "灰", "白"]
-        self.multiplier_bands = ["黑", "棕", "红", "橙", "黄", "绿", "蓝", "金", "银"]
-        self.tolerance_bands = ["棕", "红", "绿", "金", "银"]
+        # 裁剪图像导出（调试用，关闭时裁剪图像只在内存中传递）
+        self.crop_writer = None
+
+        # 旋转校正（倾斜电阻旋转到水平条带后再做色环检测）
+        self.oriented_crops = False
+
+        # 磁盘结果缓存：重复检测同一图像时直接读取上次的结果（为 None 时不使用）
+        self.result_cache = result_cache
 
         self.init_default_dirs()
         self.setup_ui()
         self.setup_connections()
+        self.preload_models()
         self.logger.log("检测模式一程序启动", "INFO")
 
+    def preload_models(self):
+        """在后台线程预加载并预热色环检测模型，避免首次检测过慢"""
+        job = InferenceJob(self.load_tht_model, self.tht_model_path, self.backend)
+        job.signals.finished.connect(self.on_tht_model_loaded)
+        job.signals.failed.connect(
+            lambda job, message: self.logger.log(f"色环检测模型预加载失败: {message}", "WARNING"))
+        self.engine.submit(job)
+
+    def load_tht_model(self, job, tht_model_path, backend):
+        """获取色环检测模型（在工作线程中运行），结果放在 job.context 中由界面线程读取"""
+        job.context["tht_model"] = get_model(tht_model_path, backend=backend)
+
+    def on_tht_model_loaded(self, job):
+        self.tht_model = job.context["tht_model"]
+
+    def is_stale(self, job):
+        """检测任务对应的图片已不是当前图片（期间打开了其他图片或重新选择了模型）"""
+        return job.context.get("image_key") != self.image_key
+
+    def cancel_stale_jobs(self):
+        """取消针对其他图片的检测任务（预加载等与图片无关的任务不受影响）"""
+        if self.engine.cancel_where(lambda job: "image_key" in job.context and self.is_stale(job)):
+            self.logger.log("检测模式一已取消之前图片的检测任务", "WARNING")
+
     def init_default_dirs(self):
         """初始化默认存储目录"""
         Path("Picture").mkdir(parents=True, exist_ok=True)
@@ -61,15 +103,15 @@ class DetectionModePage1(QtWidgets.QWidget):
 
     def get_config_path_for_current_image(self):
         """生成当前图片对应的配置文件路径"""
-        if not self.image_path:
-            return None
-        image_path = Path(self.image_path)
-        config_dir = Path("AnnotationConfig")
-        return config_dir / f"{image_path.stem}_config.json"
-
-    def set_output_window(self, output_window):
-        """设置输出窗口引用"""
+        return get_config_path(self.image_path)
+
+    def set_output_window(self, output_window, mode_id=None):
+        """
+        设置输出窗口引用
+        :param mode_id: 本页面在输出窗口中的结果模式（与页面序号一致）
+        """
         self.output_window = output_window
+        self.mode_id = mode_id
 
     def setup_ui(self):
         """初始化界面布局和组件"""
@@ -87,13 +129,32 @@ class DetectionModePage1(QtWidgets.QWidget):
         control_layout = QtWidgets.QHBoxLayout()
         self.btn_annotate = self.create_button("📝 设置阻值")
         self.btn_open = self.create_button("📂 打开图片")
+        self.btn_next = self.create_button("⏭ 下一张")
         self.btn_model = self.create_button("⚙️ 选择模型")
         self.btn_detect = self.create_button("🔍 开始检测")
+        self.btn_cancel = self.create_button("⏹ 取消检测")
+        self.btn_tile = self.create_button("🧩 分块检测")
+        self.btn_tile.setCheckable(True)
+        self.btn_backend = self.create_button("⚡ ONNX推理")
+        self.btn_backend.setCheckable(True)
+        self.btn_classic = self.create_button("🎨 HSV快速识别")
+        self.btn_classic.setCheckable(True)
+        self.btn_export_crops = self.create_button("💾 导出裁剪")
+        self.btn_export_crops.setCheckable(True)
+        self.btn_oriented = self.create_button("📐 旋转校正")
+        self.btn_oriented.setCheckable(True)
 
         control_layout.addWidget(self.btn_annotate)
         control_layout.addWidget(self.btn_open)
+        control_layout.addWidget(self.btn_next)
         control_layout.addWidget(self.btn_model)
         control_layout.addWidget(self.btn_detect)
+        control_layout.addWidget(self.btn_cancel)
+        control_layout.addWidget(self.btn_tile)
+        control_layout.addWidget(self.btn_backend)
+        control_layout.addWidget(self.btn_classic)
+        control_layout.addWidget(self.btn_export_crops)
+        control_layout.addWidget(self.btn_oriented)
         main_layout.addLayout(control_layout)
 
         # 设置布局比例
@@ -142,8 +203,15 @@ class DetectionModePage1(QtWidgets.QWidget):
         """连接按钮信号与槽函数"""
         self.btn_annotate.clicked.connect(self.open_annotation_window)
         self.btn_open.clicked.connect(self.open_image)
+        self.btn_next.clicked.connect(self.next_image)
         self.btn_model.clicked.connect(self.select_model)
         self.btn_detect.clicked.connect(self.detect_image)
+        self.btn_cancel.clicked.connect(self.cancel_detection)
+        self.btn_tile.toggled.connect(self.toggle_tiled_mode)
+        self.btn_backend.toggled.connect(self.toggle_backend)
+        self.btn_classic.toggled.connect(self.toggle_classic_mode)
+        self.btn_export_crops.toggled.connect(self.toggle_export_crops)
+        self.btn_oriented.toggled.connect(self.toggle_oriented_crops)
 
     def open_annotation_window(self):
         """打开标注窗口"""
@@ -155,7 +223,8 @@ class DetectionModePage1(QtWidgets.QWidget):
             return
 
         try:
-            self.annot_window = AnnotationWindow(self.model, self.current_image, self.logger, self, self.image_name)
+            self.annot_window = AnnotationWindow(self.model, self.current_image, self.logger, self, self.image_name,
+                                                 image_key=self.image_key, pipeline=self.create_pipeline(self.model))
             self.annot_window.exec()
         except Exception as e:
             self.logger.log(f"标注窗口打开失败: {str(e)}", "ERROR")
@@ -167,7 +236,7 @@ class DetectionModePage1(QtWidgets.QWidget):
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
             self, "检测模式一选择模型",
             default_dir,
-            "模型文件 (*.pt)"
+            "模型文件 (*.pt *.onnx)"
         )
 
         if file_path:
@@ -179,14 +248,17 @@ class DetectionModePage1(QtWidgets.QWidget):
                 self.label_result.clear()
                 self.image_name = None
                 self.current_image = None
+                self.image_key = None
                 self.base_result_image = None
                 self.results = None
+                self.cancel_stale_jobs()
                 if self.output_window:
-                    self.output_window.clear_results()
+                    self.output_window.clear_results(self.mode_id)
 
-                # 加载新模型
-                self.model = YOLO(file_path)
-                self.model_path = Path(file_path).name
+                # 加载新模型（已加载过的权重直接复用）
+                self.model = get_model(file_path, backend=self.backend)
+                self.model_file = file_path
+                self.model_path = Path(self.model.path).name
                 self.btn_model.setText(f"模型: {self.model_path}")
                 self.logger.log(f"检测模式一成功加载模型: {self.model_path}", "SUCCESS")
                 QtWidgets.QMessageBox.information(
@@ -201,239 +273,8 @@ class DetectionModePage1(QtWidgets.QWidget):
                 )
                 self.btn_model.setText("⚙️ 选择模型")
 
-    def plot_predictions(self, image, results, colors):
-        """
-        在图像上绘制预测框和颜色标签，并按照色环顺序排序
-        增加异常框处理逻辑：
-        - 处理过于接近的相邻框
-        - 处理过于分散的异常框
-        """
-        img = image.copy()
-        color_info = []
-        boxes = results[0].boxes
-
-        # 收集所有检测框的中心点坐标和颜色信息
-        detections = []
-        for box in boxes:
-            class_id = int(box.cls)
-            color_name = colors.get(class_id, f"Unknown_{class_id}")
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
-            conf = float(box.conf)
-
-            # 跳过置信度低的框
-            if conf < 0.5:
-                self.logger.log(f"跳过低置信度检测框: {color_name} {conf:.2f}", "WARNING")
-                continue
-
-            detections.append({
-                'box': (x1, y1, x2, y2),
-                'center': (center_x, center_y),
-                'color': color_name,
-                'class_id': class_id,
-                'conf': conf
-            })
-
-        if not detections:
-            self.logger.log("未检测到有效色环", "WARNING")
-            return img, []
-
-        # 1. 异常框处理 - 过滤过于接近或分散的框
-        filtered_detections = []
-        if len(detections) > 1:
-            # 计算所有相邻框的距离
-            distances = []
-            for i in range(len(detections) - 1):
-                p1 = detections[i]['center']
-                p2 = detections[i + 1]['center']
-                distance = np.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
-                distances.append(distance)
-
-            # 计算平均距离和标准差
-            avg_distance = np.mean(distances)
-            std_distance = np.std(distances)
-
-            # 距离阈值设置
-            min_threshold = avg_distance * 0.3  # 小于平均距离30%视为过近
-            max_threshold = avg_distance * 2.0  # 大于平均距离200%视为过远
-
-            # 保留有效框的索引
-            valid_indices = set(range(len(detections)))
-
-            # 处理过近的框对
-            for i in range(len(distances)):
-                if distances[i] < min_threshold:
-                    self.logger.log(f"检测到过近框对 {i}-{i + 1}，距离{distances[i]:.1f}", "WARNING")
-                    # 保留置信度较高的框
-                    if detections[i]['conf'] > detections[i + 1]['conf']:
-                        valid_indices.discard(i + 1)
-                    else:
-                        valid_indices.discard(i)
-
-            # 处理过远的异常框
-            for i in range(len(detections)):
-                if i == 0:
-                    continue
-                prev_dist = distances[i - 1] if i < len(distances) else distances[-1]
-                next_dist = distances[i] if i < len(distances) else distances[-1]
-                if (prev_dist > max_threshold and next_dist > max_threshold):
-                    self.logger.log(f"检测到孤立异常框 {i}，前后距离{prev_dist:.1f}/{next_dist:.1f}", "WARNING")
-                    valid_indices.discard(i)
-
-            # 创建过滤后的检测列表
-            filtered_detections = [detections[i] for i in sorted(valid_indices)]
-        else:
-            filtered_detections = detections.copy()
-
-        # 如果没有有效检测框，返回空结果
-        if not filtered_detections:
-            self.logger.log("异常框过滤后无有效色环保留", "WARNING")
-            return img, []
-
-        # 2. 判断图像方向（横向或纵向）
-        x_coords = [d['center'][0] for d in filtered_detections]
-        y_coords = [d['center'][1] for d in filtered_detections]
-        x_span = max(x_coords) - min(x_coords)
-        y_span = max(y_coords) - min(y_coords)
-        horizontal = x_span > y_span  # True表示横向，False表示纵向
-
-        # 3. 根据图像方向进行初步排序
-        if horizontal:
-            filtered_detections.sort(key=lambda x: x['center'][0])
-            self.logger.log("检测到横向电阻，按X坐标排序", "INFO")
-        else:
-            filtered_detections.sort(key=lambda x: x['center'][1])
-            self.logger.log("检测到横向电阻，按Y坐标排序", "INFO")
-
-        # 4. 计算相邻色环的距离
-        distances = []
-        for i in range(len(filtered_detections) - 1):
-            x1, y1 = filtered_detections[i]['center']
-            x2, y2 = filtered_detections[i + 1]['center']
-            distance = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-            distances.append(distance)
-
-        # 5. 确定色环顺序
-        if len(distances) > 0:
-            # 找到最大间隔的位置
-            max_dist_idx = np.argmax(distances)
-
-            # 判断是顺序还是逆序情况
-            if max_dist_idx == 0:
-                # 最大间隔在最前面 - 顺序情况
-                ordered_detections = list(reversed(filtered_detections))
-                self.logger.log("检测到顺序排列的色环", "INFO")
-            elif max_dist_idx == len(distances) - 1:
-                # 最大间隔在最后面 - 逆序情况
-                ordered_detections = filtered_detections
-                self.logger.log("检测到逆序排列的色环", "INFO")
-            else:
-                # 其他情况（非常规排列）
-                ordered_detections = filtered_detections[max_dist_idx + 1:] + filtered_detections[:max_dist_idx + 1]
-                self.logger.log("检测到非常规排列的色环，已尝试调整", "INFO")
-        else:
-            ordered_detections = filtered_detections
-
-        # 6. 绘制检测框和标签
-        for det in ordered_detections:
-            x1, y1, x2, y2 = det['box']
-            color_name = det['color']
-            conf = det['conf']
-
-            # 绘制矩形框
-            cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-            # 绘制标签背景
-            label = f"{color_name} {conf:.2f}"
-            (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-            cv2.rectangle(img, (x1, y1 - 20), (x1 + w, y1), (0, 255, 0), -1)
-
-            # 绘制标签文本
-            cv2.putText(img, label, (x1, y1 - 5),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
-
-            color_info.append(color_name)
-
-        return img, color_info
-
-    def detect_tht_colors(self, crop_img):
-        """对裁剪的电阻图像进行色环检测"""
-        try:
-            # 进行预测
-            results = self.tht_model.predict(crop_img)
-
-            # 获取处理后的颜色信息
-            _, color_info = self.plot_predictions(crop_img, results, self.COLOR_MAP)
-
-            # 金开头反转逻辑
-            if color_info and len(color_info) > 0:
-                # 检查第一个色环是否为金
-                if color_info[0] == "金":
-                    # 反转色环顺序（保留原始列表）
-                    reversed_colors = color_info[::-1]
-
-                    # 日志记录原始和调整后的顺序
-                    self.logger.log(f"检测到误差环出现在第一位，排序出错，执行顺序调整: {color_info} -> {reversed_colors}", "WARNING")
-
-                    return " ".join(reversed_colors)
-
-            return " ".join(color_info) if color_info else "未识别到色环"
-        except Exception as e:
-            self.logger.log(f"色环检测失败: {str(e)}", "ERROR")
-            return "色环检测错误"
-
-    def calculate_resistance_from_bands(self, color_bands):
-        """根据色环列表计算阻值"""
-        if not color_bands or len(color_bands) not in [4, 5]:
-            return "(色环数量错误)"
-
-        try:
-            # 四环电阻处理
-            if len(color_bands) == 4:
-                # 验证颜色有效性
-                valid = (color_bands[0] in self.base_colors and
-                         color_bands[1] in self.base_colors and
-                         color_bands[2] in self.multiplier_bands and
-                         color_bands[3] in self.tolerance_bands)
-                if not valid:
-                    return "(色环类型错误)"
-
-                # 计算阻值
-                base = self.base_colors.index(color_bands[0]) * 10 + self.base_colors.index(color_bands[1])
-                multiplier = 10 ** self.multiplier_bands.index(color_bands[2])
-                tolerance_idx = self.tolerance_bands.index(color_bands[3])
-                tolerance = ["±1%", "±2%", "±0.5%", "±5%", "±10%"][tolerance_idx]
-                resistance = base * multiplier
-
-            # 五环电阻处理
-            elif len(color_bands) == 5:
-                valid = (all(c in self.base_colors for c in color_bands[:3]) and
-                         color_bands[3] in self.multiplier_bands and
-                         color_bands[4] in self.tolerance_bands)
-                if not valid:
-                    return "(色环类型错误)"
-
-                base = (self.base_colors.index(color_bands[0]) * 100 +
-                        self.base_colors.index(color_bands[1]) * 10 +
-                        self.base_colors.index(color_bands[2]))
-                multiplier = 10 ** self.multiplier_bands.index(color_bands[3])
-                tolerance_idx = self.tolerance_bands.index(color_bands[4])
-                tolerance = ["±1%", "±2%", "±0.5%", "±5%", "±10%"][tolerance_idx]
-                resistance = base * multiplier
-
-            # 单位转换
-            if resistance >= 1e6:
-                return f"({resistance / 1e6:.1f}MΩ {tolerance})"
-            elif resistance >= 1e3:
-                return f"({resistance / 1e3:.1f}KΩ {tolerance})"
-            else:
-                return f"({resistance:.1f}Ω {tolerance})"
-        except Exception as e:
-            self.logger.log(f"阻值计算错误: {str(e)}", "ERROR")
-            return "(错误)"
-
     def detect_image(self):
-        """执行图像检测并显示结果"""
+        """提交检测任务到后台线程，界面保持可操作"""
         if self.current_image is None:
             self.logger.log("检测模式一未选择图片", "WARNING")
             QtWidgets.QMessageBox.warning(self, "检测模式一警告", "请先打开图片")
@@ -444,104 +285,171 @@ class DetectionModePage1(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "检测模式一警告", "请先选择模型")
             return
 
+        # 任务持有提交时的图片、模型和配置路径，排队期间切换图片或模型不影响该任务
+        job = InferenceJob(self.run_detection, self.current_image, self.image_key, self.model,
+                           self.get_config_path_for_current_image(), self.tht_model_path, self.backend)
+        job.context = {"image_path": self.image_path, "image_key": self.image_key, "model": self.model_path}
+        job.signals.detected.connect(self.on_board_detected)
+        job.signals.partial_result.connect(self.on_resistor_result)
+        job.signals.progress.connect(self.on_detection_progress)
+        job.signals.finished.connect(self.on_detection_finished)
+        job.signals.failed.connect(self.on_detection_failed)
+        job.signals.cancelled.connect(self.on_detection_cancelled)
+        job.mode_id = self.mode_id  # 结果写入本页面的模式，检测期间切换页面不会写到其他页面
+        self.engine.submit(job)
+        self.logger.log(f"检测模式一检测任务已提交，当前队列任务数: {self.engine.pending_count()}", "INFO")
+
+    def cancel_detection(self):
+        """取消所有未完成的检测任务"""
+        if not self.engine.is_busy():
+            return
+        self.engine.cancel_all()
+        self.logger.log("检测模式一正在取消检测任务...", "WARNING")
+
+    def toggle_backend(self, checked):
+        """切换 PyTorch / ONNX Runtime 推理后端，已选择的模型按新后端重新获取"""
+        self.backend = "onnx" if checked else "torch"
+        self.logger.log(f"检测模式一推理后端: {'ONNX Runtime' if checked else 'PyTorch'}", "INFO")
+        if self.model_file is None:
+            return
         try:
-            self.logger.log("检测模式一开始图片检测...", "INFO")
-            if self.output_window:
-                self.output_window.clear_results()
+            self.model = get_model(self.model_file, backend=self.backend)
+            self.model_path = Path(self.model.path).name
+            self.btn_model.setText(f"模型: {self.model_path}")
+            if checked and not self.model.path.endswith(".onnx"):
+                self.logger.log(f"检测模式一未找到已导出的 ONNX 模型，继续使用: {self.model_path}", "WARNING")
+        except Exception as e:
+            self.logger.log(f"检测模式一切换推理后端失败: {str(e)}", "ERROR")
+            QtWidgets.QMessageBox.critical(self, "检测模式一错误", f"切换推理后端失败: {str(e)}")
+
+    def toggle_tiled_mode(self, checked):
+        """切换分块检测模式"""
+        self.tiled_mode = checked
+        if checked:
+            self.logger.log(f"检测模式一已开启分块检测（分块 {self.tile_size}px，重叠 {self.tile_overlap:.0%}）", "INFO")
+        else:
+            self.logger.log("检测模式一已关闭分块检测", "INFO")
+
+    def toggle_classic_mode(self, checked):
+        """切换传统色环识别快速路径"""
+        self.classic_mode = checked
+        if checked:
+            self.logger.log(f"检测模式一已开启HSV快速识别（置信度低于 {self.classic_min_confidence} 时使用色环模型）",
+                            "INFO")
+        else:
+            self.logger.log("检测模式一已关闭HSV快速识别", "INFO")
+
+    def toggle_export_crops(self, checked):
+        """切换裁剪图像导出（后台线程写入 CropResult，不影响检测耗时）"""
+        if checked:
+            self.crop_writer = CropWriter(str(Path("CropResult").absolute()), logger=self.logger)
+            self.logger.log(f"检测模式一已开启裁剪图像导出: {self.crop_writer.folder}", "INFO")
+        elif self.crop_writer is not None:
+            self.crop_writer.close()
+            self.logger.log(f"检测模式一已关闭裁剪图像导出（共保存 {self.crop_writer.written} 张）", "INFO")
+            self.crop_writer = None
+
+    def toggle_oriented_crops(self, checked):
+        """切换旋转校正"""
+        self.oriented_crops = checked
+        self.logger.log(f"检测模式一已{'开启' if checked else '关闭'}旋转校正", "INFO")
+
+    def create_pipeline(self, model, tht_model=None):
+        """按当前配置创建两阶段检测流程（只做电阻定位时可不传色环模型）"""
+        return InspectionPipeline(
+            model, tht_model, self.logger,
+            tht_batch_mode=self.tht_batch_mode,
+            tht_batch_size=self.tht_batch_size,
+            tht_imgsz=self.tht_imgsz,
+            tile_size=self.tile_size if self.tiled_mode else None,
+            tile_overlap=self.tile_overlap,
+            tile_batch_size=self.tile_batch_size,
+            classic_mode=self.classic_mode,
+            classic_min_confidence=self.classic_min_confidence,
+            crop_writer=self.crop_writer,
+            oriented_crops=self.oriented_crops,
+            result_cache=self.result_cache
+        )
 
-            # 执行YOLO检测
-            self.results = self.model(self.current_image, conf=0.05)[0]
-            self.base_result_image = self.results.plot(line_width=2).copy()
-
-            # 显示检测结果
-            self.show_image(self.label_result, self.base_result_image)
-
-            # 清空并准备裁剪目录
-            default_dir = Path("CropResult").absolute()
-            shutil.rmtree(default_dir, ignore_errors=True)
-            default_dir.mkdir(parents=True, exist_ok=True)
-
-            # 填充检测结果到输出窗口
-            if self.output_window and self.results.boxes:
-                for i, box in enumerate(self.results.boxes):
-                    xyxy = box.xyxy[0].cpu().numpy()
-                    class_id = int(box.cls)
-                    class_name = self.model.names[class_id]
-                    confidence = box.conf.item()
-                    x_center = (xyxy[0] + xyxy[2]) / 2
-                    y_center = (xyxy[1] + xyxy[3]) / 2
-
-                    # 裁剪处理逻辑
-                    x_min, y_min, x_max, y_max = map(int, xyxy)
-                    img_height, img_width = self.current_image.shape[:2]
-                    x_min = max(0, x_min)
-                    y_min = max(0, y_min)
-                    x_max = min(img_width, x_max)
-                    y_max = min(img_height, y_max)
-
-                    if x_min >= x_max or y_min >= y_max:
-                        continue
-
-                    # 执行裁剪
-                    crop_img = self.current_image[y_min:y_max, x_min:x_max]
-
-                    # 进行色环检测
-                    tht_color = self.detect_tht_colors(crop_img)
-
-                    # 检测到色环与 JSON 比对逻辑
-                    config_path = self.get_config_path_for_current_image()
-                    comparison_info = ""
-                    if config_path and config_path.exists():
-                        try:
-                            with open(config_path, 'r', encoding='utf-8') as f:
-                                config_data = json.load(f)
-                                resistor_id = str(i + 1)
-                                if resistor_id in config_data:
-                                    correct_colors = [c for c in config_data[resistor_id]["colors"] if c]
-                                    detected_colors = tht_color.split()
-                                    if detected_colors == correct_colors:
-                                        comparison_info = " ✔"
-                                    else:
-                                        expected = " ".join(correct_colors)
-                                        detected = " ".join(detected_colors) if detected_colors else "无"
-                                        comparison_info = f" ✘ (预期: {expected}, 检测: {detected})"
-                        except Exception as e:
-                            self.logger.log(f"配置文件读取失败: {str(e)}", "ERROR")
-
-                    # 阻值计算
-                    if tht_color.startswith("未识别") or tht_color.startswith("错误"):
-                        resistance_info = "(色环识别出错)"
-                    else:
-                        bands = tht_color.split()
-                        resistance_info = self.calculate_resistance_from_bands(bands)
-
-                    final_str = f"{tht_color} {resistance_info} {comparison_info}"
-
-                    self.output_window.add_detection_result(
-                        (x_center, y_center),
-                        class_name,
-                        confidence,
-                        final_str  # 传入合并后的结果
-                    )
-
-                    # 保存裁剪图片
-                    # safe_class_name = class_name.replace(' ', '_')
-                    # filename = default_dir / f"crop_{i}_{safe_class_name}_{confidence:.2f}.jpg"
-                    # cv2.imwrite(str(filename), crop_img)
-
-            self.logger.log("检测模式一图片检测完成", "SUCCESS")
-
-            # 自动保存结果到CSV
-            if self.output_window and self.output_window.table.rowCount() > 0:
-                self.output_window.save_to_csv()
+    def run_detection(self, job, image, image_key, model, config_path, tht_model_path, backend):
+        """执行两阶段检测（在工作线程中运行，不直接操作界面和页面状态）"""
+        self.logger.log("检测模式一开始图片检测...", "INFO")
+        with profiler.span("mode1.detect_image"):
+            with profiler.span("mode1.load_models"):
+                self.load_tht_model(job, tht_model_path, backend)
+                pipeline = self.create_pipeline(model, job.context["tht_model"])
 
-        except Exception as e:
-            self.logger.log(f"检测模式一检测失败: {str(e)}", "ERROR")
-            QtWidgets.QMessageBox.critical(
-                self, "检测模式一错误",
-                f"检测失败: {str(e)}"
+            # 执行YOLO检测
+            results = pipeline.detect_board(image, image_key)
+            with profiler.span("mode1.plot"):
+                base_result_image = results.plot(line_width=2).copy()
+            job.report_detected(results, base_result_image)
+            job.check_cancelled()
+
+            # 分段进行色环检测，每段完成后上报结果并响应取消（裁剪图像不经过磁盘）
+            image_path = job.context.get("image_path")
+            crops = pipeline.crop_resistors(image, results, Path(image_path).stem if image_path else None)
+            job.report_progress(0, len(crops))
+            for done, total, rows in pipeline.iter_rows(crops, config_path, image_key):
+                for row in rows:
+                    job.report_result(row)
+                job.report_progress(done, total)
+                job.check_cancelled()
+
+    def on_board_detected(self, job, results, base_result_image):
+        """电阻定位完成，显示检测结果图"""
+        if self.is_stale(job):
+            return  # 之前图片的结果，不覆盖当前图片
+        self.results = results
+        self.base_result_image = base_result_image
+        if self.output_window:
+            self.output_window.clear_results(job.mode_id)
+        self.show_image(self.label_result, self.base_result_image)
+
+    def on_resistor_result(self, job, row):
+        """单个电阻的色环结果到达，增量写入输出窗口"""
+        if self.output_window and not self.is_stale(job):
+            self.output_window.add_detection_result(
+                row["coords"],
+                row["class"],
+                row["confidence"],
+                row["text"],
+                details=row,
+                mode_id=job.mode_id
             )
 
+    def on_detection_progress(self, job, done, total):
+        if self.output_window and not self.is_stale(job):
+            self.output_window.set_progress(done, total)
+
+    def on_detection_finished(self, job):
+        if self.is_stale(job):
+            self.logger.log("检测模式一已丢弃之前图片的检测结果", "WARNING")
+            return
+        self.logger.log("检测模式一图片检测完成", "SUCCESS")
+        self.tht_model = job.context["tht_model"]
+        if self.output_window:
+            self.output_window.set_progress(0, 0)
+
+            # 自动记录到结果库（CSV可在输出窗口按需导出）
+            if self.output_window.row_count(job.mode_id) > 0:
+                self.output_window.save_results(job.context["image_path"], job.context["image_key"],
+                                                job.context["model"], mode_id=job.mode_id)
+
+    def on_detection_failed(self, job, message):
+        self.logger.log(f"检测模式一检测失败: {message}", "ERROR")
+        if self.output_window:
+            self.output_window.set_progress(0, 0)
+        QtWidgets.QMessageBox.critical(
+            self, "检测模式一错误",
+            f"检测失败: {message}"
+        )
+
+    def on_detection_cancelled(self, job):
+        self.logger.log("检测模式一检测任务已取消", "WARNING")
+        if self.output_window:
+            self.output_window.set_progress(0, 0)
+
     def show_image(self, label, image):
         """在指定标签显示图像（支持选中框动态绘制）"""
         try:
@@ -549,40 +457,18 @@ class DetectionModePage1(QtWidgets.QWidget):
                 label.clear()
                 return
 
-            # 深拷贝基础图像用于绘制
-            display_image = copy.deepcopy(image)
-
-            # 仅当显示检测结果时绘制选中框
+            # 仅当显示检测结果时绘制选中框（与输出窗口联动）
             if label == self.label_result:
-                # 动态绘制选中框（与输出窗口联动）
-                if self.results and self.results.boxes and self.output_window:
-                    selected_ids = self.output_window.get_selected_ids()
-
-                    for idx, box in enumerate(self.results.boxes, start=1):
-                        if idx in selected_ids:
-                            xyxy = box.xyxy[0].cpu().numpy().astype(int)
-                            cv2.rectangle(
-                                display_image,
-                                (xyxy[0], xyxy[1]),
-                                (xyxy[2], xyxy[3]),
-                                color=(0, 255, 0),  # 绿色
-                                thickness=15  # 加粗线宽
-                            )
-
-            # 转换为QPixmap并显示
-            label.clear()
-            h, w, ch = display_image.shape
-            bytes_per_line = ch * w
-            q_img = QtGui.QImage(
-                display_image.data, w, h, bytes_per_line,
-                QtGui.QImage.Format.Format_BGR888
-            )
-            scaled_pixmap = QtGui.QPixmap.fromImage(q_img).scaled(
-                label.width(), label.height(),
-                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-                QtCore.Qt.TransformationMode.SmoothTransformation
-            )
-            label.setPixmap(scaled_pixmap)
+                renderer = self.result_renderer
+                renderer.update(image, self.results)
+                selected_ids = self.output_window.get_selected_ids() if self.output_window else []
+            else:
+                renderer = self.original_renderer
+                renderer.update(image)
+                selected_ids = []
+
+            # 复用缓存的缩放底图，只在显示尺寸上叠加选中框
+            renderer.render(label, selected_ids)
 
         except Exception as e:
             self.logger.log(f"检测模式一图片显示失败: {str(e)}", "ERROR")
@@ -597,31 +483,61 @@ class DetectionModePage1(QtWidgets.QWidget):
         )
 
         if file_path:
-            try:
-                self.image_path = file_path  # 新增：保存完整路径
-                # 清空所有检测相关状态
-                self.results = None
-                self.base_result_image = None
-                self.logger.log(f"检测模式一尝试打开图片: {file_path}")
-                self.image_name = os.path.basename(file_path)  # 带扩展名的文件名（如：image.jpg）
-                self.current_image = cv2.imread(file_path)
-                if self.current_image is not None:
-                    self.show_image(self.label_original, self.current_image)
-                    self.label_result.clear()
-                    self.label_result.setText("检测结果")
-                    self.logger.log(f"检测模式一成功打开图片: {Path(file_path).name}")
-                    # 清空相关缓存
-                    self.base_result_image = None
-                    self.results = None
-                    if self.output_window:
-                        self.output_window.clear_results()
-                else:
-                    self.logger.log("检测模式一图片文件读取失败", "ERROR")
-                    QtWidgets.QMessageBox.critical(self, "检测模式一错误", "无法读取图片文件")
-            except Exception as e:
-                self.logger.log(f"检测模式一图片打开失败: {str(e)}", "ERROR")
-                QtWidgets.QMessageBox.critical(self, "检测模式一错误", f"图片加载失败: {str(e)}")
+            if self.load_image(file_path):
+                self.start_image_source(file_path)
+
+    def start_image_source(self, file_path):
+        """在后台预读同一文件夹中排在当前图片之后的图片，供“下一张”使用"""
+        if self.image_source is not None:
+            self.image_source.close()
+        folder_images = list_images(os.path.dirname(file_path))
+        current = os.path.normcase(os.path.abspath(file_path))
+        later = [path for path in folder_images if os.path.normcase(os.path.abspath(path)) > current]
+        self.image_source = ImageSource(later, workers=2, prefetch=2)
+
+    def next_image(self):
+        """打开文件夹中的下一张图片（已在后台解码）"""
+        if self.image_source is None:
+            self.logger.log("检测模式一请先打开图片", "WARNING")
+            return
+        item = next(self.image_source, None)
+        if item is None:
+            self.logger.log("检测模式一已是文件夹中的最后一张图片", "INFO")
+            return
+        file_path, image = item
+        self.load_image(file_path, image)
 
-    def refresh_annotations(self):
-        self.cache_annotation.clear()
-        self.cache_annotation = self.annot_window.annotations
\ No newline at end of file
+    def load_image(self, file_path, image=None):
+        """
+        显示图片并清空检测相关状态
+        :param image: 已解码的图片，为空时从文件读取
+        :return: 是否成功
+        """
+        try:
+            self.image_path = file_path  # 新增：保存完整路径
+            # 清空所有检测相关状态
+            self.results = None
+            self.base_result_image = None
+            self.logger.log(f"检测模式一尝试打开图片: {file_path}")
+            self.image_name = os.path.basename(file_path)  # 带扩展名的文件名（如：image.jpg）
+            self.current_image = image if image is not None else cv2.imread(file_path)
+            if self.current_image is not None:
+                self.image_key = image_hash(self.current_image)
+                self.show_image(self.label_original, self.current_image)
+                self.label_result.clear()
+                self.label_result.setText("检测结果")
+                self.logger.log(f"检测模式一成功打开图片: {Path(file_path).name}")
+                # 清空相关缓存，之前图片的检测任务不再需要
+                self.base_result_image = None
+                self.results = None
+                self.cancel_stale_jobs()
+                if self.output_window:
+                    self.output_window.clear_results(self.mode_id)
+                return True
+            else:
+                self.logger.log("检测模式一图片文件读取失败", "ERROR")
+                QtWidgets.QMessageBox.critical(self, "检测模式一错误", "无法读取图片文件")
+        except Exception as e:
+            self.logger.log(f"检测模式一图片打开失败: {str(e)}", "ERROR")
+            QtWidgets.QMessageBox.critical(self, "检测模式一错误", f"图片加载失败: {str(e)}")
+        return False
\ No newline at end of file
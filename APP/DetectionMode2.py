@@ -1,34 +1,72 @@
 from PySide6 import QtWidgets, QtCore, QtGui
 import cv2
-import copy
-from ultralytics import YOLO
+import os
+from ModelRegistry import get_model
 from pathlib import Path
+from InferenceWorker import InferenceEngine, InferenceJob
+from TiledInference import TiledDetector
+from ImageRenderer import ImageRenderer
+from Profiler import profiler
+from ImageSource import ImageSource, list_images
+from ResultCache import result_cache
+from DetectionCache import image_hash
 
 
 class DetectionModePage2(QtWidgets.QWidget):
     def __init__(self, logger):
         super().__init__()
         self.current_image = None
+        self.image_path = None
+        self.image_key = None  # 当前图片的内容哈希
+        self.image_source = None  # 当前图片所在文件夹中后续图片的预读来源（下一张）
+        self.result_cache = result_cache  # 磁盘结果缓存，重复检测同一图像时直接读取（为 None 时不使用）
         self.model = None
         self.model_path = None
+        self.model_file = None  # 模型完整路径（切换推理后端时重新加载）
         self.base_result_image = None  # 存储基础检测图
         self.results = None  # 存储检测结果对象
         self.logger = logger
         self.output_window = None
+        self.mode_id = None  # 本页面的结果模式
+        self.engine = InferenceEngine(parent=self)
+        self.original_renderer = ImageRenderer()  # 原图显示缓存
+        self.result_renderer = ImageRenderer()  # 检测结果图显示缓存
+
+        # 分块检测设置（高分辨率图像中的小目标）
+        self.tiled_mode = False
+        self.tile_size = 1024  # 分块边长
+        self.tile_overlap = 0.25  # 相邻分块重叠比例
+        self.tile_batch_size = 8  # 每批推理的分块数量
+
+        # 推理后端（onnx 时优先加载 .pt 旁边已导出的 .onnx 模型）
+        self.backend = "torch"
 
         self.init_default_dirs()
         self.setup_ui()
         self.setup_connections()
         self.logger.log("检测模式二程序启动", "INFO")
 
+    def is_stale(self, job):
+        """检测任务对应的图片已不是当前图片（期间打开了其他图片或重新选择了模型）"""
+        return job.context.get("image_key") != self.image_key
+
+    def cancel_stale_jobs(self):
+        """取消针对其他图片的检测任务（预加载等与图片无关的任务不受影响）"""
+        if self.engine.cancel_where(lambda job: "image_key" in job.context and self.is_stale(job)):
+            self.logger.log("检测模式二已取消之前图片的检测任务", "WARNING")
+
     def init_default_dirs(self):
         """初始化默认存储目录"""
         Path("Picture").mkdir(parents=True, exist_ok=True)
         Path("Module").mkdir(parents=True, exist_ok=True)
 
-    def set_output_window(self, output_window):
-        """设置输出窗口引用"""
+    def set_output_window(self, output_window, mode_id=None):
+        """
+        设置输出窗口引用
+        :param mode_id: 本页面在输出窗口中的结果模式（与页面序号一致）
+        """
         self.output_window = output_window
+        self.mode_id = mode_id
 
     def setup_ui(self):
         """初始化界面布局和组件"""
@@ -45,12 +83,22 @@ class DetectionModePage2(QtWidgets.QWidget):
         # 控制按钮区域
         control_layout = QtWidgets.QHBoxLayout()
         self.btn_open = self.create_button("📂 打开图片")
+        self.btn_next = self.create_button("⏭ 下一张")
         self.btn_model = self.create_button("⚙️ 选择模型")
         self.btn_detect = self.create_button("🔍 开始检测")
+        self.btn_cancel = self.create_button("⏹ 取消检测")
+        self.btn_tile = self.create_button("🧩 分块检测")
+        self.btn_tile.setCheckable(True)
+        self.btn_backend = self.create_button("⚡ ONNX推理")
+        self.btn_backend.setCheckable(True)
         self.btn_test = self.create_button("🧪 测试按钮")
         control_layout.addWidget(self.btn_open)
+        control_layout.addWidget(self.btn_next)
         control_layout.addWidget(self.btn_model)
         control_layout.addWidget(self.btn_detect)
+        control_layout.addWidget(self.btn_cancel)
+        control_layout.addWidget(self.btn_tile)
+        control_layout.addWidget(self.btn_backend)
         control_layout.addWidget(self.btn_test)
         main_layout.addLayout(control_layout)
 
@@ -99,8 +147,12 @@ class DetectionModePage2(QtWidgets.QWidget):
     def setup_connections(self):
         """连接按钮信号与槽函数"""
         self.btn_open.clicked.connect(self.open_image)
+        self.btn_next.clicked.connect(self.next_image)
         self.btn_model.clicked.connect(self.select_model)
         self.btn_detect.clicked.connect(self.detect_image)
+        self.btn_cancel.clicked.connect(self.cancel_detection)
+        self.btn_tile.toggled.connect(self.toggle_tiled_mode)
+        self.btn_backend.toggled.connect(self.toggle_backend)
         self.btn_test.clicked.connect(self.test_function)
 
     def open_image(self):
@@ -113,25 +165,60 @@ class DetectionModePage2(QtWidgets.QWidget):
         )
 
         if file_path:
-            try:
-                self.logger.log(f"检测模式二尝试打开图片: {file_path}")
-                self.current_image = cv2.imread(file_path)
-                if self.current_image is not None:
-                    self.show_image(self.label_original, self.current_image)
-                    self.label_result.clear()
-                    self.label_result.setText("检测结果")
-                    self.logger.log(f"检测模式二成功打开图片: {Path(file_path).name}")
-                    # 清空相关缓存
-                    self.base_result_image = None
-                    self.results = None
-                    if self.output_window:
-                        self.output_window.clear_results()
-                else:
-                    self.logger.log("检测模式二图片文件读取失败", "ERROR")
-                    QtWidgets.QMessageBox.critical(self, "检测模式二错误", "无法读取图片文件")
-            except Exception as e:
-                self.logger.log(f"检测模式二图片打开失败: {str(e)}", "ERROR")
-                QtWidgets.QMessageBox.critical(self, "检测模式二错误", f"图片加载失败: {str(e)}")
+            if self.load_image(file_path):
+                self.start_image_source(file_path)
+
+    def start_image_source(self, file_path):
+        """在后台预读同一文件夹中排在当前图片之后的图片，供“下一张”使用"""
+        if self.image_source is not None:
+            self.image_source.close()
+        folder_images = list_images(os.path.dirname(file_path))
+        current = os.path.normcase(os.path.abspath(file_path))
+        later = [path for path in folder_images if os.path.normcase(os.path.abspath(path)) > current]
+        self.image_source = ImageSource(later, workers=2, prefetch=2)
+
+    def next_image(self):
+        """打开文件夹中的下一张图片（已在后台解码）"""
+        if self.image_source is None:
+            self.logger.log("检测模式二请先打开图片", "WARNING")
+            return
+        item = next(self.image_source, None)
+        if item is None:
+            self.logger.log("检测模式二已是文件夹中的最后一张图片", "INFO")
+            return
+        file_path, image = item
+        self.load_image(file_path, image)
+
+    def load_image(self, file_path, image=None):
+        """
+        显示图片并清空检测相关状态
+        :param image: 已解码的图片，为空时从文件读取
+        :return: 是否成功
+        """
+        try:
+            self.logger.log(f"检测模式二尝试打开图片: {file_path}")
+            self.current_image = image if image is not None else cv2.imread(file_path)
+            if self.current_image is not None:
+                self.image_path = file_path
+                self.image_key = image_hash(self.current_image)
+                self.show_image(self.label_original, self.current_image)
+                self.label_result.clear()
+                self.label_result.setText("检测结果")
+                self.logger.log(f"检测模式二成功打开图片: {Path(file_path).name}")
+                # 清空相关缓存，之前图片的检测任务不再需要
+                self.base_result_image = None
+                self.results = None
+                self.cancel_stale_jobs()
+                if self.output_window:
+                    self.output_window.clear_results(self.mode_id)
+                return True
+            else:
+                self.logger.log("检测模式二图片文件读取失败", "ERROR")
+                QtWidgets.QMessageBox.critical(self, "检测模式二错误", "无法读取图片文件")
+        except Exception as e:
+            self.logger.log(f"检测模式二图片打开失败: {str(e)}", "ERROR")
+            QtWidgets.QMessageBox.critical(self, "检测模式二错误", f"图片加载失败: {str(e)}")
+        return False
 
     def select_model(self):
         """选择并加载YOLO模型"""
@@ -139,7 +226,7 @@ class DetectionModePage2(QtWidgets.QWidget):
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
             self, "检测模式二选择模型",
             default_dir,
-            "模型文件 (*.pt)"
+            "模型文件 (*.pt *.onnx)"
         )
 
         if file_path:
@@ -150,14 +237,17 @@ class DetectionModePage2(QtWidgets.QWidget):
                 self.label_original.clear()
                 self.label_result.clear()
                 self.current_image = None
+                self.image_key = None
                 self.base_result_image = None
                 self.results = None
+                self.cancel_stale_jobs()
                 if self.output_window:
-                    self.output_window.clear_results()
+                    self.output_window.clear_results(self.mode_id)
 
-                # 加载新模型
-                self.model = YOLO(file_path)
-                self.model_path = Path(file_path).name
+                # 加载新模型（已加载过的权重直接复用）
+                self.model = get_model(file_path, backend=self.backend)
+                self.model_file = file_path
+                self.model_path = Path(self.model.path).name
                 self.btn_model.setText(f"模型: {self.model_path}")
                 self.logger.log(f"检测模式二成功加载模型: {self.model_path}", "SUCCESS")
                 QtWidgets.QMessageBox.information(
@@ -173,7 +263,7 @@ class DetectionModePage2(QtWidgets.QWidget):
                 self.btn_model.setText("⚙️ 选择模型")
 
     def detect_image(self):
-        """执行图像检测并显示结果"""
+        """提交检测任务到后台线程，界面保持可操作"""
         if self.current_image is None:
             self.logger.log("检测模式二未选择图片", "WARNING")
             QtWidgets.QMessageBox.warning(self, "检测模式二警告", "请先打开图片")
@@ -184,45 +274,139 @@ class DetectionModePage2(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "检测模式二警告", "请先选择模型")
             return
 
+        detector = self.model
+        if self.tiled_mode:
+            detector = TiledDetector(self.model, self.tile_size, self.tile_overlap, self.tile_batch_size)
+        job = InferenceJob(self.run_detection, self.current_image, self.image_key, detector)
+        job.context = {"image_path": self.image_path, "image_key": self.image_key, "model": self.model_path}
+        job.signals.detected.connect(self.on_board_detected)
+        job.signals.partial_result.connect(self.on_object_result)
+        job.signals.progress.connect(self.on_detection_progress)
+        job.signals.finished.connect(self.on_detection_finished)
+        job.signals.failed.connect(self.on_detection_failed)
+        job.signals.cancelled.connect(self.on_detection_cancelled)
+        job.mode_id = self.mode_id  # 结果写入本页面的模式，检测期间切换页面不会写到其他页面
+        self.engine.submit(job)
+        self.logger.log(f"检测模式二检测任务已提交，当前队列任务数: {self.engine.pending_count()}", "INFO")
+
+    def cancel_detection(self):
+        """取消所有未完成的检测任务"""
+        if not self.engine.is_busy():
+            return
+        self.engine.cancel_all()
+        self.logger.log("检测模式二正在取消检测任务...", "WARNING")
+
+    def toggle_backend(self, checked):
+        """切换 PyTorch / ONNX Runtime 推理后端，已选择的模型按新后端重新获取"""
+        self.backend = "onnx" if checked else "torch"
+        self.logger.log(f"检测模式二推理后端: {'ONNX Runtime' if checked else 'PyTorch'}", "INFO")
+        if self.model_file is None:
+            return
         try:
-            self.logger.log("检测模式二开始图片检测...", "INFO")
-            if self.output_window:
-                self.output_window.clear_results()
-
+            self.model = get_model(self.model_file, backend=self.backend)
+            self.model_path = Path(self.model.path).name
+            self.btn_model.setText(f"模型: {self.model_path}")
+            if checked and not self.model.path.endswith(".onnx"):
+                self.logger.log(f"检测模式二未找到已导出的 ONNX 模型，继续使用: {self.model_path}", "WARNING")
+        except Exception as e:
+            self.logger.log(f"检测模式二切换推理后端失败: {str(e)}", "ERROR")
+            QtWidgets.QMessageBox.critical(self, "检测模式二错误", f"切换推理后端失败: {str(e)}")
+
+    def toggle_tiled_mode(self, checked):
+        """切换分块检测模式"""
+        self.tiled_mode = checked
+        if checked:
+            self.logger.log(f"检测模式二已开启分块检测（分块 {self.tile_size}px，重叠 {self.tile_overlap:.0%}）", "INFO")
+        else:
+            self.logger.log("检测模式二已关闭分块检测", "INFO")
+
+    def run_detection(self, job, image, image_key, model):
+        """执行检测（在工作线程中运行，不直接操作界面）"""
+        self.logger.log("检测模式二开始图片检测...", "INFO")
+        with profiler.span("mode2.detect_image"):
             # 执行YOLO检测
-            self.results = self.model(self.current_image)[0]
-            self.base_result_image = self.results.plot(line_width=2).copy()
-
-            # 显示检测结果
-            self.show_image(self.label_result, self.base_result_image)
+            with profiler.span("mode2.detect"):
+                if self.result_cache is None:
+                    results = model(image)[0]
+                else:
+                    # 分块检测时以内部模型的权重和分块参数作为缓存键
+                    tiled = isinstance(model, TiledDetector)
+                    results = self.result_cache.detect(model.model if tiled else model, image,
+                                                       lambda img: model(img)[0], image_key=image_key,
+                                                       tiling=model.settings() if tiled else None)
+            with profiler.span("mode2.plot"):
+                base_result_image = results.plot(line_width=2).copy()
+            job.report_detected(results, base_result_image)
+
+            if not results.boxes:
+                return
 
-            # 填充检测结果到输出窗口
-            if self.output_window and self.results.boxes:
-                for box in self.results.boxes:
+            total = len(results.boxes)
+            with profiler.span("mode2.boxes"):
+                for i, box in enumerate(results.boxes, start=1):
+                    job.check_cancelled()
                     xyxy = box.xyxy[0].cpu().numpy()
                     class_id = int(box.cls)
-                    class_name = self.model.names[class_id]
+                    class_name = model.names[class_id]
                     confidence = box.conf.item()
                     x_center = (xyxy[0] + xyxy[2]) / 2
                     y_center = (xyxy[1] + xyxy[3]) / 2
-                    self.output_window.add_detection_result(
-                        (x_center, y_center),
-                        class_name,
-                        confidence
-                    )
+                    job.report_result({
+                        "coords": (x_center, y_center),
+                        "class": class_name,
+                        "confidence": confidence
+                    })
+                    job.report_progress(i, total)
+
+    def on_board_detected(self, job, results, base_result_image):
+        """检测完成，显示检测结果图"""
+        if self.is_stale(job):
+            return  # 之前图片的结果，不覆盖当前图片
+        self.results = results
+        self.base_result_image = base_result_image
+        if self.output_window:
+            self.output_window.clear_results(job.mode_id)
+        self.show_image(self.label_result, self.base_result_image)
+
+    def on_object_result(self, job, row):
+        """单个物体结果到达，增量写入输出窗口"""
+        if self.output_window and not self.is_stale(job):
+            self.output_window.add_detection_result(
+                row["coords"],
+                row["class"],
+                row["confidence"],
+                mode_id=job.mode_id
+            )
 
-            self.logger.log("检测模式二图片检测完成", "SUCCESS")
+    def on_detection_progress(self, job, done, total):
+        if self.output_window and not self.is_stale(job):
+            self.output_window.set_progress(done, total)
 
-            # 自动保存结果到CSV
-            if self.output_window and self.output_window.table.rowCount() > 0:
-                self.output_window.save_to_csv()
+    def on_detection_finished(self, job):
+        if self.is_stale(job):
+            self.logger.log("检测模式二已丢弃之前图片的检测结果", "WARNING")
+            return
+        self.logger.log("检测模式二图片检测完成", "SUCCESS")
+        if self.output_window:
+            self.output_window.set_progress(0, 0)
+
+            # 自动记录到结果库（CSV可在输出窗口按需导出）
+            if self.output_window.row_count(job.mode_id) > 0:
+                self.output_window.save_results(**job.context, mode_id=job.mode_id)
+
+    def on_detection_failed(self, job, message):
+        self.logger.log(f"检测模式二检测失败: {message}", "ERROR")
+        if self.output_window:
+            self.output_window.set_progress(0, 0)
+        QtWidgets.QMessageBox.critical(
+            self, "检测模式二错误",
+            f"检测失败: {message}"
+        )
 
-        except Exception as e:
-            self.logger.log(f"检测模式二检测失败: {str(e)}", "ERROR")
-            QtWidgets.QMessageBox.critical(
-                self, "检测模式二错误",
-                f"检测失败: {str(e)}"
-            )
+    def on_detection_cancelled(self, job):
+        self.logger.log("检测模式二检测任务已取消", "WARNING")
+        if self.output_window:
+            self.output_window.set_progress(0, 0)
 
     def show_image(self, label, image):
         """在指定标签显示图像（支持选中框动态绘制）"""
@@ -231,38 +415,12 @@ class DetectionModePage2(QtWidgets.QWidget):
                 label.clear()
                 return
 
-            # 深拷贝基础图像用于绘制
-            display_image = copy.deepcopy(image)
-
-            # 动态绘制选中框（与输出窗口联动）
-            if self.results and self.results.boxes and self.output_window:
-                selected_ids = self.output_window.get_selected_ids()
-
-                for idx, box in enumerate(self.results.boxes, start=1):
-                    if idx in selected_ids:
-                        xyxy = box.xyxy[0].cpu().numpy().astype(int)
-                        cv2.rectangle(
-                            display_image,
-                            (xyxy[0], xyxy[1]),
-                            (xyxy[2], xyxy[3]),
-                            color=(0, 255, 0),  # 红色
-                            thickness=15  # 加粗线宽
-                        )
-
-            # 转换为QPixmap并显示
-            label.clear()
-            h, w, ch = display_image.shape
-            bytes_per_line = ch * w
-            q_img = QtGui.QImage(
-                display_image.data, w, h, bytes_per_line,
-                QtGui.QImage.Format.Format_BGR888
-            )
-            scaled_pixmap = QtGui.QPixmap.fromImage(q_img).scaled(
-                label.width(), label.height(),
-                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-                QtCore.Qt.TransformationMode.SmoothTransformation
-            )
-            label.setPixmap(scaled_pixmap)
+            renderer = self.result_renderer if label == self.label_result else self.original_renderer
+            renderer.update(image, self.results)
+
+            # 动态绘制选中框（与输出窗口联动），复用缓存的缩放底图
+            selected_ids = self.output_window.get_selected_ids() if self.output_window else []
+            renderer.render(label, selected_ids)
 
         except Exception as e:
             self.logger.log(f"检测模式二图片显示失败: {str(e)}", "ERROR")
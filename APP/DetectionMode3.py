@@ -0,0 +1,329 @@
+from PySide6 import QtWidgets, QtCore, QtGui
+from functools import partial
+from pathlib import Path
+from ModelRegistry import get_model
+from InferenceWorker import InferenceEngine, InferenceJob
+from InspectionPipeline import InspectionPipeline, DEFAULT_THT_MODEL_PATH
+from LivePipeline import LiveInspector, CameraSource, VideoFileSource, SyntheticSource, draw_overlay
+
+
+class DetectionModePage3(QtWidgets.QWidget):
+    """实时检测页面：摄像头/视频画面与两阶段检测并行，界面按固定频率刷新"""
+
+    def __init__(self, logger):
+        super().__init__()
+        self.model = None
+        self.model_file = None  # 已选择的模型文件（加载在后台进行）
+        self.model_path = None
+        self.tht_model_path = DEFAULT_THT_MODEL_PATH
+        self.base_result_image = None  # 最近一次绘制的画面（供输出窗口重绘）
+        self.logger = logger
+        self.output_window = None
+        self.mode_id = None  # 本页面的结果模式
+        self.inspector = None
+        self.rendered_frame_id = None
+        self.engine = InferenceEngine(parent=self)  # 后台加载模型，界面不会卡住
+        self.start_job = None  # 正在加载模型、等待启动的任务
+
+        # 界面刷新定时器，与采集和检测解耦
+        self.render_timer = QtCore.QTimer(self)
+        self.render_timer.setInterval(33)
+        self.render_timer.timeout.connect(self.render_frame)
+
+        self.init_default_dirs()
+        self.setup_ui()
+        self.setup_connections()
+        self.logger.log("实时检测程序启动", "INFO")
+
+    def init_default_dirs(self):
+        """初始化默认存储目录"""
+        Path("Video").mkdir(parents=True, exist_ok=True)
+        Path("Module").mkdir(parents=True, exist_ok=True)
+
+    def set_output_window(self, output_window, mode_id=None):
+        """
+        设置输出窗口引用
+        :param mode_id: 本页面在输出窗口中的结果模式（与页面序号一致）
+        """
+        self.output_window = output_window
+        self.mode_id = mode_id
+
+    def setup_ui(self):
+        """初始化界面布局和组件"""
+        main_layout = QtWidgets.QVBoxLayout(self)
+
+        # 实时画面显示区域
+        self.label_result = self.create_image_label("实时画面")
+        main_layout.addWidget(self.label_result)
+
+        # 控制按钮区域
+        control_layout = QtWidgets.QHBoxLayout()
+        self.combo_source = QtWidgets.QComboBox()
+        self.combo_source.addItems(["摄像头", "视频文件", "模拟画面"])
+        self.combo_source.setMinimumHeight(40)
+        self.btn_model = self.create_button("⚙️ 选择模型")
+        self.btn_start = self.create_button("▶️ 开始检测")
+        self.btn_stop = self.create_button("⏹ 停止检测")
+        self.btn_snapshot = self.create_button("📸 保存结果")
+        control_layout.addWidget(self.combo_source)
+        control_layout.addWidget(self.btn_model)
+        control_layout.addWidget(self.btn_start)
+        control_layout.addWidget(self.btn_stop)
+        control_layout.addWidget(self.btn_snapshot)
+        main_layout.addLayout(control_layout)
+
+        # 设置布局比例
+        main_layout.setStretch(0, 3)
+        main_layout.setStretch(1, 1)
+
+    def create_image_label(self, text):
+        """创建图片显示标签"""
+        label = QtWidgets.QLabel(text, self)
+        label.setMinimumSize(600, 480)
+        label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        label.setStyleSheet('''
+            QLabel {
+                border: 2px solid #4A90E2;
+                border-radius: 5px;
+                background-color: #F0F4F8;
+                color: #666666;
+                font-size: 16px;
+            }
+        ''')
+        return label
+
+    def create_button(self, text):
+        """创建统一风格的按钮"""
+        button = QtWidgets.QPushButton(text)
+        button.setStyleSheet('''
+            QPushButton {
+                padding: 12px 24px;
+                font-size: 14px;
+                min-width: 140px;
+                border: 1px solid #4A90E2;
+                border-radius: 6px;
+                background-color: #FFFFFF;
+                color: #2D2D2D;
+            }
+            QPushButton:hover {
+                background-color: #E8F0FE;
+            }
+            QPushButton:pressed {
+                background-color: #D0E0FC;
+            }
+        ''')
+        return button
+
+    def setup_connections(self):
+        """连接按钮信号与槽函数"""
+        self.btn_model.clicked.connect(self.select_model)
+        self.btn_start.clicked.connect(self.start_inspection)
+        self.btn_stop.clicked.connect(self.stop_inspection)
+        self.btn_snapshot.clicked.connect(self.save_snapshot)
+
+    def select_model(self):
+        """选择并加载YOLO模型"""
+        default_dir = str(Path("Module").absolute())
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "实时检测选择模型",
+            default_dir,
+            "模型文件 (*.pt)"
+        )
+
+        if file_path:
+            self.logger.log(f"实时检测尝试加载模型: {file_path}")
+            self.stop_inspection()
+            self.model = None
+            self.model_file = file_path
+            self.model_path = Path(file_path).name
+            self.btn_model.setText(f"模型: {self.model_path}")
+            self.preload_models()
+
+    def preload_models(self):
+        """在后台线程加载并预热检测模型和色环检测模型，开始检测时直接复用"""
+        job = InferenceJob(self.load_models, self.model_file, self.tht_model_path)
+        job.signals.finished.connect(self.on_models_loaded)
+        job.signals.failed.connect(self.on_models_failed)
+        self.engine.submit(job)
+
+    def load_models(self, job, model_file, tht_model_path):
+        """在工作线程中获取模型（注册表中已有时直接返回，正在加载时等待同一次加载）"""
+        job.context["model_file"] = model_file
+        job.context["models"] = (get_model(model_file), get_model(tht_model_path))
+        job.check_cancelled()
+
+    def on_models_loaded(self, job):
+        if job.context["model_file"] != self.model_file:
+            return  # 加载期间已选择其他模型
+        self.model = job.context["models"][0]
+        self.logger.log(f"实时检测成功加载模型: {self.model_path}", "SUCCESS")
+
+    def on_models_failed(self, job, message):
+        if job.context.get("model_file", self.model_file) != self.model_file:
+            return
+        self.logger.log(f"实时检测模型加载失败: {message}", "ERROR")
+        QtWidgets.QMessageBox.critical(self, "实时检测错误", f"模型加载失败: {message}")
+        self.model = None
+        self.model_file = None
+        self.model_path = None
+        self.btn_model.setText("⚙️ 选择模型")
+
+    def source_factory(self):
+        """
+        按下拉框选择返回帧来源的构造函数，取消选择视频时返回 None
+        帧来源在后台任务中打开，排在上一次停止之后，摄像头已被释放
+        """
+        source_type = self.combo_source.currentText()
+        if source_type == "摄像头":
+            return partial(CameraSource, 0)
+        if source_type == "视频文件":
+            file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, "实时检测选择视频",
+                str(Path("Video").absolute()),
+                "视频文件 (*.mp4 *.avi *.mov *.mkv)"
+            )
+            return partial(VideoFileSource, file_path) if file_path else None
+        return SyntheticSource
+
+    def prepare_inspection(self, job, open_source, model_file, tht_model_path):
+        """在工作线程中打开帧来源并获取模型"""
+        job.context["source"] = open_source()
+        self.load_models(job, model_file, tht_model_path)
+
+    @staticmethod
+    def release_source(job):
+        """释放启动任务已打开的帧来源"""
+        if "source" in job.context:
+            job.context["source"].release()
+
+    def start_inspection(self):
+        """选择画面来源后在后台加载模型，加载完成再启动采集与检测线程"""
+        if self.model_file is None:
+            self.logger.log("实时检测未选择模型", "WARNING")
+            QtWidgets.QMessageBox.warning(self, "实时检测警告", "请先选择模型")
+            return
+
+        self.stop_inspection()
+        open_source = self.source_factory()
+        if open_source is None:
+            return
+
+        job = InferenceJob(self.prepare_inspection, open_source, self.model_file, self.tht_model_path)
+        job.context = {"source_name": self.combo_source.currentText()}
+        job.signals.finished.connect(self.on_start_ready)
+        job.signals.failed.connect(self.on_start_failed)
+        job.signals.cancelled.connect(self.release_source)
+        self.start_job = job
+        self.engine.submit(job)
+        self.logger.log("实时检测正在加载模型...", "INFO")
+
+    def on_start_ready(self, job):
+        """模型加载完成，启动采集与检测线程"""
+        source = job.context["source"]
+        if job is not self.start_job:
+            source.release()  # 加载期间已停止或重新启动
+            return
+        self.start_job = None
+        model, tht_model = job.context["models"]
+        if job.context["model_file"] == self.model_file:
+            self.model = model
+        try:
+            pipeline = InspectionPipeline(model, tht_model, self.logger, use_cache=False)
+            self.inspector = LiveInspector(source, pipeline)
+            self.inspector.start()
+            self.render_timer.start()
+            self.logger.log(f"实时检测已启动，画面来源: {job.context['source_name']}", "SUCCESS")
+        except Exception as e:
+            self.inspector = None
+            source.release()
+            self.logger.log(f"实时检测启动失败: {str(e)}", "ERROR")
+            QtWidgets.QMessageBox.critical(self, "实时检测错误", f"启动失败: {str(e)}")
+
+    def on_start_failed(self, job, message):
+        self.release_source(job)
+        if job is not self.start_job:
+            return
+        self.start_job = None
+        self.logger.log(f"实时检测启动失败: {message}", "ERROR")
+        QtWidgets.QMessageBox.critical(self, "实时检测错误", f"启动失败: {message}")
+
+    def stop_inspection(self):
+        """
+        停止采集与检测线程（模型仍在加载时取消启动）
+        界面线程只发出停止通知，等待线程结束交给后台任务，正在进行的检测不会卡住界面
+        """
+        self.render_timer.stop()
+        if self.start_job is not None:
+            self.start_job.cancel()
+            self.start_job = None
+            self.logger.log("实时检测已取消启动", "INFO")
+        if self.inspector is None:
+            return
+        inspector = self.inspector
+        self.inspector = None
+        self.rendered_frame_id = None
+        inspector.request_stop()
+
+        job = InferenceJob(self.join_inspector, inspector)
+        job.signals.finished.connect(self.on_inspection_stopped)
+        self.engine.submit(job)
+
+    def join_inspector(self, job, inspector):
+        """在工作线程中等待采集与检测线程结束"""
+        job.context["inspector"] = inspector
+        inspector.join()
+
+    def on_inspection_stopped(self, job):
+        inspector = job.context["inspector"]
+        if inspector.error:
+            self.logger.log(f"实时检测出错: {inspector.error}", "ERROR")
+        self.logger.log("实时检测已停止", "INFO")
+
+    def render_frame(self):
+        """定时绘制最新帧与最新检测结果"""
+        inspector = self.inspector
+        if inspector is None:
+            return
+        if not inspector.is_running():
+            self.stop_inspection()
+            return
+
+        latest = inspector.latest_frame
+        if latest is None or latest[0] == self.rendered_frame_id:
+            return
+        self.rendered_frame_id = latest[0]
+        self.base_result_image = draw_overlay(latest[2], inspector.latest_result, inspector.stats())
+        self.show_image(self.label_result, self.base_result_image)
+
+    def save_snapshot(self):
+        """将最新一帧的检测结果写入输出窗口并记录到结果库"""
+        if self.inspector is None or self.inspector.latest_result is None:
+            QtWidgets.QMessageBox.warning(self, "实时检测警告", "暂无检测结果")
+            return
+        if not self.output_window:
+            return
+
+        self.output_window.clear_results(self.mode_id)
+        self.output_window.add_detection_results(
+            ((row["coords"], row["class"], row["confidence"], row["text"], row) for row in self.inspector.latest_result.rows),
+            self.mode_id)
+        if self.output_window.row_count(self.mode_id) > 0:
+            self.output_window.save_results(model=self.model_path, mode_id=self.mode_id)
+
+    def show_image(self, label, image):
+        """在指定标签显示图像（实时画面使用快速缩放）"""
+        try:
+            if image is None:
+                return
+
+            h, w, ch = image.shape
+            q_img = QtGui.QImage(image.data, w, h, ch * w, QtGui.QImage.Format.Format_BGR888)
+            scaled_pixmap = QtGui.QPixmap.fromImage(q_img).scaled(
+                label.width(), label.height(),
+                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                QtCore.Qt.TransformationMode.FastTransformation
+            )
+            label.setPixmap(scaled_pixmap)
+
+        except Exception as e:
+            self.logger.log(f"实时检测画面显示失败: {str(e)}", "ERROR")
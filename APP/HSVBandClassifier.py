@@ -0,0 +1,305 @@
+import hashlib
+import json
+import os
+import threading
+import cv2
+import numpy as np
+from THTColorDefine import color_ranges
+
+# THTColorDefine 颜色名 -> 界面使用的中文颜色名（与 COLOR_MAP 一致，另含 银）
+COLOR_NAMES = {
+    "black": "黑",
+    "brown": "棕",
+    "red": "红",
+    "orange": "橙",
+    "yellow": "黄",
+    "green": "绿",
+    "blue": "蓝",
+    "purple": "紫",
+    "gray": "灰",
+    "white": "白",
+    "gold": "金",
+    "silver": "银"
+}
+
+# 查找表写入顺序：范围重叠时后写入的颜色优先（如 金 覆盖 橙/黄，银 覆盖 灰）
+LUT_PRIORITY = ["gray", "white", "silver", "black", "red", "orange", "yellow", "green", "blue", "purple",
+                "brown", "gold"]
+UNKNOWN = 255  # 查找表中不属于任何颜色范围的值
+LUT_CACHE_DIR = "Cache"  # BGR 查找表磁盘缓存目录
+LUT_VERSION = 1  # 查找表生成方式变化时递增，使旧的磁盘缓存失效
+
+_lut_cache = {}
+_lut_lock = threading.Lock()
+
+
+def build_hsv_lut(ranges=None, priority=LUT_PRIORITY):
+    """
+    根据 HSV 颜色范围生成查找表 lut[H, S, V] -> 颜色编号（OpenCV HSV：H 0~179，S/V 0~255）
+    相同的颜色范围只生成一次
+    :return: (查找表, 颜色名称列表)
+    """
+    ranges = color_ranges if ranges is None else ranges
+    key = repr(sorted(ranges.items()))
+    with _lut_lock:
+        cached = _lut_cache.get(key)
+        if cached is not None:
+            return cached
+
+        lut = np.full((180, 256, 256), UNKNOWN, dtype=np.uint8)
+        names = lut_order(ranges, priority)
+        for index, name in enumerate(names):
+            spec = ranges[name]
+            boxes = spec if isinstance(spec[0], list) else [spec]  # 红色跨越色相两端，由两个范围组成
+            for lower, upper in boxes:
+                lut[lower[0]:upper[0] + 1, lower[1]:upper[1] + 1, lower[2]:upper[2] + 1] = index
+        _lut_cache[key] = (lut, [COLOR_NAMES.get(name, name) for name in names])
+        return _lut_cache[key]
+
+
+def lut_order(ranges, priority=LUT_PRIORITY):
+    """查找表中的颜色顺序（编号即下标）"""
+    return [name for name in priority if name in ranges] + [name for name in ranges if name not in priority]
+
+
+def lut_cache_path(ranges, priority=LUT_PRIORITY, bits=8, cache_dir=LUT_CACHE_DIR):
+    """按颜色范围内容生成缓存文件名，THTColorDefine 修改后自动使用新文件"""
+    content = json.dumps([LUT_VERSION, bits, [[name, ranges[name]] for name in lut_order(ranges, priority)]])
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"bgr_lut_{bits}bit_{digest}.npy")
+
+
+def build_bgr_lut(ranges=None, priority=LUT_PRIORITY, bits=8, cache_dir=LUT_CACHE_DIR):
+    """
+    生成 BGR -> 颜色编号查找表 lut[B >> (8 - bits), G >> (8 - bits), R >> (8 - bits)]，
+    像素分类只需一次查表，不再逐颜色 inRange，也不需要先转换到 HSV
+    生成结果缓存到磁盘（按颜色范围内容命名），范围修改后重新生成
+    :param bits: 每个通道的量化位数（8 为 256³ 精确查找表，约 16MB；6 为 64³，约 256KB）
+    :param cache_dir: 磁盘缓存目录，为空时不使用磁盘缓存
+    :return: (查找表, 颜色名称列表)
+    """
+    ranges = color_ranges if ranges is None else ranges
+    path = lut_cache_path(ranges, priority, bits, cache_dir or "")
+    labels = [COLOR_NAMES.get(name, name) for name in lut_order(ranges, priority)]
+    with _lut_lock:
+        cached = _lut_cache.get(path)
+    if cached is not None:
+        return cached
+
+    size = 1 << bits
+    lut = None
+    if cache_dir and os.path.exists(path):
+        try:
+            lut = np.load(path)
+        except (OSError, ValueError):
+            lut = None
+        if lut is not None and lut.shape != (size, size, size):
+            lut = None
+
+    if lut is None:
+        hsv_lut, _ = build_hsv_lut(ranges, priority)
+        # 每个量化格取中心颜色转换到 HSV 后查表
+        step = 1 << (8 - bits)
+        levels = (np.arange(size) * step + step // 2).astype(np.uint8)
+        b, g, r = np.meshgrid(levels, levels, levels, indexing="ij")
+        hsv = cv2.cvtColor(np.stack((b, g, r), axis=-1).reshape(size * size, size, 3), cv2.COLOR_BGR2HSV)
+        lut = hsv_lut[hsv[..., 0], hsv[..., 1], hsv[..., 2]].reshape(size, size, size)
+        if cache_dir:
+            save_lut(lut, path)
+
+    with _lut_lock:
+        _lut_cache[path] = (lut, labels)
+    return lut, labels
+
+
+def save_lut(lut, path):
+    """写入磁盘缓存（先写临时文件再替换，并删除同规格的旧缓存）"""
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    prefix = os.path.basename(path).rsplit("_", 1)[0] + "_"
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.save(f, lut)
+    os.replace(temp_path, path)
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name.endswith(".npy") and os.path.join(folder, name) != path:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def label_pixels(image, lut):
+    """
+    用 BGR 查找表一次性标注图像中每个像素的颜色编号
+    :return: 与图像同尺寸的颜色编号（UNKNOWN 表示不属于任何颜色）
+    """
+    bits = int(lut.shape[0]).bit_length() - 1
+    pixels = image.astype(np.uint32) >> (8 - bits)
+    # 三个通道合成一维下标后单次取值
+    return lut.reshape(-1).take((pixels[..., 0] << (2 * bits)) | (pixels[..., 1] << bits) | pixels[..., 2])
+
+
+def background_color(lab):
+    """取四个角的中位数作为背景（电路板）颜色"""
+    h, w = lab.shape[:2]
+    size = max(2, int(min(h, w) * 0.1))
+    corners = np.concatenate([lab[:size, :size], lab[:size, -size:], lab[-size:, :size], lab[-size:, -size:]])
+    return np.median(corners.reshape(-1, 3), axis=0)
+
+
+def principal_axis(image, lab=None, diff_threshold=30.0, min_fill=0.05):
+    """
+    估计电阻主轴：与背景颜色差异明显的像素的二阶矩（主成分分析）
+    :return: (中心 (x, y), 主轴单位向量, 半长, 半宽)，前景过少时按裁剪框长边
+    """
+    h, w = image.shape[:2]
+    if lab is None:
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB).astype(np.float32)
+    diff = lab - background_color(lab)
+    mask = (np.einsum("ijk,ijk->ij", diff, diff) > diff_threshold ** 2).astype(np.uint8)
+    moments = cv2.moments(mask, binaryImage=True)
+
+    if moments["m00"] < max(min_fill * h * w, 2):
+        direction = np.array([1.0, 0.0]) if w >= h else np.array([0.0, 1.0])
+        return np.array([(w - 1) / 2, (h - 1) / 2]), direction, max(w, h) / 2, min(w, h) / 2
+
+    center = np.array([moments["m10"], moments["m01"]]) / moments["m00"]
+    covariance = np.array([[moments["mu20"], moments["mu11"]], [moments["mu11"], moments["mu02"]]])
+    _, vectors = np.linalg.eigh(covariance)
+    direction = vectors[:, 1]
+    if direction[0] < 0 or (direction[0] == 0 and direction[1] < 0):
+        direction = -direction  # 主轴统一指向右（竖直时向下）
+    normal = np.array([-direction[1], direction[0]])
+    ys, xs = np.nonzero(mask)
+    offsets = np.stack((xs, ys), axis=1) - center
+    half_length = float(np.percentile(np.abs(offsets @ direction), 99))
+    half_width = float(np.percentile(np.abs(offsets @ normal), 90))
+    return center, direction, max(half_length, 1.0), max(half_width, 1.0)
+
+
+class HSVBandClassifier:
+    """
+    基于 THTColorDefine 颜色范围的传统色环识别：
+    沿电阻主轴多条平行线采样 -> 与本体颜色差异明显的连续区段作为色环 -> BGR 查找表逐像素分类并投票
+    """
+
+    def __init__(self, ranges=None, lines=5, band_threshold=25.0, min_band_ratio=0.02, lut_bits=8,
+                 cache_dir=LUT_CACHE_DIR):
+        self.lut, self.labels = build_bgr_lut(ranges, bits=lut_bits, cache_dir=cache_dir)
+        self.lines = lines  # 平行采样线数量
+        self.band_threshold = band_threshold  # 与本体颜色的 Lab 距离超过该值视为色环
+        self.min_band_ratio = min_band_ratio  # 色环最小长度（占本体长度的比例）
+
+    def sample_profile(self, image):
+        """
+        沿主轴在本体宽度内取多条平行线采样（向量化，等价于逐行读取中线像素）
+        :return: (BGR 采样 L×线数×3, Lab 采样 L×线数×3, 背景颜色 Lab)
+        """
+        h, w = image.shape[:2]
+        lab_image = cv2.cvtColor(image, cv2.COLOR_BGR2LAB).astype(np.float32)
+        center, direction, _, half_width = principal_axis(image, lab_image)
+        normal = np.array([-direction[1], direction[0]])
+
+        # 主轴穿过整个裁剪图像，两端的背景和引脚在分段时去掉
+        reach = np.hypot(w, h) / 2
+        steps = np.arange(-reach, reach + 1)
+        line = center + steps[:, None] * direction
+        inside = (line[:, 0] >= 0) & (line[:, 0] <= w - 1) & (line[:, 1] >= 0) & (line[:, 1] <= h - 1)
+        steps = steps[inside]
+
+        offsets = np.linspace(-0.5, 0.5, self.lines) * half_width
+        points = center + steps[:, None, None] * direction + offsets[None, :, None] * normal
+        xs = np.clip(np.rint(points[..., 0]).astype(np.int64), 0, w - 1)
+        ys = np.clip(np.rint(points[..., 1]).astype(np.int64), 0, h - 1)
+        return image[ys, xs], lab_image[ys, xs], background_color(lab_image)
+
+    def find_bands(self, lab, background):
+        """
+        找出色环区段 [(起点, 终点)]：
+        先按与背景的差异确定本体范围（引脚只占少数采样线），再取与本体颜色（中位数）差异明显的连续区段
+        """
+        threshold = self.band_threshold
+        profile = np.median(lab, axis=1)
+        if np.linalg.norm(np.median(profile, axis=0) - background) <= threshold:
+            # 裁剪框紧贴本体（四角即本体颜色），整条采样线都在本体上
+            first, last = 0, len(profile)
+        else:
+            on_body = (np.linalg.norm(lab - background, axis=2) > threshold).mean(axis=1) >= 0.5
+            runs = np.flatnonzero(np.diff(np.concatenate(([0], on_body.astype(np.int8), [0])))).reshape(-1, 2)
+            if len(runs) == 0:
+                return []
+            # 取最长的连续区段作为本体（两端的引脚、焊点可能产生零散的前景）
+            first, last = runs[int(np.argmax(runs[:, 1] - runs[:, 0]))]
+        profile = profile[first:last]
+
+        distance = np.linalg.norm(profile - np.median(profile, axis=0), axis=1)
+        is_band = (distance > threshold) & (np.linalg.norm(profile - background, axis=1) > threshold)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], is_band.astype(np.int8), [0]))))
+        min_length = max(2, int(len(profile) * self.min_band_ratio))
+        # 接触本体两端的区段多为背景或引脚，不作为色环
+        return [(s + first, e + first) for s, e in zip(edges[::2], edges[1::2])
+                if e - s >= min_length and s > 0 and e < len(profile)]
+
+    def classify(self, image):
+        """
+        识别色环
+        :return: (按读数顺序的颜色列表, 置信度 0~1)
+        """
+        if image is None or image.size == 0 or min(image.shape[:2]) < 4:
+            return [], 0.0
+        pixels, lab, background = self.sample_profile(image)
+        segments = self.find_bands(lab, background)
+        if not segments:
+            return [], 0.0
+
+        ids = label_pixels(pixels, self.lut)
+        colors, confidence = [], 1.0
+        for start, end in segments:
+            votes = np.bincount(ids[start:end].ravel(), minlength=UNKNOWN + 1)
+            votes[UNKNOWN] = 0
+            best = int(votes.argmax())
+            if votes[best] == 0:
+                return [], 0.0
+            colors.append(self.labels[best])
+            confidence = min(confidence, votes[best] / ids[start:end].size)
+
+        # 误差环与其他色环间距更大：最大间距在开头时说明读数方向相反
+        gaps = [segments[i + 1][0] - segments[i][1] for i in range(len(segments) - 1)]
+        if colors[0] in ("金", "银") or (len(gaps) > 1 and int(np.argmax(gaps)) == 0):
+            colors.reverse()
+        return colors, float(confidence)
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="预先生成 BGR 颜色查找表并与逐颜色 inRange 分类对比")
+    parser.add_argument("images", nargs="*", help="用于对比的裁剪图像（如 CropResult 中的图片）")
+    parser.add_argument("--bits", type=int, default=8, choices=range(4, 9), help="每个通道的量化位数")
+    parser.add_argument("--cache-dir", default=LUT_CACHE_DIR, help="磁盘缓存目录")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bgr_lut, _ = build_bgr_lut(bits=args.bits, cache_dir=args.cache_dir)
+    print(f"查找表 {bgr_lut.shape[0]}³ 就绪（{(time.perf_counter() - start) * 1000:.1f} ms）: "
+          f"{lut_cache_path(color_ranges, bits=args.bits, cache_dir=args.cache_dir)}")
+
+    for image_path in args.images:
+        crop = cv2.imread(image_path)
+        if crop is None:
+            continue
+        start = time.perf_counter()
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        reference = np.full(crop.shape[:2], UNKNOWN, dtype=np.uint8)
+        for index, name in enumerate(lut_order(color_ranges)):
+            spec = color_ranges[name]
+            for lower, upper in (spec if isinstance(spec[0], list) else [spec]):
+                reference[cv2.inRange(hsv, np.array(lower), np.array(upper)) > 0] = index
+        in_range_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        ids = label_pixels(crop, bgr_lut)
+        lut_ms = (time.perf_counter() - start) * 1000
+        print(f"{os.path.basename(image_path)}: inRange {in_range_ms:.2f} ms，查找表 {lut_ms:.2f} ms，"
+              f"一致像素 {np.mean(ids == reference):.2%}")
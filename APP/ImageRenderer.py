@@ -0,0 +1,74 @@
+import numpy as np
+from PySide6 import QtCore, QtGui
+from BandOrdering import to_numpy
+
+
+class ImageRenderer:
+    """
+    图片显示缓存：
+    原图只包装为 QImage（不拷贝），按标签尺寸缓存缩放后的底图，
+    选中框在显示坐标系中作为叠加层绘制，检测框坐标每个结果只转换一次
+    """
+
+    def __init__(self, color=(0, 255, 0), thickness=15):
+        self.image = None  # 当前显示的原图（持有引用以保证 QImage 缓冲区有效）
+        self.results = None
+        self.q_image = None
+        self.boxes = np.zeros((0, 4))  # 检测框 N×4（原图坐标）
+        self.scaled_cache = {}  # {(宽, 高): 缩放后的底图}
+        self.color = QtGui.QColor(color[2], color[1], color[0])  # BGR -> RGB
+        self.thickness = thickness  # 原图坐标系下的线宽
+
+    def update(self, image, results=None):
+        """图像或检测结果变化时刷新缓存，未变化时直接复用"""
+        if image is not self.image:
+            self.image = np.ascontiguousarray(image)
+            h, w, ch = self.image.shape
+            self.q_image = QtGui.QImage(self.image.data, w, h, ch * w, QtGui.QImage.Format.Format_BGR888)
+            self.scaled_cache.clear()
+
+        if results is not self.results:
+            self.results = results
+            boxes = results.boxes if results is not None else None
+            if boxes is not None and len(boxes):
+                self.boxes = to_numpy(boxes.xyxy).reshape(-1, 4).astype(np.float64)
+            else:
+                self.boxes = np.zeros((0, 4))
+
+    def scaled_base(self, width, height):
+        """获取指定标签尺寸下的缩放底图（同一尺寸只缩放一次）"""
+        key = (width, height)
+        pixmap = self.scaled_cache.get(key)
+        if pixmap is None:
+            pixmap = QtGui.QPixmap.fromImage(self.q_image).scaled(
+                width, height,
+                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                QtCore.Qt.TransformationMode.SmoothTransformation
+            )
+            # 标签尺寸变化后旧尺寸不再使用，只保留当前尺寸
+            self.scaled_cache = {key: pixmap}
+        return pixmap
+
+    def render(self, label, selected_ids=()):
+        """
+        在标签上显示底图和选中框
+        :param label: 显示用的 QLabel
+        :param selected_ids: 选中的检测框编号（从1开始）
+        """
+        base = self.scaled_base(label.width(), label.height())
+        indices = [i - 1 for i in selected_ids if 0 < i <= len(self.boxes)]
+        if not indices:
+            label.setPixmap(base)
+            return
+
+        # 在底图副本上按缩放比例绘制选中框，只涉及显示尺寸的像素
+        pixmap = QtGui.QPixmap(base)
+        scale = base.width() / self.q_image.width()
+        pen = QtGui.QPen(self.color)
+        pen.setWidthF(max(1.0, self.thickness * scale))
+        painter = QtGui.QPainter(pixmap)
+        painter.setPen(pen)
+        for x1, y1, x2, y2 in (self.boxes[indices] * scale).tolist():
+            painter.drawRect(QtCore.QRectF(x1, y1, x2 - x1, y2 - y1))
+        painter.end()
+        label.setPixmap(pixmap)
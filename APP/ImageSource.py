@@ -0,0 +1,106 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+
+def list_images(folder):
+    """按文件名排序列出文件夹中的图像文件"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+
+
+class ImageSource:
+    """
+    预读图像来源：线程池提前解码后续图像（最多 prefetch 张在途），按输入顺序迭代产出
+    for path, image in ImageSource(folder): ...
+    image 为 None 表示读取失败（与 cv2.imread 一致）。
+    始终按原分辨率解码：检测流程要从原图裁剪电阻做色环检测（或分块检测小目标），缩小解码会降低这一阶段的精度
+    """
+
+    def __init__(self, source, workers=4, prefetch=8):
+        """
+        :param source: 图像文件夹或图像路径列表
+        :param workers: 解码线程数量
+        :param prefetch: 最多提前解码的图像数量
+        """
+        if isinstance(source, (str, os.PathLike)):
+            self.paths = list_images(source)
+        else:
+            self.paths = [str(path) for path in source]
+        self.workers = max(1, workers)
+        self.prefetch = max(1, prefetch)
+        self._executor = None
+        self._pending = deque()
+        self._next = 0
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="ImageSource")
+        self._fill()
+        if not self._pending:
+            self.close()
+            raise StopIteration
+        path, future = self._pending.popleft()
+        self._fill()
+        return path, future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _fill(self):
+        """提交后续图像的解码任务，保持在途数量不超过 prefetch"""
+        while len(self._pending) < self.prefetch and self._next < len(self.paths):
+            path = self.paths[self._next]
+            self._next += 1
+            # 在解码线程中运行，OpenCV 解码时释放 GIL
+            self._pending.append((path, self._executor.submit(cv2.imread, path)))
+
+    def close(self):
+        """取消尚未开始的解码任务并释放线程池"""
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._next = len(self.paths)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="对比逐张 cv2.imread 与预读解码的读取速度")
+    parser.add_argument("images", help="图像文件夹")
+    parser.add_argument("--workers", type=int, default=4, help="解码线程数量")
+    parser.add_argument("--prefetch", type=int, default=8, help="最多提前解码的图像数量")
+    args = parser.parse_args()
+
+    paths = list_images(args.images)
+    if not paths:
+        print(f"警告: 在文件夹 {args.images} 中未找到图像文件")
+    else:
+        start = time.perf_counter()
+        for path in paths:
+            cv2.imread(path)
+        sequential = time.perf_counter() - start
+        print(f"{'逐张读取':<12}{len(paths) / sequential:>10.1f} 张/秒")
+
+        start = time.perf_counter()
+        with ImageSource(paths, args.workers, args.prefetch) as source:
+            for _ in source:
+                pass
+        elapsed = time.perf_counter() - start
+        print(f"{'预读':<12}{len(paths) / elapsed:>10.1f} 张/秒")
@@ -0,0 +1,226 @@
+import ast
+import json
+import os
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+from ultralytics.utils.nms import non_max_suppression
+from ultralytics.utils.ops import scale_boxes
+
+try:
+    import onnxruntime
+except ImportError:  # 未安装 onnxruntime 时只能使用 PyTorch 后端
+    onnxruntime = None
+
+# 预处理版本：修改 letterbox 或 OnnxModel.preprocess 后递增，旧的 INT8 校验记录随之失效
+PREPROCESS_VERSION = 2
+
+
+def letterbox(image, size=640, pad_value=114, stride=None):
+    """
+    等比例缩放并居中填充，缩放尺寸和填充位置与 ultralytics 预处理及 scale_boxes 的坐标还原一致
+    （小图同样放大）；ONNX 推理、批量色环检测和 INT8 校准共用这一实现
+    :param image: 原始图像
+    :param size: 目标边长或 (高, 宽)
+    :param pad_value: 填充像素值
+    :param stride: 给定时只填充到步长的整数倍（单张推理的矩形输入），否则填充到目标尺寸
+    :return: 填充后的图像
+    """
+    target_h, target_w = (size, size) if isinstance(size, int) else size
+    h, w = image.shape[:2]
+    gain = min(target_h / h, target_w / w)
+    new_h, new_w = max(1, round(h * gain)), max(1, round(w * gain))
+    if (new_h, new_w) != (h, w):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    if stride:
+        out_h, out_w = new_h + (target_h - new_h) % stride, new_w + (target_w - new_w) % stride
+    else:
+        out_h, out_w = target_h, target_w
+    canvas = np.full((out_h, out_w, 3), pad_value, dtype=image.dtype)
+    top = (out_h - new_h) // 2
+    left = (out_w - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = image
+    return canvas
+
+
+class OnnxModel:
+    """
+    ONNX Runtime 推理模型（CPU），调用方式和返回结果与 ultralytics YOLO 检测模型一致：
+    model(image 或 [image, ...], conf=..., iou=..., imgsz=...) -> [Results, ...]
+    """
+
+    def __init__(self, path, threads=0):
+        if onnxruntime is None:
+            raise ImportError("使用 ONNX 模型需要安装 onnxruntime")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads  # 0 表示由 onnxruntime 按物理核心数决定
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.path = path
+        self.threads = threads
+        self.input_name = self.session.get_inputs()[0].name
+
+        # 导出时写入的模型信息（类别名称、输入尺寸、是否已包含NMS）
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        self.task = metadata.get("task", "detect")
+        self.stride = int(metadata.get("stride", 32))
+        self.end2end = metadata.get("end2end") == "True"
+        if self.task != "detect":
+            raise ValueError(f"ONNX 后端仅支持检测模型，当前模型任务为: {self.task}")
+
+        # 静态尺寸模型只能使用导出时的尺寸和批大小
+        batch, _, height, width = self.session.get_inputs()[0].shape
+        self.fixed_imgsz = (height, width) if isinstance(height, int) and isinstance(width, int) else None
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        default_imgsz = ast.literal_eval(metadata.get("imgsz", "[640, 640]"))
+        self.default_imgsz = tuple(default_imgsz) if isinstance(default_imgsz, (list, tuple)) else (default_imgsz,) * 2
+
+    def input_size(self, images, imgsz=None):
+        """
+        本次推理的输入尺寸 (高, 宽)
+        动态尺寸模型在整批图像尺寸相同时与 ultralytics 一致，只填充到步长的整数倍（矩形推理）
+        """
+        if self.fixed_imgsz:
+            return self.fixed_imgsz
+        if imgsz is None:
+            imgsz = self.default_imgsz
+        elif isinstance(imgsz, int):
+            imgsz = (imgsz, imgsz)
+        if len({image.shape[:2] for image in images}) == 1:
+            h, w = images[0].shape[:2]
+            gain = min(imgsz[0] / h, imgsz[1] / w)
+            imgsz = (round(h * gain), round(w * gain))
+        return tuple(max(self.stride, int(np.ceil(size / self.stride)) * self.stride) for size in imgsz)
+
+    @staticmethod
+    def preprocess(images, size):
+        """BGR 图像 -> NCHW float32（RGB，归一化到 0~1）"""
+        batch = np.stack([letterbox(image, size) for image in images])
+        return np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+
+    def prepare(self, images, imgsz=None):
+        """按推理时的方式确定输入尺寸并预处理，返回 (输入尺寸, 输入张量)"""
+        size = self.input_size(images, imgsz)
+        return size, self.preprocess(images, size)
+
+    def run(self, batch):
+        """执行推理，固定批大小的模型逐张运行"""
+        if self.fixed_batch and len(batch) != self.fixed_batch:
+            outputs = [self.session.run(None, {self.input_name: batch[i:i + 1]})[0] for i in range(len(batch))]
+            return np.concatenate(outputs)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def __call__(self, source, conf=0.25, iou=0.7, imgsz=None, max_det=300, classes=None,
+                 agnostic_nms=False, **kwargs):
+        """推理（其余 ultralytics 参数如 verbose 被忽略）"""
+        images = source if isinstance(source, (list, tuple)) else [source]
+        images = [cv2.imread(image) if isinstance(image, str) else image for image in images]
+        size, batch = self.prepare(images, imgsz)
+
+        prediction = torch.from_numpy(self.run(batch))
+        detections = non_max_suppression(prediction, conf, iou, classes=classes, agnostic=agnostic_nms,
+                                          max_det=max_det, nc=len(self.names), end2end=self.end2end)
+
+        results = []
+        for image, det in zip(images, detections):
+            det[:, :4] = scale_boxes(size, det[:, :4], image.shape[:2])
+            results.append(Results(image, path="", names=self.names, boxes=det[:, :6]))
+        return results
+
+    predict = __call__
+
+
+# 按权重文件后缀选择推理后端，可通过 register_backend 扩展
+BACKENDS = {
+    ".onnx": OnnxModel
+}
+
+
+def register_backend(suffix, loader):
+    """注册推理后端：loader(path, threads) 返回可调用的模型对象"""
+    BACKENDS[suffix.lower()] = loader
+
+
+def quantized_model_path(onnx_path, imgsz=640):
+    """
+    返回通过精度校验的 INT8 模型路径（best_int8.onnx），
+    未量化、校验未通过、FP32 模型在校验后被重新导出，
+    或校准/校验时的预处理版本和输入尺寸与运行时不一致时返回 None
+    :param imgsz: 运行时色环检测的输入尺寸
+    """
+    stem = os.path.splitext(onnx_path)[0]
+    gate_path = f"{stem}_int8.json"
+    try:
+        with open(gate_path, 'r', encoding='utf-8') as f:
+            gate = json.load(f)
+        source_mtime = os.path.getmtime(onnx_path)
+    except (OSError, ValueError):
+        return None
+    if not gate.get("accepted") or gate.get("source_mtime") != source_mtime:
+        return None
+    if gate.get("preprocess") != PREPROCESS_VERSION or gate.get("imgsz") != imgsz:
+        return None
+    quantized = f"{stem}_int8.onnx"
+    return quantized if os.path.exists(quantized) else None
+
+
+def resolve_model_path(path, backend="torch", quantized=True, imgsz=640):
+    """
+    按首选后端查找 .pt 权重旁边已导出的模型（best.onnx / best_openvino_model），不存在时使用原权重
+    :param backend: torch / onnx / openvino
+    :param quantized: onnx 后端是否优先使用通过精度校验的 INT8 模型（未通过时自动使用 FP32 模型）
+    :param imgsz: 运行时的输入尺寸（INT8 模型须在相同尺寸下校准和校验）
+    """
+    stem, suffix = os.path.splitext(path)
+    if suffix.lower() == ".pt" and backend != "torch":
+        candidate = f"{stem}.onnx" if backend == "onnx" else f"{stem}_openvino_model"
+        if not os.path.exists(candidate):
+            return path
+        path = candidate
+    if quantized and backend == "onnx" and path.lower().endswith(".onnx"):
+        return quantized_model_path(path, imgsz) or path
+    return path
+
+
+def load_model(path, threads=0):
+    """
+    按文件后缀加载模型：.onnx 使用 ONNX Runtime，其余（.pt、OpenVINO 导出目录等）交给 ultralytics
+    :param threads: CPU 推理线程数（0 表示自动）
+    """
+    loader = BACKENDS.get(os.path.splitext(path)[1].lower())
+    if loader is not None:
+        return loader(path, threads)
+    if threads:
+        torch.set_num_threads(threads)
+    return YOLO(path)
+
+
+def export_model(weights, fmt="onnx", imgsz=640, dynamic=True, half=False):
+    """
+    将 .pt 权重导出为 CPU 推理格式
+    :param fmt: onnx 或 openvino
+    :param dynamic: 是否导出动态输入尺寸和批大小（分块检测和批量色环检测需要）
+    :return: 导出文件路径
+    """
+    model = YOLO(weights)
+    if fmt == "openvino":
+        return model.export(format=fmt, imgsz=imgsz, dynamic=dynamic, half=half)
+    return model.export(format=fmt, imgsz=imgsz, dynamic=dynamic, half=half, simplify=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="将 .pt 模型导出为 CPU 推理格式")
+    parser.add_argument("weights", nargs="+", help=".pt 权重路径（可同时导出电阻定位和色环模型）")
+    parser.add_argument("--format", default="onnx", choices=["onnx", "openvino"], help="导出格式")
+    parser.add_argument("--imgsz", type=int, default=640, help="导出输入尺寸")
+    parser.add_argument("--static", action="store_true", help="导出固定输入尺寸（默认动态尺寸和批大小）")
+    parser.add_argument("--half", action="store_true", help="导出半精度权重")
+    args = parser.parse_args()
+    for weights in args.weights:
+        print(f"已导出: {export_model(weights, args.format, args.imgsz, not args.static, args.half)}")
@@ -0,0 +1,121 @@
+from PySide6 import QtCore
+import threading
+
+
+class InferenceCancelled(Exception):
+    """检测任务被取消"""
+
+
+class InferenceSignals(QtCore.QObject):
+    """检测任务信号（在界面线程创建，跨线程发射时自动排队到界面线程）"""
+    started = QtCore.Signal(object)  # job
+    progress = QtCore.Signal(object, int, int)  # job, 已完成数量, 总数量
+    detected = QtCore.Signal(object, object, object)  # job, 检测结果, 检测结果图
+    partial_result = QtCore.Signal(object, object)  # job, 单个物体的结果字典
+    finished = QtCore.Signal(object)  # job
+    failed = QtCore.Signal(object, str)  # job, 错误信息
+    cancelled = QtCore.Signal(object)  # job
+
+
+class InferenceJob(QtCore.QRunnable):
+    """
+    单个检测任务，在线程池中执行
+    task 的签名为 task(job, *args, **kwargs)，在工作线程中运行，
+    通过 job.report_* 上报进度和结果，通过 job.check_cancelled() 响应取消
+    """
+
+    def __init__(self, task, *args, **kwargs):
+        super().__init__()
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.context = {}  # 提交方附加的信息（任务本身不使用），供结果回调读取
+        self.mode_id = None  # 提交页面对应的结果模式，结果写入该模式而不是当前显示的模式
+        self.signals = InferenceSignals()
+        self._cancel_event = threading.Event()
+        self.setAutoDelete(False)  # 由 InferenceEngine 持有引用
+
+    def cancel(self):
+        """请求取消任务（在下一个检查点生效）"""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """任务检查点，已请求取消时抛出 InferenceCancelled"""
+        if self._cancel_event.is_set():
+            raise InferenceCancelled()
+
+    def report_progress(self, done, total):
+        self.signals.progress.emit(self, done, total)
+
+    def report_detected(self, results, result_image):
+        self.signals.detected.emit(self, results, result_image)
+
+    def report_result(self, row):
+        self.signals.partial_result.emit(self, row)
+
+    def run(self):
+        """线程池入口"""
+        if self.is_cancelled():
+            self.signals.cancelled.emit(self)
+            return
+
+        self.signals.started.emit(self)
+        try:
+            self.task(self, *self.args, **self.kwargs)
+        except InferenceCancelled:
+            self.signals.cancelled.emit(self)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+        else:
+            self.signals.finished.emit(self)
+
+
+class InferenceEngine(QtCore.QObject):
+    """基于 QThreadPool 的检测引擎，按提交顺序执行排队的检测任务"""
+    queue_changed = QtCore.Signal(int)  # 未完成任务数量
+
+    def __init__(self, max_workers=1, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.jobs = []  # 未完成的任务
+
+    def submit(self, job):
+        """提交检测任务"""
+        self.jobs.append(job)
+        job.signals.finished.connect(self._on_job_done)
+        job.signals.failed.connect(lambda job, _: self._on_job_done(job))
+        job.signals.cancelled.connect(self._on_job_done)
+        self.pool.start(job)
+        self.queue_changed.emit(len(self.jobs))
+        return job
+
+    def _on_job_done(self, job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.queue_changed.emit(len(self.jobs))
+
+    def is_busy(self):
+        return bool(self.jobs)
+
+    def pending_count(self):
+        return len(self.jobs)
+
+    def cancel_all(self):
+        """取消所有排队中和执行中的任务"""
+        for job in self.jobs:
+            job.cancel()
+
+    def cancel_where(self, predicate):
+        """取消满足条件的未完成任务，返回取消的数量"""
+        jobs = [job for job in self.jobs if predicate(job)]
+        for job in jobs:
+            job.cancel()
+        return len(jobs)
+
+    def wait_for_done(self, msecs=-1):
+        """阻塞等待所有任务结束"""
+        return self.pool.waitForDone(msecs)
@@ -0,0 +1,424 @@
+from pathlib import Path
+from BandOrdering import plot_predictions
+from THTColorDetectNew import predict_batch
+from DetectionCache import detection_cache, image_hash
+from TiledInference import TiledDetector
+from AnnotationStore import annotation_store
+from Profiler import profiler
+from HSVBandClassifier import HSVBandClassifier
+from OrientedCrop import STRIP_SIZE, obb_strip, oriented_strip
+from ResultCache import model_digest
+from THTColorDefine import color_ranges
+
+# 默认色环检测模型路径
+DEFAULT_THT_MODEL_PATH = r'/Users/wfcy/Dev/PycharmProj/YOLOTrain/APP/Module/THTColorDetect/New/best.pt'
+
+# 色环模型类别映射 {class_id: color_name}
+COLOR_MAP = {
+    0: "红",
+    1: "黄",
+    2: "黑",
+    3: "金",
+    4: "橙",
+    5: "蓝",
+    6: "棕",
+    7: "绿",
+    8: "紫",
+    9: "白",
+    10: "灰"
+}
+
+# 定义颜色配置
+BASE_COLORS = ["黑", "棕", "红", "橙", "黄", "绿", "蓝", "紫", "灰", "白"]
+MULTIPLIER_BANDS = ["黑", "棕", "红", "橙", "黄", "绿", "蓝", "金", "银"]
+TOLERANCE_BANDS = ["棕", "红", "绿", "金", "银"]
+
+
+def get_config_path(image_path, config_dir="AnnotationConfig"):
+    """生成图片对应的标注配置文件路径"""
+    if not image_path:
+        return None
+    return Path(config_dir) / f"{Path(image_path).stem}_config.json"
+
+
+class ConsoleLogger:
+    """无界面环境下的日志输出，接口与 LogWindow.Logger 一致"""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+
+    def enabled(self, level):
+        return self.verbose or level == "ERROR"
+
+    def log(self, message, level="INFO"):
+        if self.enabled(level):
+            print(f"{level}: {message}")
+
+
+class InspectionPipeline:
+    """
+    两阶段电阻检测流程（不依赖Qt）：
+    电阻定位 -> 裁剪 -> 色环检测 -> 色环排序 -> 阻值计算 -> 与标注配置比对
+    """
+
+    def __init__(self, model, tht_model, logger=None, conf=0.05,
+                 tht_batch_mode=True, tht_batch_size=16, tht_imgsz=640, use_cache=True,
+                 tile_size=None, tile_overlap=0.25, tile_batch_size=8,
+                 classic_mode=False, classic_min_confidence=0.6, crop_writer=None,
+                 oriented_crops=False, strip_size=STRIP_SIZE, result_cache=None):
+        self.model = model
+        self.tht_model = tht_model
+        self.logger = logger or ConsoleLogger()
+        self.conf = conf
+        self.tht_batch_mode = tht_batch_mode  # 是否批量进行色环检测
+        self.tht_batch_size = tht_batch_size  # 每批裁剪图像数量
+        self.tht_imgsz = tht_imgsz  # 批量检测时统一的输入尺寸
+        self.use_cache = use_cache  # 是否复用共享缓存中的电阻定位结果
+        # 分块检测（tile_size 为空时整图检测），用于高分辨率电路板图像中的小电阻
+        self.tiled_detector = TiledDetector(model, tile_size, tile_overlap, tile_batch_size) if tile_size else None
+        # 传统色环识别快速路径（HSV 颜色范围），置信度不足或阻值校验失败时交给色环模型
+        self.classic_mode = classic_mode
+        self.classic_min_confidence = classic_min_confidence
+        self.classic_classifier = HSVBandClassifier() if classic_mode else None
+        # 裁剪图像只在内存中传递（原图视图），设置 CropWriter 时才异步导出到磁盘
+        self.crop_writer = crop_writer
+        # 旋转校正：倾斜电阻旋转到统一尺寸的水平条带后再做色环检测
+        self.oriented_crops = oriented_crops
+        self.strip_size = strip_size
+        # 磁盘结果缓存（ResultCache），同一图像、权重和参数的检测结果直接读取
+        self.result_cache = result_cache
+        self.COLOR_MAP = COLOR_MAP
+        self.base_colors = BASE_COLORS
+        self.multiplier_bands = MULTIPLIER_BANDS
+        self.tolerance_bands = TOLERANCE_BANDS
+
+    def detect_board(self, image, image_key=None, force=False):
+        """第一阶段：定位电路板上的电阻（force=True 时忽略缓存重新检测）"""
+        with profiler.span("pipeline.detect"):
+            if self.result_cache is None:
+                return self._detect_board(image, image_key, force)
+            image_key = image_key or image_hash(image)
+            return self.result_cache.detect(self.model, image, lambda img: self._detect_board(img, image_key, force),
+                                            image_key, force, **self.detection_params())
+
+    def detection_params(self):
+        """影响电阻定位结果的参数（磁盘缓存键的一部分）"""
+        return {"conf": self.conf, "tiling": self.tiled_detector.settings() if self.tiled_detector else None}
+
+    def bands_cache_key(self, image_key):
+        """色环结果的磁盘缓存键，未启用缓存或无法确定模型权重时返回 None"""
+        if self.result_cache is None or image_key is None:
+            return None
+        detection_key = self.result_cache.detection_key(image_key, self.model, **self.detection_params())
+        tht_digest = model_digest(self.tht_model) if self.tht_model is not None else None
+        if detection_key is None or (self.tht_model is not None and tht_digest is None):
+            return None
+        return self.result_cache.make_key(
+            "bands", detection_key, tht_digest, self.tht_batch_mode, self.tht_imgsz,
+            self.oriented_crops and self.strip_size,
+            self.classic_mode and (self.classic_min_confidence, sorted(color_ranges.items()))
+        )
+
+    def _detect_board(self, image, image_key, force):
+        if self.tiled_detector is None:
+            if not self.use_cache:
+                return self.model(image, conf=self.conf)[0]
+            return detection_cache.detect(self.model, image, image_key, force=force, conf=self.conf)
+
+        if not self.use_cache:
+            return self.tiled_detector(image, conf=self.conf)[0]
+        # 分块参数同时作为缓存键，与整图检测的结果互不混用
+        return detection_cache.detect(self.model, image, image_key, force=force,
+                                      predict=lambda img: self.tiled_detector(img, conf=self.conf)[0],
+                                      conf=self.conf, tiling=self.tiled_detector.settings())
+
+    def crop_resistors(self, image, results, name=None):
+        """
+        按检测框裁剪电阻区域（裁剪图像为原图的视图，不复制像素）
+        :param name: 导出裁剪图像时的文件名前缀，为空时不导出
+        :return: [(框序号, (中心x, 中心y), 类名, 置信度, 裁剪图像), ...]
+        """
+        with profiler.span("pipeline.crop"):
+            crops = self._crop_resistors(image, results)
+        if self.crop_writer is not None and name:
+            self.crop_writer.save(name, crops)
+        return crops
+
+    def _crop_resistors(self, image, results):
+        crops = []
+        boxes = results.boxes if results.boxes is not None else results.obb  # OBB 模型只输出旋转框
+        if not boxes:
+            return crops
+
+        img_height, img_width = image.shape[:2]
+        for i, box in enumerate(boxes):
+            xyxy = box.xyxy[0].cpu().numpy()
+            class_id = int(box.cls)
+            class_name = self.model.names[class_id]
+            confidence = box.conf.item()
+            x_center = (xyxy[0] + xyxy[2]) / 2
+            y_center = (xyxy[1] + xyxy[3]) / 2
+
+            # 裁剪处理逻辑
+            x_min, y_min, x_max, y_max = map(int, xyxy)
+            x_min = max(0, x_min)
+            y_min = max(0, y_min)
+            x_max = min(img_width, x_max)
+            y_max = min(img_height, y_max)
+
+            if x_min >= x_max or y_min >= y_max:
+                continue
+
+            # 执行裁剪
+            crop_img = image[y_min:y_max, x_min:x_max]
+            if self.oriented_crops:
+                with profiler.span("pipeline.orient"):
+                    crop_img = self.orient_crop(image, box, crop_img)
+            crops.append((i, (x_center, y_center), class_name, confidence, crop_img))
+        return crops
+
+    def orient_crop(self, image, box, crop_img):
+        """
+        旋转校正为统一尺寸的水平条带
+        OBB 模型直接使用旋转框，普通检测框按裁剪图像中电阻的主轴（二阶矩）估计方向
+        """
+        if hasattr(box, "xywhr"):
+            return obb_strip(image, box.xywhr[0].cpu().numpy(), self.strip_size)
+        return oriented_strip(crop_img, self.strip_size)
+
+    def detect_tht_colors(self, crop_img):
+        """对裁剪的电阻图像进行色环检测"""
+        try:
+            # 进行预测
+            with profiler.span("pipeline.tht_predict"):
+                results = self.tht_model.predict(crop_img)
+            return self.parse_tht_colors(crop_img, results)
+        except Exception as e:
+            self.logger.log(f"色环检测失败: {str(e)}", "ERROR")
+            return "色环检测错误"
+
+    def detect_tht_colors_batch(self, crop_imgs):
+        """对多张裁剪的电阻图像批量进行色环检测，返回顺序与输入一致"""
+        try:
+            with profiler.span("pipeline.tht_predict"):
+                batch_results = predict_batch(self.tht_model, crop_imgs, self.tht_imgsz, self.tht_batch_size)
+        except Exception as e:
+            self.logger.log(f"批量色环检测失败: {str(e)}", "ERROR")
+            return ["色环检测错误"] * len(crop_imgs)
+
+        tht_colors = []
+        for result in batch_results:
+            try:
+                # 结果坐标基于填充后的图像，排序只依赖相对位置
+                tht_colors.append(self.parse_tht_colors(result.orig_img, [result]))
+            except Exception as e:
+                self.logger.log(f"色环检测失败: {str(e)}", "ERROR")
+                tht_colors.append("色环检测错误")
+        return tht_colors
+
+    def detect_colors(self, crop_imgs):
+        """
+        对一组裁剪图像进行色环检测，返回顺序与输入一致
+        开启传统识别时先走 HSV 快速路径，只有未通过的电阻才调用色环模型
+        """
+        if not self.classic_mode:
+            return self.detect_colors_with_model(crop_imgs)
+
+        tht_colors = [None] * len(crop_imgs)
+        pending = []
+        with profiler.span("pipeline.classic"):
+            for index, crop_img in enumerate(crop_imgs):
+                colors, confidence = self.classic_classifier.classify(crop_img)
+                if self.accept_classic(colors, confidence):
+                    tht_colors[index] = " ".join(colors)
+                else:
+                    pending.append(index)
+        if self.logger.enabled("DEBUG"):
+            self.logger.log(f"传统色环识别: {len(crop_imgs) - len(pending)}/{len(crop_imgs)} 个电阻通过，"
+                            f"其余交给色环模型", "DEBUG")
+
+        if pending:
+            if self.tht_model is None:
+                fallback = ["未识别到色环"] * len(pending)
+            else:
+                fallback = self.detect_colors_with_model([crop_imgs[index] for index in pending])
+            for index, tht_color in zip(pending, fallback):
+                tht_colors[index] = tht_color
+        return tht_colors
+
+    def detect_colors_with_model(self, crop_imgs):
+        """使用色环模型检测（批量或逐个）"""
+        if self.tht_batch_mode:
+            return self.detect_tht_colors_batch(crop_imgs)
+        return [self.detect_tht_colors(crop_img) for crop_img in crop_imgs]
+
+    def accept_classic(self, colors, confidence):
+        """传统识别结果是否可信：色环数量为 4/5、置信度足够且能计算出有效阻值"""
+        if len(colors) not in (4, 5) or confidence < self.classic_min_confidence:
+            return False
+        resistance = self.calculate_resistance_from_bands(colors)
+        return not (resistance.startswith("(色环") or resistance == "(错误)")
+
+    def parse_tht_colors(self, crop_img, results):
+        """将色环模型的预测结果整理为按顺序排列的颜色字符串"""
+        # 获取处理后的颜色信息
+        with profiler.span("pipeline.band_order"):
+            _, color_info = plot_predictions(crop_img, results, self.COLOR_MAP, self.logger, draw=False)
+
+        # 金开头反转逻辑
+        if color_info and len(color_info) > 0:
+            # 检查第一个色环是否为金
+            if color_info[0] == "金":
+                # 反转色环顺序（保留原始列表）
+                reversed_colors = color_info[::-1]
+
+                # 日志记录原始和调整后的顺序（每个电阻一次，先判断级别再拼接）
+                if self.logger.enabled("WARNING"):
+                    self.logger.log(f"检测到误差环出现在第一位，排序出错，执行顺序调整: {color_info} -> {reversed_colors}", "WARNING")
+
+                return " ".join(reversed_colors)
+
+        return " ".join(color_info) if color_info else "未识别到色环"
+
+    def calculate_resistance_from_bands(self, color_bands):
+        """根据色环列表计算阻值"""
+        if not color_bands or len(color_bands) not in [4, 5]:
+            return "(色环数量错误)"
+
+        try:
+            # 四环电阻处理
+            if len(color_bands) == 4:
+                # 验证颜色有效性
+                valid = (color_bands[0] in self.base_colors and
+                         color_bands[1] in self.base_colors and
+                         color_bands[2] in self.multiplier_bands and
+                         color_bands[3] in self.tolerance_bands)
+                if not valid:
+                    return "(色环类型错误)"
+
+                # 计算阻值
+                base = self.base_colors.index(color_bands[0]) * 10 + self.base_colors.index(color_bands[1])
+                multiplier = 10 ** self.multiplier_bands.index(color_bands[2])
+                tolerance_idx = self.tolerance_bands.index(color_bands[3])
+                tolerance = ["±1%", "±2%", "±0.5%", "±5%", "±10%"][tolerance_idx]
+                resistance = base * multiplier
+
+            # 五环电阻处理
+            elif len(color_bands) == 5:
+                valid = (all(c in self.base_colors for c in color_bands[:3]) and
+                         color_bands[3] in self.multiplier_bands and
+                         color_bands[4] in self.tolerance_bands)
+                if not valid:
+                    return "(色环类型错误)"
+
+                base = (self.base_colors.index(color_bands[0]) * 100 +
+                        self.base_colors.index(color_bands[1]) * 10 +
+                        self.base_colors.index(color_bands[2]))
+                multiplier = 10 ** self.multiplier_bands.index(color_bands[3])
+                tolerance_idx = self.tolerance_bands.index(color_bands[4])
+                tolerance = ["±1%", "±2%", "±0.5%", "±5%", "±10%"][tolerance_idx]
+                resistance = base * multiplier
+
+            # 单位转换
+            if resistance >= 1e6:
+                return f"({resistance / 1e6:.1f}MΩ {tolerance})"
+            elif resistance >= 1e3:
+                return f"({resistance / 1e3:.1f}KΩ {tolerance})"
+            else:
+                return f"({resistance:.1f}Ω {tolerance})"
+        except Exception as e:
+            self.logger.log(f"阻值计算错误: {str(e)}", "ERROR")
+            return "(错误)"
+
+    def load_config(self, config_path):
+        """
+        读取标注配置（共享缓存，文件未修改时不重复读取）
+        :return: {电阻编号: 预期色环元组}，不存在或读取失败时返回 None
+        """
+        with profiler.span("pipeline.load_config"):
+            return annotation_store.expected_colors(config_path)
+
+    def compare_with_config(self, resistor_id, tht_color, config_data):
+        """将检测到的色环与标注配置比对"""
+        comparison_info = ""
+        correct_colors = config_data.get(resistor_id) if config_data else None
+        if correct_colors is not None:
+            detected_colors = tuple(tht_color.split())
+            if detected_colors == correct_colors:
+                comparison_info = " ✔"
+            else:
+                expected = " ".join(correct_colors)
+                detected = " ".join(detected_colors) if detected_colors else "无"
+                comparison_info = f" ✘ (预期: {expected}, 检测: {detected})"
+        return comparison_info
+
+    def build_row(self, crop, tht_color, config_data):
+        """整理单个电阻的检测结果"""
+        i, coords, class_name, confidence, _ = crop
+        resistor_id = str(i + 1)
+
+        # 检测到色环与 JSON 比对逻辑
+        comparison_info = self.compare_with_config(resistor_id, tht_color, config_data)
+
+        # 阻值计算
+        if tht_color.startswith("未识别") or tht_color.startswith("错误"):
+            resistance_info = "(色环识别出错)"
+        else:
+            bands = tht_color.split()
+            resistance_info = self.calculate_resistance_from_bands(bands)
+
+        return {
+            "resistor_id": resistor_id,
+            "coords": (float(coords[0]), float(coords[1])),
+            "class": class_name,
+            "confidence": float(confidence),
+            "bands": tht_color,
+            "resistance": resistance_info,
+            "comparison": comparison_info,
+            "text": f"{tht_color} {resistance_info} {comparison_info}"  # 输出窗口显示的合并结果
+        }
+
+    def iter_rows(self, crops, config_path=None, image_key=None):
+        """
+        第二阶段：分段进行色环检测（批量或逐个）
+        每段完成后产出 (已完成数量, 总数量, 本段结果列表)，调用方可在段间响应取消
+        :param image_key: 图像哈希，启用磁盘缓存时用于读取/保存色环结果（比对结果始终按当前标注配置重新计算）
+        """
+        config_data = self.load_config(config_path)
+        cache_key = self.bands_cache_key(image_key)
+        cached = self.result_cache.load_bands(cache_key) if cache_key else None
+        if cached is not None and len(cached) == len(crops):
+            with profiler.span("pipeline.build_rows"):
+                rows = [self.build_row(crop, tht_color, config_data) for crop, tht_color in zip(crops, cached)]
+            yield len(crops), len(crops), rows
+            return
+
+        all_colors = []
+        step = self.tht_batch_size if self.tht_batch_mode or self.classic_mode else 1
+        for start in range(0, len(crops), step):
+            chunk = crops[start:start + step]
+            tht_colors = self.detect_colors([crop[4] for crop in chunk])
+            all_colors.extend(tht_colors)
+
+            with profiler.span("pipeline.build_rows"):
+                rows = [self.build_row(crop, tht_color, config_data) for crop, tht_color in zip(chunk, tht_colors)]
+            yield min(start + step, len(crops)), len(crops), rows
+
+        # 检测出错的结果不缓存，下次重新检测
+        if cache_key and "色环检测错误" not in all_colors:
+            self.result_cache.save_bands(cache_key, all_colors)
+
+    def inspect(self, image, config_path=None, image_key=None, name=None):
+        """
+        完整执行两阶段检测
+        :param name: 导出裁剪图像时的文件名前缀（需设置 crop_writer）
+        :return: (电阻检测结果, 每个电阻的结果列表)
+        """
+        if image_key is None and self.result_cache is not None:
+            image_key = image_hash(image)
+        results = self.detect_board(image, image_key)
+        crops = self.crop_resistors(image, results, name)
+        rows = []
+        for _, _, chunk_rows in self.iter_rows(crops, config_path, image_key):
+            rows.extend(chunk_rows)
+        return results, rows
@@ -0,0 +1,312 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+import cv2
+import numpy as np
+from BandOrdering import to_numpy
+
+
+class FrameSource(ABC):
+    """视频帧来源基类，read() 返回 (是否成功, 帧)"""
+    fps = 30.0
+
+    @abstractmethod
+    def read(self):
+        pass
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """摄像头帧来源"""
+
+    def __init__(self, index=0, flip=False):
+        self.capture = cv2.VideoCapture(index)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"无法打开摄像头 {index}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.flip = flip  # 前置摄像头左右镜像
+
+    def read(self):
+        ok, frame = self.capture.read()
+        if ok and self.flip:
+            frame = cv2.flip(frame, 1)
+        return ok, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """视频文件帧来源，可按原帧率播放以模拟摄像头"""
+
+    def __init__(self, path, realtime=True, loop=True):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"无法打开视频文件 {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.realtime = realtime
+        self.loop = loop
+        self.next_time = time.perf_counter()
+
+    def read(self):
+        if self.realtime:
+            self.next_time = max(self.next_time + 1.0 / self.fps, time.perf_counter() - 1.0)
+            time.sleep(max(0.0, self.next_time - time.perf_counter()))
+
+        ok, frame = self.capture.read()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.capture.read()
+        return ok, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class SyntheticSource(FrameSource):
+    """合成帧来源：绘制移动的色环电阻，用于无摄像头时测试"""
+
+    def __init__(self, width=1280, height=720, fps=30.0, resistors=6, frames=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.resistors = resistors
+        self.frames = frames  # 帧数上限，为空时无限生成
+        self.index = 0
+        self.next_time = time.perf_counter()
+        rng = np.random.default_rng(0)
+        self.band_colors = rng.integers(0, 255, (resistors, 4, 3))
+
+    def read(self):
+        if self.frames is not None and self.index >= self.frames:
+            return False, None
+        self.next_time = max(self.next_time + 1.0 / self.fps, time.perf_counter() - 1.0)
+        time.sleep(max(0.0, self.next_time - time.perf_counter()))
+
+        frame = np.full((self.height, self.width, 3), (40, 90, 30), dtype=np.uint8)
+        offset = (self.index * 4) % self.width
+        for i in range(self.resistors):
+            x = (offset + i * self.width // self.resistors) % self.width
+            y = (i + 1) * self.height // (self.resistors + 1)
+            cv2.rectangle(frame, (x, y - 12), (x + 90, y + 12), (170, 200, 220), -1)
+            for j, color in enumerate(self.band_colors[i]):
+                bx = x + 12 + j * (22 if j < 3 else 28)
+                cv2.rectangle(frame, (bx, y - 12), (bx + 8, y + 12), tuple(int(c) for c in color), -1)
+        self.index += 1
+        return True, frame
+
+
+class LatestFrameQueue:
+    """有界帧队列：队满时丢弃最旧的帧，取帧时只取最新一帧并丢弃积压的旧帧"""
+
+    def __init__(self, maxsize=2):
+        self.frames = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(item)
+            self.condition.notify()
+
+    def get_latest(self, timeout=None):
+        """取出最新帧，超时返回 None"""
+        with self.condition:
+            if not self.frames and not self.condition.wait_for(lambda: self.frames, timeout):
+                return None
+            item = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            return item
+
+
+class RateMeter:
+    """指数滑动平均的帧率统计"""
+
+    def __init__(self, smoothing=0.9):
+        self.smoothing = smoothing
+        self.rate = 0.0
+        self.last_time = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last_time is not None:
+            instant = 1.0 / max(now - self.last_time, 1e-6)
+            self.rate = instant if self.rate == 0 else self.smoothing * self.rate + (1 - self.smoothing) * instant
+        self.last_time = now
+        return self.rate
+
+
+class LiveResult:
+    """单帧检测结果"""
+
+    def __init__(self, frame_id, boxes, rows, latency):
+        self.frame_id = frame_id
+        self.boxes = boxes  # 电阻框 N×4（原图坐标）
+        self.rows = rows  # InspectionPipeline 输出的每个电阻结果
+        self.latency = latency  # 从采集到检测完成的耗时（秒）
+
+
+class LiveInspector:
+    """
+    实时检测流水线：
+    采集线程持续读帧并放入有界队列（旧帧被丢弃），
+    检测线程每次只处理最新一帧，界面按自己的节奏读取最新帧和最新结果进行绘制
+    """
+
+    def __init__(self, source, pipeline, queue_size=2, on_result=None):
+        self.source = source
+        self.pipeline = pipeline
+        self.queue = LatestFrameQueue(queue_size)
+        self.on_result = on_result  # 每帧检测完成后的回调（在检测线程中调用）
+        self.latest_frame = None  # (帧序号, 采集时间, 帧)
+        self.latest_result = None
+        self.capture_meter = RateMeter()
+        self.inference_meter = RateMeter()
+        self.running = threading.Event()
+        self.threads = []
+        self.error = None
+
+    def start(self):
+        self.running.set()
+        self.threads = [
+            threading.Thread(target=self.capture_loop, name="LiveCapture", daemon=True),
+            threading.Thread(target=self.inference_loop, name="LiveInference", daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=5.0):
+        """通知线程退出并等待结束"""
+        self.request_stop()
+        self.join(timeout)
+
+    def request_stop(self):
+        """只通知线程退出，不等待（界面线程调用，避免等待正在进行的检测）"""
+        self.running.clear()
+
+    def join(self, timeout=5.0):
+        """等待采集与检测线程结束"""
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def is_running(self):
+        return self.running.is_set()
+
+    def capture_loop(self):
+        frame_id = 0
+        try:
+            while self.running.is_set():
+                ok, frame = self.source.read()
+                if not ok:
+                    break
+                frame_id += 1
+                item = (frame_id, time.perf_counter(), frame)
+                self.latest_frame = item
+                self.queue.put(item)
+                self.capture_meter.tick()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            # 由采集线程自己释放帧来源，停止时无需等待检测线程
+            self.running.clear()
+            self.source.release()
+
+    def inference_loop(self):
+        try:
+            while self.running.is_set():
+                item = self.queue.get_latest(timeout=0.1)
+                if item is None:
+                    continue
+                frame_id, captured_at, frame = item
+                results, rows = self.pipeline.inspect(frame)
+                boxes = to_numpy(results.boxes.xyxy).reshape(-1, 4) if results.boxes is not None else np.zeros((0, 4))
+                self.latest_result = LiveResult(frame_id, boxes, rows, time.perf_counter() - captured_at)
+                self.inference_meter.tick()
+                if self.on_result:
+                    self.on_result(self.latest_result)
+        except Exception as e:
+            self.error = str(e)
+            self.running.clear()
+
+    def stats(self):
+        """当前采集帧率、检测帧率、延迟（毫秒）和丢帧数"""
+        latency = self.latest_result.latency * 1000 if self.latest_result else 0.0
+        return {
+            "capture_fps": self.capture_meter.rate,
+            "inference_fps": self.inference_meter.rate,
+            "latency_ms": latency,
+            "dropped": self.queue.dropped
+        }
+
+
+def draw_overlay(frame, result, stats):
+    """在帧上绘制最新检测结果和帧率/延迟信息（在副本上绘制）"""
+    image = frame.copy()
+    if result is not None:
+        for row in result.rows:
+            index = int(row["resistor_id"]) - 1
+            if index >= len(result.boxes):
+                continue
+            x1, y1, x2, y2 = map(int, result.boxes[index])
+            ok = row["comparison"] == " ✔"
+            color = (0, 255, 0) if ok or not row["comparison"] else (0, 0, 255)
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(image, row["resistor_id"], (x1, max(0, y1 - 6)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    text = (f"Capture {stats['capture_fps']:.1f} FPS | Detect {stats['inference_fps']:.1f} FPS | "
+            f"Latency {stats['latency_ms']:.0f} ms | Dropped {stats['dropped']}")
+    (w, h), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+    cv2.rectangle(image, (0, 0), (w + 16, h + 16), (0, 0, 0), -1)
+    cv2.putText(image, text, (8, h + 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    return image
+
+
+def run_headless(source, pipeline, seconds=10.0):
+    """无界面运行实时检测并定时打印统计信息，用于视频文件或合成画面测试"""
+    inspector = LiveInspector(source, pipeline)
+    inspector.start()
+    start = time.perf_counter()
+    try:
+        while inspector.is_running() and time.perf_counter() - start < seconds:
+            time.sleep(1.0)
+            stats = inspector.stats()
+            print(f"采集 {stats['capture_fps']:.1f} FPS，检测 {stats['inference_fps']:.1f} FPS，"
+                  f"延迟 {stats['latency_ms']:.0f} ms，丢帧 {stats['dropped']}")
+    finally:
+        inspector.stop()
+    if inspector.error:
+        print(f"实时检测出错: {inspector.error}")
+    return inspector.stats()
+
+
+if __name__ == '__main__':
+    import argparse
+    from ModelRegistry import get_model
+    from InspectionPipeline import InspectionPipeline, ConsoleLogger, DEFAULT_THT_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="无界面实时检测测试")
+    parser.add_argument("-m", "--model", required=True, help="电阻定位模型路径 (*.pt)")
+    parser.add_argument("-t", "--tht-model", default=DEFAULT_THT_MODEL_PATH, help="色环检测模型路径 (*.pt)")
+    parser.add_argument("--video", help="视频文件路径，为空时使用合成画面")
+    parser.add_argument("--camera", type=int, help="摄像头编号")
+    parser.add_argument("--seconds", type=float, default=10.0, help="运行时长（秒）")
+    args = parser.parse_args()
+
+    if args.camera is not None:
+        frame_source = CameraSource(args.camera)
+    elif args.video:
+        frame_source = VideoFileSource(args.video)
+    else:
+        frame_source = SyntheticSource()
+
+    live_pipeline = InspectionPipeline(get_model(args.model), get_model(args.tht_model), ConsoleLogger(), use_cache=False)
+    run_headless(frame_source, live_pipeline, args.seconds)
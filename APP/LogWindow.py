@@ -1,24 +1,47 @@
-from PySide6 import QtWidgets, QtGui
+from PySide6 import QtWidgets, QtGui, QtCore
+from bisect import bisect_left
+from collections import deque
 from pathlib import Path
+import atexit
+import queue
+import threading
 import time
+from ResultStore import next_indexed_path
+
+# 日志级别（数值越大越重要），低于阈值的日志直接跳过
+LOG_LEVELS = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40
+}
 
 
 class Logger:
-    def __init__(self, log_widget=None):
+    """
+    异步日志：调用方只负责格式化并入队，
+    后台线程通过常驻文件句柄批量写入并定期刷新，界面由日志组件定时批量追加
+    """
+
+    def __init__(self, log_widget=None, min_level="INFO", queue_size=10000, flush_interval=1.0):
         self.log_widget = log_widget
+        self.min_level = LOG_LEVELS[min_level]
+        self.flush_interval = flush_interval  # 文件刷新间隔（秒）
         self.log_dir = Path("Log")
         self.log_file = self.get_next_logfile()
         self.create_log_directory()
 
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0  # 队列满时丢弃的日志数量
+        self.dropped_lock = threading.Lock()  # 生产线程累加与写入线程清零互斥
+        self.writer = threading.Thread(target=self.write_loop, name="LogWriter", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
     def get_next_logfile(self):
         """获取下一个可用的日志文件名"""
-        self.log_dir.mkdir(exist_ok=True)
-        index = 1
-        while True:
-            log_path = self.log_dir / f"Log{index}.txt"
-            if not log_path.exists():
-                return log_path
-            index += 1
+        return next_indexed_path(self.log_dir, "Log", ".txt")
 
     def create_log_directory(self):
         """创建日志存储目录"""
@@ -27,35 +50,209 @@ class Logger:
         except Exception as e:
             print(f"无法创建日志目录: {str(e)}")
 
+    def set_level(self, level):
+        """设置最低记录级别"""
+        self.min_level = LOG_LEVELS[level]
+
+    def enabled(self, level):
+        """该级别的日志是否会被记录（热路径可先判断再拼接消息）"""
+        return LOG_LEVELS.get(level, LOG_LEVELS["INFO"]) >= self.min_level
+
     def log(self, message, level="INFO"):
-        """记录日志到文件和GUI组件"""
+        """记录日志到文件和GUI组件（不阻塞调用线程）"""
+        if LOG_LEVELS.get(level, LOG_LEVELS["INFO"]) < self.min_level:
+            return
+
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {level}: {message}"
 
-        # 写入日志文件
+        # 交给后台线程写入文件，队列满时丢弃并计数
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(log_entry + "\n")
-        except Exception as e:
-            print(f"写入日志文件失败: {str(e)}")
+            self.queue.put_nowait(log_entry)
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += 1
 
-        # 显示到GUI组件
+        # 显示到GUI组件（由界面线程定时批量追加）
         if self.log_widget:
-            self.log_widget.append_log(log_entry, level)
+            self.log_widget.enqueue(log_entry, level)
+
+    def write_loop(self):
+        """后台写入线程：常驻文件句柄，批量写入并定期刷新"""
+        try:
+            f = open(self.log_file, "a", encoding="utf-8")
+        except Exception as e:
+            print(f"打开日志文件失败: {str(e)}")
+            return
+
+        last_flush = time.monotonic()
+        with f:
+            while True:
+                try:
+                    entry = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    entry = ""
+                if entry is None:  # 关闭标记
+                    break
+
+                # 一次取完当前积压的日志
+                lines = [entry] if entry else []
+                stop = False
+                while True:
+                    try:
+                        entry = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if entry is None:
+                        stop = True
+                        break
+                    lines.append(entry)
 
+                with self.dropped_lock:
+                    dropped, self.dropped = self.dropped, 0
+                try:
+                    if dropped:
+                        lines.append(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] WARNING: 日志队列已满，丢弃 {dropped} 条日志")
+                    if lines:
+                        f.write("\n".join(lines) + "\n")
+                    if stop or time.monotonic() - last_flush >= self.flush_interval:
+                        f.flush()
+                        last_flush = time.monotonic()
+                except Exception as e:
+                    print(f"写入日志文件失败: {str(e)}")
+                if stop:
+                    break
 
-class LogWidget(QtWidgets.QTextBrowser):
-    def __init__(self, parent=None):
+    def close(self, timeout=5.0):
+        """写完队列中剩余的日志并关闭文件"""
+        if not self.writer.is_alive():
+            return
+        self.queue.put(None)
+        self.writer.join(timeout)
+
+
+class LogModel(QtCore.QAbstractListModel):
+    """
+    日志数据模型：
+    有界环形缓冲保存最近的日志，并为每个级别维护日志序号索引，
+    筛选时只需切换索引列表，视图按需读取可见行
+    """
+
+    def __init__(self, capacity=50000, parent=None):
         super().__init__(parent)
-        self.log_entries = []  # 存储所有日志条目
+        self.capacity = capacity  # 最多保留的日志条数
+        self.entries = []  # [(文本, 级别)]，entries[0] 的序号为 base_seq
+        self.base_seq = 0
+        self.level_index = {level: [] for level in LOG_LEVELS}  # {级别: [日志序号]}
         self.current_filter = "ALL"
+
+        # 各级别的文字颜色（只创建一次）
+        color_map = {
+            "INFO": "#000000",
+            "WARNING": "#E67E22",
+            "ERROR": "#E74C3C",
+            "SUCCESS": "#2ECC71"
+        }
+        self.brushes = {level: QtGui.QBrush(QtGui.QColor(color)) for level, color in color_map.items()}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self.current_filter == "ALL":
+            return len(self.entries)
+        return len(self.level_index.get(self.current_filter, []))
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if self.current_filter == "ALL":
+            seq = self.base_seq + index.row()
+        else:
+            seq = self.level_index[self.current_filter][index.row()]
+        text, level = self.entries[seq - self.base_seq]
+
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return text
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole:
+            return self.brushes.get(level, self.brushes["INFO"])
+        return None
+
+    def append_entries(self, entries):
+        """批量追加日志 [(文本, 级别)]，超出容量时从头部整段丢弃"""
+        if not entries:
+            return
+        # 先统计新增的可见行：rowCount() 必须在修改索引之前读取，插入范围才从当前末尾开始
+        if self.current_filter == "ALL":
+            visible = len(entries)
+        else:
+            visible = sum(1 for _, level in entries if level == self.current_filter)
+
+        # 只通知新增的可见行，视图无需重建
+        if visible:
+            first = self.rowCount()
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + visible - 1)
+            self.extend_entries(entries)
+            self.endInsertRows()
+        else:
+            self.extend_entries(entries)
+
+        # 超出容量10%后再整段裁剪，列表删除的开销被均摊
+        if len(self.entries) > self.capacity + self.capacity // 10:
+            self.trim(len(self.entries) - self.capacity)
+
+    def extend_entries(self, entries):
+        """追加日志并更新级别索引（由 append_entries 在插入通知之间调用）"""
+        seq = self.base_seq + len(self.entries)
+        for offset, (_, level) in enumerate(entries):
+            self.level_index.setdefault(level, []).append(seq + offset)
+        self.entries.extend(entries)
+
+    def trim(self, count):
+        """丢弃最旧的 count 条日志"""
+        cut_seq = self.base_seq + count
+        if self.current_filter == "ALL":
+            removed = count
+        else:
+            removed = bisect_left(self.level_index.get(self.current_filter, []), cut_seq)
+
+        if removed:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, removed - 1)
+        del self.entries[:count]
+        self.base_seq = cut_seq
+        for seqs in self.level_index.values():
+            del seqs[:bisect_left(seqs, cut_seq)]
+        if removed:
+            self.endRemoveRows()
+
+    def set_filter(self, level):
+        """切换筛选级别（只切换索引列表，与日志总量无关）"""
+        self.beginResetModel()
+        self.current_filter = level
+        self.endResetModel()
+
+
+class LogWidget(QtWidgets.QListView):
+    def __init__(self, parent=None, capacity=50000):
+        super().__init__(parent)
+        self.log_model = LogModel(capacity, self)
+        self.setModel(self.log_model)
+        self.pending = deque()  # 待显示的日志（可由任意线程追加）
         self.setup_interface()
 
+        # 定时批量追加待显示的日志，避免每条日志单独刷新界面
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setInterval(100)
+        self.flush_timer.timeout.connect(self.flush_pending)
+        self.flush_timer.start()
+
     def setup_interface(self):
         """初始化日志显示界面"""
-        self.setReadOnly(True)
+        # 行高一致时视图只需计算和绘制可见行
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
         self.setStyleSheet("""
-            QTextBrowser {
+            QListView {
                 background-color: #F8F9FA;
                 border: 1px solid #CED4DA;
                 border-radius: 4px;
@@ -85,39 +282,40 @@ class LogWidget(QtWidgets.QTextBrowser):
             10
         )
 
-    def append_log(self, text, level):
-        """添加日志并立即根据筛选条件显示"""
-        self.log_entries.append({"text": text, "level": level})
-        if self.current_filter == "ALL" or level == self.current_filter:
-            self.append_colored_text(text, level)
+    def enqueue(self, text, level):
+        """登记待显示的日志（线程安全，由定时器在界面线程中统一显示）"""
+        self.pending.append((text, level))
 
-    def append_colored_text(self, text, level):
-        """实际渲染带颜色的文本"""
-        cursor = self.textCursor()
-        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+    def flush_pending(self):
+        """将积压的日志一次性追加到模型"""
+        if not self.pending:
+            return
+        entries = []
+        while self.pending:
+            entries.append(self.pending.popleft())
 
-        # 设置文本颜色格式
-        color_map = {
-            "INFO": "#000000",
-            "WARNING": "#E67E22",
-            "ERROR": "#E74C3C",
-            "SUCCESS": "#2ECC71"
-        }
-        text_format = QtGui.QTextCharFormat()
-        text_format.setForeground(QtGui.QColor(color_map.get(level, "#000000")))
-        cursor.insertText(text + "\n", text_format)
+        # 仅当用户停留在底部时自动滚动，查看历史日志时不打断
+        scroll_bar = self.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        self.log_model.append_entries(entries)
+        if at_bottom:
+            self.scrollToBottom()
 
-        # 自动滚动到底部
-        self.ensureCursorVisible()
+    def append_log(self, text, level):
+        """添加日志并立即根据筛选条件显示"""
+        self.log_model.append_entries([(text, level)])
+        self.scrollToBottom()
 
     def on_filter_changed(self, filter_text):
-        """筛选条件变化时重新渲染日志"""
-        self.current_filter = filter_text
-        self.refresh_display()
-
-    def refresh_display(self):
-        """清空当前内容并重新渲染符合条件的日志"""
-        self.clear()
-        for entry in self.log_entries:
-            if self.current_filter == "ALL" or entry["level"] == self.current_filter:
-                self.append_colored_text(entry["text"], entry["level"])
\ No newline at end of file
+        """筛选条件变化时切换显示的日志"""
+        self.log_model.set_filter(filter_text)
+        self.scrollToBottom()
+
+    def keyPressEvent(self, event):
+        """Ctrl+C 复制选中的日志行"""
+        if event.matches(QtGui.QKeySequence.StandardKey.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QtWidgets.QApplication.clipboard().setText(
+                "\n".join(self.log_model.data(self.log_model.index(row)) for row in rows))
+            return
+        super().keyPressEvent(event)
@@ -1,8 +1,10 @@
 from PySide6 import QtWidgets, QtCore, QtGui
 from DetectionMode1 import DetectionModePage1
 from DetectionMode2 import DetectionModePage2
+from DetectionMode3 import DetectionModePage3
 from LogWindow import Logger, LogWidget
 from OutputWindow import OutputWindow
+from ProfilerWindow import ProfilerPanel
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -67,7 +69,8 @@ class MainWindow(QtWidgets.QMainWindow):
         # 导航按钮
         self.nav_buttons = [
             self.create_navigation_button("    检测模式一", QtGui.QIcon("Icons/mode1.svg"), 0),
-            self.create_navigation_button("    （测试）", QtGui.QIcon("Icons/mode2.svg"), 1)
+            self.create_navigation_button("    （测试）", QtGui.QIcon("Icons/mode2.svg"), 1),
+            self.create_navigation_button("    实时检测", QtGui.QIcon("Icons/mode3.svg"), 2)
         ]
         for btn in self.nav_buttons:
             nav_layout.addWidget(btn)
@@ -78,7 +81,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.stacked_widget = QtWidgets.QStackedWidget()
         self.pages = [
             DetectionModePage1(self.logger),
-            DetectionModePage2(self.logger)
+            DetectionModePage2(self.logger),
+            DetectionModePage3(self.logger)
         ]
         for page in self.pages:
             self.stacked_widget.addWidget(page)
@@ -102,10 +106,17 @@ class MainWindow(QtWidgets.QMainWindow):
         # 窗口布局设置
         self.splitDockWidget(log_dock, output_dock, QtCore.Qt.Orientation.Horizontal)
 
+        # 性能统计面板（与日志区域同一位置，以标签页切换）
+        self.profiler_panel = ProfilerPanel(self.logger)
+        profiler_dock = QtWidgets.QDockWidget("性能统计", self)
+        profiler_dock.setWidget(self.profiler_panel)
+        self.tabifyDockWidget(log_dock, profiler_dock)
+        log_dock.raise_()
+
         # 传递输出窗口引用
-        for page in self.pages:
+        for index, page in enumerate(self.pages):
             if hasattr(page, 'set_output_window'):
-                page.set_output_window(self.output_window)
+                page.set_output_window(self.output_window, index)
 
         # 初始化选中状态
         self.nav_buttons[0].setChecked(True)
@@ -164,6 +175,19 @@ class MainWindow(QtWidgets.QMainWindow):
         self.nav_container.updateGeometry()
         self.update()
 
+    def closeEvent(self, event):
+        """关闭窗口前停止实时检测，取消并等待所有检测任务"""
+        for page in self.pages:
+            if hasattr(page, 'stop_inspection'):
+                page.stop_inspection()
+            if hasattr(page, 'engine'):
+                page.engine.cancel_all()
+        for page in self.pages:
+            if hasattr(page, 'engine'):
+                page.engine.wait_for_done()
+        self.logger.close()
+        super().closeEvent(event)
+
     def switch_tab(self, index):
         """切换功能页面"""
         self.stacked_widget.setCurrentIndex(index)
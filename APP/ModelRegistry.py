@@ -0,0 +1,147 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+from InferenceBackend import load_model, resolve_model_path
+
+try:
+    import psutil
+except ImportError:  # 未安装 psutil 时仅按数量淘汰
+    psutil = None
+
+
+class SharedModel:
+    """
+    共享模型代理：多个页面/线程共用同一份权重时串行化推理调用，
+    其余属性（names、task 等）直接转发给内部的 YOLO 模型
+    """
+
+    def __init__(self, model, path, registry_key=None):
+        self.model = model
+        self.path = path
+        self.registry_key = registry_key  # 注册表中的键（检测结果缓存以此区分权重）
+        self.lock = threading.RLock()
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            return self.model(*args, **kwargs)
+
+    def predict(self, *args, **kwargs):
+        with self.lock:
+            return self.model.predict(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class ModelRegistry:
+    """
+    YOLO 模型注册表
+    - 以 (绝对路径, 文件修改时间, 推理线程数) 为键，同一权重只加载一次，文件被覆盖后自动重新加载
+    - 按首选后端（torch / onnx / openvino）优先加载 .pt 旁边已导出的模型
+    - 首次加载时用空白图像预热，避免第一次检测过慢
+    - 加载和预热在注册表锁之外进行，同一模型的并发请求等待同一次加载，获取其他已缓存模型不受影响
+    - 超过数量上限时按最近最少使用淘汰；可用内存不足时逐个淘汰最久未使用的模型，内存恢复后停止
+    """
+
+    def __init__(self, max_models=4, min_free_memory=512 * 1024 * 1024, warmup_imgsz=640, backend="torch", threads=0):
+        self.max_models = max_models
+        self.min_free_memory = min_free_memory  # 低于该可用内存（字节）时淘汰旧模型
+        self.warmup_imgsz = warmup_imgsz
+        self.backend = backend  # 默认首选后端
+        self.threads = threads  # 默认 CPU 推理线程数（0 表示自动）
+        self.models = OrderedDict()  # {(path, mtime, threads): SharedModel}
+        self.loading = {}  # 正在加载的模型 {(path, mtime, threads): Future}
+        self.lock = threading.Lock()
+
+    def get(self, path, warmup=True, backend=None, threads=None):
+        """
+        获取模型，未缓存时加载并预热
+        :param backend: 首选后端，为空时使用注册表默认值
+        :param threads: CPU 推理线程数，为空时使用注册表默认值
+        """
+        path = resolve_model_path(os.path.abspath(path), backend or self.backend)
+        threads = self.threads if threads is None else threads
+        key = (path, os.path.getmtime(path), threads)
+
+        with self.lock:
+            model = self.models.get(key)
+            if model is not None:
+                self.models.move_to_end(key)
+                return model
+
+            future = self.loading.get(key)
+            if future is None:
+                # 由当前线程负责加载，其他线程请求同一模型时等待该 Future
+                future = self.loading[key] = Future()
+                loader = True
+
+                # 同一路径的旧版本权重已失效
+                for stale_key in [k for k in self.models if k[0] == path]:
+                    del self.models[stale_key]
+                self.evict(reserve=len(self.loading))
+            else:
+                loader = False
+
+        if not loader:
+            return future.result()
+
+        # 加载和预热耗时较长，在锁外进行
+        try:
+            model = SharedModel(load_model(path, threads), path, key)
+            if warmup:
+                self.warmup(model)
+        except BaseException as e:
+            with self.lock:
+                del self.loading[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.loading[key]
+            self.models[key] = model
+        future.set_result(model)
+        return model
+
+    def warmup(self, model):
+        """用空白图像执行一次推理，完成权重融合和内存分配"""
+        dummy = np.zeros((self.warmup_imgsz, self.warmup_imgsz, 3), dtype=np.uint8)
+        model.predict(dummy, imgsz=self.warmup_imgsz, verbose=False)
+
+    def memory_tight(self):
+        if psutil is None:
+            return False
+        return psutil.virtual_memory().available < self.min_free_memory
+
+    def evict(self, reserve=0):
+        """
+        按最近最少使用淘汰模型（调用方持有注册表锁）
+        :param reserve: 为正在加载的模型预留的位置数量
+        """
+        evicted = False
+        while self.models and len(self.models) + reserve > self.max_models:
+            self.models.popitem(last=False)
+            evicted = True
+        if evicted:
+            gc.collect()
+
+        # 内存不足时逐个淘汰：页面仍持有的模型淘汰后不会释放内存，不能一次清空注册表
+        while self.models and self.memory_tight():
+            self.models.popitem(last=False)
+            gc.collect()
+
+    def clear(self):
+        with self.lock:
+            self.models.clear()
+        gc.collect()
+
+
+# 全局共享的模型注册表
+model_registry = ModelRegistry()
+
+
+def get_model(path, warmup=True, backend=None, threads=None):
+    """从全局注册表获取模型"""
+    return model_registry.get(path, warmup, backend, threads)
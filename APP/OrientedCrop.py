@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+from HSVBandClassifier import principal_axis
+
+STRIP_SIZE = (256, 64)  # 水平条带尺寸（宽, 高），所有电阻统一尺寸便于批量色环检测
+AXIS_SIZE = 96  # 估计主轴时先把裁剪图像缩小到该边长以内
+
+
+def strip_transform(center, direction, half_length, half_width, size=STRIP_SIZE, padding=0.1):
+    """
+    条带坐标 -> 图像坐标的仿射矩阵：电阻主轴对齐条带水平中心线，等比例缩放（不拉伸色环）
+    :param padding: 电阻两端和两侧保留的边距比例
+    """
+    width, height = size
+    scale = max(2 * half_length * (1 + padding) / width, 2 * half_width * (1 + padding) / height)
+    dx, dy = direction * scale
+    nx, ny = -dy, dx  # 法向量（条带的竖直方向）
+    cx, cy = center
+    return np.array([
+        [dx, nx, cx - dx * width / 2 - nx * height / 2],
+        [dy, ny, cy - dy * width / 2 - ny * height / 2]
+    ], dtype=np.float64)
+
+
+def warp_strip(image, center, direction, half_length, half_width, size=STRIP_SIZE, padding=0.1):
+    """按主轴把电阻旋转并缩放到水平条带（超出图像的部分复制边缘像素）"""
+    matrix = strip_transform(center, direction, half_length, half_width, size, padding)
+    return cv2.warpAffine(image, matrix, size, flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def oriented_strip(crop_img, size=STRIP_SIZE, padding=0.1):
+    """
+    轴对齐裁剪图像 -> 水平条带：主轴由与背景颜色差异明显的像素的二阶矩（主成分）估计，
+    倾斜安装的电阻不再只占裁剪图像的一条对角线
+    """
+    scale = min(1.0, AXIS_SIZE / max(crop_img.shape[:2]))
+    small = crop_img if scale == 1.0 else cv2.resize(crop_img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    center, direction, half_length, half_width = principal_axis(small)
+    center, half_length, half_width = (center + 0.5) / scale - 0.5, half_length / scale, half_width / scale
+    return warp_strip(crop_img, center, direction, half_length, half_width, size, padding)
+
+
+def obb_strip(image, xywhr, size=STRIP_SIZE, padding=0.1):
+    """
+    按旋转框（OBB 模型输出的 中心x, 中心y, 宽, 高, 弧度）直接从原图裁剪水平条带
+    """
+    cx, cy, w, h, angle = (float(value) for value in xywhr)
+    if w < h:
+        w, h, angle = h, w, angle + np.pi / 2  # 以长边为主轴
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    if direction[0] < 0 or (direction[0] == 0 and direction[1] < 0):
+        direction = -direction  # 与 principal_axis 一致，主轴指向右（竖直时向下）
+    return warp_strip(image, np.array([cx, cy]), direction, w / 2, h / 2, size, padding)
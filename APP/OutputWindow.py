@@ -1,6 +1,113 @@
 from pathlib import Path
-from PySide6 import QtWidgets, QtGui
+from PySide6 import QtWidgets, QtGui, QtCore
+import numpy as np
 import csv
+from ResultStore import ResultStore, CSV_HEADERS as RESULT_HEADERS, DEFAULT_STORE_PATH, next_indexed_path
+from Profiler import profiler
+
+
+class ResultTableModel(QtCore.QAbstractTableModel):
+    """
+    检测结果表格模型（按列存储）：
+    坐标和置信度保存在预分配的数组中，类名和阻值文本保存在列表中，
+    显示文本在视图请求时才格式化
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.count = 0
+        self.coords = np.zeros((64, 2), dtype=np.float64)
+        self.confidences = np.zeros(64, dtype=np.float64)
+        self.classes = []
+        self.texts = []
+        self.details = []  # 检测流程输出的完整结果（色环、阻值、比对信息），可为空
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(RESULT_HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal:
+            return RESULT_HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        return self.cell_text(index.row(), index.column())
+
+    def cell_text(self, row, column):
+        """单元格显示文本"""
+        if column == 0:
+            return str(row + 1)
+        if column == 1:
+            return f"({self.coords[row, 0]:.1f}, {self.coords[row, 1]:.1f})"
+        if column == 2:
+            return self.classes[row]
+        if column == 3:
+            return f"{self.confidences[row]:.2f}"
+        return self.texts[row]
+
+    def row_values(self, row):
+        """整行显示文本（用于保存CSV）"""
+        return [self.cell_text(row, column) for column in range(len(RESULT_HEADERS))]
+
+    def reserve(self, size):
+        """数组容量不足时按倍数扩容"""
+        capacity = len(self.confidences)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        coords = np.zeros((capacity, 2), dtype=np.float64)
+        coords[:self.count] = self.coords[:self.count]
+        confidences = np.zeros(capacity, dtype=np.float64)
+        confidences[:self.count] = self.confidences[:self.count]
+        self.coords, self.confidences = coords, confidences
+
+    def append_rows(self, rows):
+        """
+        批量追加结果，只通知新增的行
+        :param rows: [(坐标, 类名, 置信度, 阻值文本[, 完整结果]), ...]
+        """
+        if not rows:
+            return
+        first = self.count
+        last = first + len(rows)
+        self.reserve(last)
+        self.beginInsertRows(QtCore.QModelIndex(), first, last - 1)
+        for i, (coords, class_name, confidence, text, *details) in enumerate(rows, start=first):
+            self.coords[i] = (float(coords[0]), float(coords[1]))
+            self.confidences[i] = float(confidence)
+            self.classes.append(class_name)
+            self.texts.append(text)
+            self.details.append(details[0] if details else None)
+        self.count = last
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.count = 0
+        self.classes.clear()
+        self.texts.clear()
+        self.details.clear()
+        self.endResetModel()
+
+    def to_records(self):
+        """转换为结果库记录"""
+        records = []
+        for row in range(self.count):
+            record = dict(self.details[row] or {})
+            record.update({
+                "coords": (float(self.coords[row, 0]), float(self.coords[row, 1])),
+                "class": self.classes[row],
+                "confidence": float(self.confidences[row]),
+                "text": self.texts[row]
+            })
+            records.append(record)
+        return records
 
 
 class OutputWindow(QtWidgets.QWidget):
@@ -8,13 +115,17 @@ class OutputWindow(QtWidgets.QWidget):
         super().__init__()
         self.logger = logger
         self.csv_dir = Path("DetectResult")
-        self.mode_caches = {}  # 模式缓存字典 {mode_id: [results]}
+        self.store_path = DEFAULT_STORE_PATH
+        self.store = None  # 结果库（首次保存时打开）
+        self.last_run_ids = {}  # 各模式最近一次记录的运行ID {mode_id: run_id}
+        self.mode_caches = {}  # 模式缓存字典 {mode_id: ResultTableModel}
         self.current_mode = 0  # 当前显示的模式
         self.selected_rows = set()
+        self.selection_model = None  # 已连接信号的表格选择模型
 
         self.initialize_components()
         self.create_result_directory()
-        self.table.itemSelectionChanged.connect(self.handle_selection_changed)
+        self.switch_mode_cache(self.current_mode)
 
     def initialize_components(self):
         """初始化界面组件"""
@@ -35,9 +146,8 @@ class OutputWindow(QtWidgets.QWidget):
         main_layout.setSpacing(0)
 
         # 结果表格初始化
-        self.table = QtWidgets.QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["编号", "坐标", "类名", "置信度", "电阻阻值"])
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(ResultTableModel(self))
 
         # 表格样式设置
         for col in range(4):
@@ -69,7 +179,7 @@ class OutputWindow(QtWidgets.QWidget):
 
         # 表格样式
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #E0E0E0;
                 font-size: 12px;
             }
@@ -78,7 +188,7 @@ class OutputWindow(QtWidgets.QWidget):
                 padding: 4px;
                 border: 1px solid #E0E0E0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 border: 1px solid #E0E0E0;
                 padding: 2px 4px;
             }
@@ -88,13 +198,21 @@ class OutputWindow(QtWidgets.QWidget):
         self.setup_floating_button()
         main_layout.addWidget(self.table)
 
+        # 检测进度条（仅在检测任务执行时显示）
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setFixedHeight(14)
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setFormat("检测进度 %v/%m")
+        self.progress_bar.hide()
+        main_layout.addWidget(self.progress_bar)
+
     def setup_floating_button(self):
         """初始化清空结果的悬浮按钮"""
         self.btn_float = QtWidgets.QPushButton(self.table)
         self.btn_float.setIcon(QtGui.QIcon("Icons/clear.svg"))
         self.btn_float.setFixedSize(24, 24)
         self.btn_float.setToolTip("清空结果")
-        self.btn_float.clicked.connect(self.clear_results)
+        self.btn_float.clicked.connect(lambda: self.clear_results())
 
         # 按钮样式
         self.btn_float.setStyleSheet("""
@@ -108,6 +226,13 @@ class OutputWindow(QtWidgets.QWidget):
             }
         """)
 
+        # 导出CSV按钮
+        self.btn_export = QtWidgets.QPushButton("CSV", self.table)
+        self.btn_export.setFixedSize(32, 24)
+        self.btn_export.setToolTip("导出当前结果为CSV")
+        self.btn_export.clicked.connect(self.save_to_csv)
+        self.btn_export.setStyleSheet(self.btn_float.styleSheet() + "QPushButton { font-size: 10px; }")
+
         # 初始定位
         self.position_floating_button()
         self.table.horizontalHeader().geometriesChanged.connect(self.position_floating_button)
@@ -119,42 +244,74 @@ class OutputWindow(QtWidgets.QWidget):
         x_pos = 4
         y_pos = (header_height - self.btn_float.height()) // 2
         self.btn_float.move(x_pos, y_pos)
+        self.btn_export.move(x_pos + self.btn_float.width() + 4, y_pos)
+
+    def set_progress(self, done, total):
+        """更新检测进度，完成后自动隐藏进度条"""
+        if total <= 0 or done >= total:
+            self.progress_bar.hide()
+            return
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.show()
 
     def handle_selection_changed(self):
         """处理表格行选择变化事件"""
-        self.selected_rows = {item.row() for item in self.table.selectedItems()}
+        self.selected_rows = {index.row() for index in self.table.selectionModel().selectedIndexes()}
         self.trigger_redraw()
-        selected_ids = self.get_selected_ids()
-        self.logger.log(f"选中物体编号: {', '.join(map(str, selected_ids))}", "INFO")
+        if self.logger.enabled("INFO"):
+            selected_ids = self.get_selected_ids()
+            self.logger.log(f"选中物体编号: {', '.join(map(str, selected_ids))}", "INFO")
 
     def trigger_redraw(self):
-        """触发检测结果重新绘制"""
+        """触发当前页面检测结果重新绘制（表格只对应当前页面，隐藏页面无需重绘）"""
         if hasattr(self, 'main_window'):
-            for page in self.main_window.pages:
+            page = self.main_window.stacked_widget.currentWidget()
+            with profiler.span("output.redraw"):
                 page.show_image(page.label_result, page.base_result_image)
 
-    def switch_mode_cache(self, mode_id):
-        """切换模式缓存"""
-        self.current_mode = mode_id
+    def current_model(self):
+        """当前模式的结果模型"""
+        return self.mode_model(self.current_mode)
+
+    def mode_model(self, mode_id=None):
+        """
+        指定模式的结果模型（不存在时创建）
+        :param mode_id: 模式ID，为 None 时使用当前显示的模式
+        """
+        if mode_id is None:
+            mode_id = self.current_mode
         if mode_id not in self.mode_caches:
-            self.mode_caches[mode_id] = []
-        self.refresh_table()
+            self.mode_caches[mode_id] = ResultTableModel(self)
+        return self.mode_caches[mode_id]
 
-    def refresh_table(self):
-        """刷新表格显示当前模式数据"""
-        self.table.setRowCount(0)
-        self.current_id = 1
+    def switch_mode_cache(self, mode_id):
+        """切换模式缓存（直接切换表格模型，无需重建行）"""
+        self.current_mode = mode_id
+        model = self.current_model()
+        if self.table.model() is model:
+            return
+        self.selected_rows = set()
 
-        for item in self.mode_caches.get(self.current_mode, []):
-            self.add_row_to_table(item)
+        # 更换模型后表格（及表头）会新建选择模型且不释放旧的：断开并释放旧的选择模型，只连接新的一次
+        if self.selection_model is not None:
+            self.selection_model.selectionChanged.disconnect(self.handle_selection_changed)
+        self.table.setModel(model)
+        self.selection_model = self.table.selectionModel()
+        for owner in (self.table, self.table.horizontalHeader(), self.table.verticalHeader()):
+            for selection_model in owner.findChildren(QtCore.QItemSelectionModel,
+                                                      options=QtCore.Qt.FindChildOption.FindDirectChildrenOnly):
+                if selection_model is not self.selection_model:
+                    selection_model.deleteLater()
+        self.selection_model.selectionChanged.connect(self.handle_selection_changed)
+
+    def row_count(self, mode_id=None):
+        """指定模式（默认当前模式）的结果数量"""
+        return self.mode_model(mode_id).rowCount()
 
     def get_selected_ids(self):
         """获取选中的物体编号列表（从1开始）"""
-        return [
-            int(self.table.item(row, 0).text())
-            for row in self.selected_rows
-            if row < self.table.rowCount()
-        ]
+        return [row + 1 for row in sorted(self.selected_rows) if row < self.row_count()]
 
     def create_result_directory(self):
         """创建结果保存目录"""
@@ -166,32 +323,48 @@ class OutputWindow(QtWidgets.QWidget):
 
     def get_next_csvfile(self):
         """获取下一个可用的CSV文件名"""
-        index = 1
-        while True:
-            csv_path = self.csv_dir / f"DetectResult{index}.csv"
-            if not csv_path.exists():
-                return csv_path
-            index += 1
+        return next_indexed_path(self.csv_dir, "DetectResult", ".csv")
+
+    def save_results(self, image_path=None, image_key=None, model=None, board=None, mode_id=None):
+        """
+        将指定模式的结果记录到结果库
+        :param image_path: 图像路径（默认以文件名作为电路板名称）
+        :param image_key: 图像内容哈希
+        :param model: 模型名称
+        :param mode_id: 结果所属模式，为 None 时使用当前显示的模式
+        :return: 运行ID，失败时返回 None
+        """
+        if mode_id is None:
+            mode_id = self.current_mode
+        try:
+            with profiler.span("output.save_results"):
+                if self.store is None:
+                    self.store = ResultStore(self.store_path)
+                run_id = self.store.add_run(self.mode_model(mode_id).to_records(), board=board, image_path=image_path,
+                                            image_hash=image_key, mode=mode_id, model=model)
+            self.last_run_ids[mode_id] = run_id
+            if self.logger:
+                self.logger.log(f"检测结果已记录到结果库（运行ID: {run_id}）", "SUCCESS")
+            return run_id
+        except Exception as e:
+            if self.logger:
+                self.logger.log(f"记录检测结果失败: {str(e)}", "ERROR")
+            return None
 
     def save_to_csv(self):
         """保存表格数据到CSV文件"""
         try:
             csv_file = self.get_next_csvfile()
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            model = self.current_model()
+            with profiler.span("output.save_csv"), open(csv_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
 
                 # 写入标题行
-                headers = [self.table.horizontalHeaderItem(i).text()
-                           for i in range(self.table.columnCount())]
-                writer.writerow(headers)
+                writer.writerow(RESULT_HEADERS)
 
                 # 写入数据行
-                for row in range(self.table.rowCount()):
-                    row_data = [
-                        self.table.item(row, col).text()
-                        for col in range(self.table.columnCount())
-                    ]
-                    writer.writerow(row_data)
+                for row in range(model.rowCount()):
+                    writer.writerow(model.row_values(row))
 
             if self.logger:
                 self.logger.log(f"检测结果已保存到: {csv_file.name}", "SUCCESS")
@@ -199,36 +372,29 @@ class OutputWindow(QtWidgets.QWidget):
             if self.logger:
                 self.logger.log(f"保存CSV失败: {str(e)}", "ERROR")
 
-    def add_detection_result(self, coords, class_name, confidence, tht_value="测试"):
-        """添加检测结果到当前模式缓存"""
-        if self.current_mode not in self.mode_caches:
-            self.mode_caches[self.current_mode] = []
-
-        self.mode_caches[self.current_mode].append({
-            "coords": coords,
-            "class": class_name,
-            "confidence": confidence,
-            "text": tht_value
-        })
-
-        self.refresh_table()
-
-    def add_row_to_table(self, data):
-        """向表格添加单行数据"""
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(str(self.current_id)))
-        self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(f"({data['coords'][0]:.1f}, {data['coords'][1]:.1f})"))
-        self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(data['class']))
-        self.table.setItem(row, 3, QtWidgets.QTableWidgetItem(f"{data['confidence']:.2f}"))
-        self.table.setItem(row, 4, QtWidgets.QTableWidgetItem(data['text']))
-        self.current_id += 1
-
-    def clear_results(self):
-        """清空当前模式检测结果"""
-        if self.current_mode in self.mode_caches:
-            self.mode_caches[self.current_mode].clear()
-        self.table.setRowCount(0)
-        self.current_id = 1
+    def add_detection_result(self, coords, class_name, confidence, tht_value="测试", details=None, mode_id=None):
+        """
+        添加检测结果到模式缓存（增量插入一行，details 为检测流程输出的完整结果）
+        :param mode_id: 结果所属模式，为 None 时使用当前显示的模式
+        """
+        with profiler.span("output.add_rows"):
+            self.mode_model(mode_id).append_rows([(coords, class_name, confidence, tht_value, details)])
+
+    def add_detection_results(self, results, mode_id=None):
+        """
+        批量添加检测结果
+        :param results: [(坐标, 类名, 置信度, 阻值文本[, 完整结果]), ...]
+        :param mode_id: 结果所属模式，为 None 时使用当前显示的模式
+        """
+        with profiler.span("output.add_rows"):
+            self.mode_model(mode_id).append_rows(list(results))
+
+    def clear_results(self, mode_id=None):
+        """清空指定模式（默认当前模式）的检测结果"""
+        if mode_id is None:
+            mode_id = self.current_mode
+        self.mode_model(mode_id).clear()
+        if mode_id == self.current_mode:
+            self.selected_rows = set()
         if self.logger:
-            self.logger.log(f"已清空模式{self.current_mode}的检测结果", "WARNING")
\ No newline at end of file
+            self.logger.log(f"已清空模式{mode_id}的检测结果", "WARNING")
@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+import numpy as np
+
+# 耗时分布的桶上界（毫秒），按对数间隔划分
+HISTOGRAM_BOUNDS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class NullSpan:
+    """未启用计时时返回的空计时段，不做任何记录"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """一个计时段，退出时写入 Profiler"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class StageStats:
+    """单个阶段的累计统计：次数、总耗时、分布桶和最近的样本（用于分位数）"""
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect_right(HISTOGRAM_BOUNDS, ms)] += 1
+        self.samples.append(ms)
+
+
+class Profiler:
+    """
+    轻量级分阶段计时：
+    with profiler.span("pipeline.detect"): ...
+    未启用时 span() 直接返回空对象，启用后记录每个阶段的耗时分布，
+    并保留最近的计时事件用于导出 Chrome Trace（chrome://tracing / Perfetto）
+    """
+
+    def __init__(self, enabled=False, max_events=100000, max_samples=2000):
+        self.enabled = enabled
+        self.max_samples = max_samples  # 每个阶段用于计算分位数的最近样本数
+        self.events = deque(maxlen=max_events)  # [(名称, 开始ns, 结束ns, 线程ID)]
+        self.stages = {}  # {名称: StageStats}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()  # Trace 时间零点
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    def span(self, name):
+        """返回计时段上下文管理器（未启用时开销仅为一次属性判断）"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name, start_ns, end_ns):
+        """记录一次计时（也可由调用方直接传入起止时间）"""
+        ms = (end_ns - start_ns) / 1e6
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageStats(self.max_samples)
+            stage.add(ms)
+            self.events.append((name, start_ns, end_ns, threading.get_ident()))
+
+    def stats(self):
+        """
+        各阶段统计（毫秒）
+        :return: {名称: {"count", "mean", "p50", "p90", "p99", "max", "histogram"}}
+        """
+        with self.lock:
+            snapshot = {name: (stage.count, stage.total_ms, stage.max_ms, list(stage.buckets), list(stage.samples))
+                        for name, stage in self.stages.items()}
+
+        result = {}
+        for name, (count, total_ms, max_ms, buckets, samples) in sorted(snapshot.items()):
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99]) if samples else (0.0, 0.0, 0.0)
+            result[name] = {
+                "count": count,
+                "mean": total_ms / count if count else 0.0,
+                "p50": float(p50),
+                "p90": float(p90),
+                "p99": float(p99),
+                "max": max_ms,
+                "histogram": buckets  # 与 HISTOGRAM_BOUNDS 对应，最后一个桶为超出上界的部分
+            }
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.stages.clear()
+            self.origin = time.perf_counter_ns()
+
+    def export_chrome_trace(self, path):
+        """导出为 Chrome Trace 事件格式（JSON），可在 chrome://tracing 或 Perfetto 中查看"""
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        trace = [{
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,  # 微秒
+            "dur": (end - start) / 1000,
+            "pid": pid,
+            "tid": tid
+        } for name, start, end, tid in events]
+        # 线程名称元数据
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        trace.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": names[tid]}}
+                     for tid in {event[3] for event in events} if tid in names)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+
+# 全局共享的计时器（默认关闭，可在性能统计面板中开启）
+profiler = Profiler()
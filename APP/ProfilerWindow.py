@@ -0,0 +1,98 @@
+from PySide6 import QtWidgets, QtCore
+from Profiler import profiler, HISTOGRAM_BOUNDS
+from ResultStore import next_indexed_path
+
+SPARK_CHARS = " ▁▂▃▄▅▆▇█"
+
+
+def sparkline(buckets):
+    """将分布桶计数转换为一行字符柱状图"""
+    peak = max(buckets) if buckets else 0
+    if not peak:
+        return ""
+    return "".join(SPARK_CHARS[0 if not count else max(1, round(count / peak * 8))] for count in buckets)
+
+
+class ProfilerPanel(QtWidgets.QWidget):
+    """性能统计面板：显示各阶段耗时统计与分布，可导出 Chrome Trace"""
+
+    HEADERS = ["阶段", "次数", "平均(ms)", "p50", "p90", "p99", "最大", "分布"]
+
+    def __init__(self, logger=None, parent=None):
+        super().__init__(parent)
+        self.logger = logger
+        self.initialize_components()
+
+        # 定时刷新统计（面板不可见或未启用计时时跳过）
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+
+    def initialize_components(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        toolbar = QtWidgets.QHBoxLayout()
+        self.enable_check = QtWidgets.QCheckBox("启用计时")
+        self.enable_check.setChecked(profiler.enabled)
+        self.enable_check.toggled.connect(self.toggle_enabled)
+        self.btn_clear = QtWidgets.QPushButton("清空")
+        self.btn_clear.clicked.connect(self.clear)
+        self.btn_export = QtWidgets.QPushButton("导出Trace")
+        self.btn_export.clicked.connect(self.export_trace)
+        toolbar.addWidget(self.enable_check)
+        toolbar.addStretch()
+        toolbar.addWidget(self.btn_clear)
+        toolbar.addWidget(self.btn_export)
+        layout.addLayout(toolbar)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        self.table.setStyleSheet("QTableWidget { font-family: Consolas, Monaco, monospace; font-size: 12px; }")
+        bounds = ", ".join(f"{bound:g}" for bound in HISTOGRAM_BOUNDS)
+        self.table.horizontalHeaderItem(len(self.HEADERS) - 1).setToolTip(f"耗时分布，分桶上界(ms): {bounds}")
+        layout.addWidget(self.table)
+
+    def toggle_enabled(self, checked):
+        profiler.set_enabled(checked)
+        if self.logger:
+            self.logger.log("已开启分阶段计时" if checked else "已关闭分阶段计时", "INFO")
+
+    def refresh(self):
+        """刷新统计表格"""
+        if not self.isVisible() or not profiler.enabled:
+            return
+        stats = profiler.stats()
+        self.table.setRowCount(len(stats))
+        for row, (name, item) in enumerate(stats.items()):
+            values = [name, str(item["count"]), f"{item['mean']:.2f}", f"{item['p50']:.2f}",
+                      f"{item['p90']:.2f}", f"{item['p99']:.2f}", f"{item['max']:.2f}", sparkline(item["histogram"])]
+            for column, value in enumerate(values):
+                cell = self.table.item(row, column)
+                if cell is None:
+                    cell = QtWidgets.QTableWidgetItem()
+                    self.table.setItem(row, column, cell)
+                cell.setText(value)
+
+    def clear(self):
+        profiler.clear()
+        self.table.setRowCount(0)
+
+    def export_trace(self):
+        """导出 Chrome Trace JSON"""
+        default_path = str(next_indexed_path("Log", "Trace", ".json"))
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "导出Trace", default_path, "Trace文件 (*.json)")
+        if not path:
+            return
+        try:
+            profiler.export_chrome_trace(path)
+            if self.logger:
+                self.logger.log(f"计时数据已导出到: {path}（可在 chrome://tracing 中查看）", "SUCCESS")
+        except Exception as e:
+            if self.logger:
+                self.logger.log(f"导出Trace失败: {str(e)}", "ERROR")
+            QtWidgets.QMessageBox.warning(self, "导出失败", f"导出Trace失败: {str(e)}")
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import time
+import cv2
+import onnx
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                      quantize_static)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+from InferenceBackend import OnnxModel, PREPROCESS_VERSION, export_model, letterbox
+from InspectionPipeline import InspectionPipeline, ConsoleLogger, COLOR_MAP
+from AccuracyBenchmark import AccuracyStats, MISSING, STAGES, evaluate_image, find_samples
+from AnnotationStore import annotation_store
+from ModelRegistry import get_model
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile
+}
+
+
+class CropCalibrationReader(CalibrationDataReader):
+    """
+    逐张提供色环裁剪图像作为校准数据，预处理与运行时批量色环检测（predict_batch）一致：
+    先按步长填充为矩形，再由 FP32 模型按推理时的方式转换为输入张量
+    """
+
+    def __init__(self, crops, model, imgsz=640):
+        self.crops = crops
+        self.model = model  # FP32 OnnxModel
+        self.imgsz = imgsz
+        self.index = 0
+
+    def get_next(self):
+        if self.index >= len(self.crops):
+            return None
+        crop = self.crops[self.index]
+        self.index += 1
+        _, batch = self.model.prepare([letterbox(crop, self.imgsz, stride=self.model.stride)], self.imgsz)
+        return {self.model.input_name: batch}
+
+    def rewind(self):
+        self.index = 0
+
+
+def load_crops(crop_folder, limit=None):
+    """读取裁剪图像文件夹（如 CropResult）"""
+    crops = []
+    if not crop_folder or not os.path.isdir(crop_folder):
+        return crops
+    for name in sorted(os.listdir(crop_folder)):
+        if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        crop = cv2.imread(os.path.join(crop_folder, name))
+        if crop is not None:
+            crops.append(crop)
+        if limit and len(crops) >= limit:
+            break
+    return crops
+
+
+def crops_from_boards(model, image_paths, conf=0.05, limit=None):
+    """裁剪图像不足时，用电阻定位模型从电路板图像中裁剪电阻作为校准数据"""
+    pipeline = InspectionPipeline(model, None, conf=conf, use_cache=False)
+    crops = []
+    for image_path in image_paths:
+        image = cv2.imread(image_path)
+        if image is None:
+            continue
+        crops.extend(crop[4] for crop in pipeline.crop_resistors(image, pipeline.detect_board(image)))
+        if limit and len(crops) >= limit:
+            break
+    return crops[:limit] if limit else crops
+
+
+def quantize_model(onnx_path, crops, output_path=None, imgsz=640, method="minmax", per_channel=True):
+    """
+    训练后静态量化（QDQ 格式，激活 UInt8 / 权重 Int8），用裁剪图像校准
+    :param onnx_path: FP32 ONNX 模型路径
+    :param crops: 校准用的色环裁剪图像
+    :return: INT8 模型路径
+    """
+    output_path = output_path or f"{os.path.splitext(onnx_path)[0]}_int8.onnx"
+    prepared_path = f"{os.path.splitext(output_path)[0]}_prep.onnx"
+    reader = CropCalibrationReader(crops, OnnxModel(onnx_path), imgsz)
+
+    # 先做形状推断和图优化，量化结果更稳定（动态尺寸模型无法做符号形状推断）
+    quant_pre_process(onnx_path, prepared_path, skip_symbolic_shape=True)
+    try:
+        quantize_static(
+            prepared_path, output_path, reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CALIBRATION_METHODS[method]
+        )
+    finally:
+        if os.path.exists(prepared_path):
+            os.remove(prepared_path)
+
+    # 保留导出时写入的模型信息（类别名称、步长等），OnnxModel 依赖这些信息
+    source = onnx.load(onnx_path, load_external_data=False)
+    quantized = onnx.load(output_path)
+    onnx.helper.set_model_props(quantized, {prop.key: prop.value for prop in source.metadata_props})
+    onnx.save(quantized, output_path)
+    return output_path
+
+
+def evaluate_tht_model(model, tht_model, samples, conf=0.05, imgsz=640, batch_size=16):
+    """
+    在带标注配置的电路板图像上评估色环模型
+    :return: (准确率统计, 色环检测阶段平均耗时毫秒)
+    """
+    pipeline = InspectionPipeline(model, tht_model, ConsoleLogger(), conf=conf, tht_batch_mode=batch_size > 1,
+                                  tht_batch_size=max(1, batch_size), tht_imgsz=imgsz)
+    stats = AccuracyStats(list(COLOR_MAP.values()) + [MISSING])
+    timings = {stage: [] for stage in STAGES}
+    for image_path, config_path in samples:
+        image = cv2.imread(image_path)
+        if image is not None:
+            evaluate_image(pipeline, image, annotation_store.expected_colors(config_path) or {}, stats, timings)
+    bands_ms = 1000 * sum(timings["bands"]) / max(len(timings["bands"]), 1)
+    return stats.summary(), bands_ms
+
+
+def quantize_and_validate(tht_model_path, model_path, image_folder, config_dir="AnnotationConfig",
+                          crop_folder="CropResult", max_drop=0.01, metric="band_accuracy",
+                          calib_size=200, imgsz=640, conf=0.05, method="minmax"):
+    """
+    量化色环模型并在标注数据上与 FP32 模型对比，
+    准确率下降不超过 max_drop 时标记为可用，运行时 onnx 后端才会选择 INT8 模型
+    :param tht_model_path: 色环模型路径（.pt 时先导出 ONNX）
+    :param model_path: 电阻定位模型路径（用于在电路板图像上评估）
+    :param image_folder: 电路板图像文件夹
+    :param crop_folder: 校准用裁剪图像文件夹，不足时从电路板图像裁剪
+    :param max_drop: 允许的最大准确率下降（绝对值）
+    :param metric: 比较的指标（band_accuracy / resistor_accuracy / resistance_accuracy）
+    :param calib_size: 校准图像数量上限
+    :return: 校验记录
+    """
+    onnx_path = tht_model_path
+    if tht_model_path.endswith(".pt"):
+        onnx_path = os.path.splitext(tht_model_path)[0] + ".onnx"
+        if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(tht_model_path):
+            onnx_path = str(export_model(tht_model_path, "onnx", imgsz, dynamic=True))
+
+    samples = find_samples(image_folder, config_dir)
+    if not samples:
+        print(f"警告: 在文件夹 {image_folder} 中未找到带标注配置的图像，无法校验量化模型")
+        return None
+
+    model = get_model(model_path)
+    crops = load_crops(crop_folder, calib_size)
+    if len(crops) < calib_size:
+        crops += crops_from_boards(model, [path for path, _ in samples], conf, calib_size - len(crops))
+    if not crops:
+        print("警告: 没有可用于校准的裁剪图像")
+        return None
+    print(f"校准图像数量: {len(crops)}")
+
+    start = time.perf_counter()
+    int8_path = quantize_model(onnx_path, crops, imgsz=imgsz, method=method)
+    print(f"量化完成（{time.perf_counter() - start:.1f} s）: {int8_path}")
+
+    fp32_summary, fp32_ms = evaluate_tht_model(model, OnnxModel(onnx_path), samples, conf, imgsz)
+    int8_summary, int8_ms = evaluate_tht_model(model, OnnxModel(int8_path), samples, conf, imgsz)
+    fp32_value, int8_value = fp32_summary[metric] or 0.0, int8_summary[metric] or 0.0
+    accepted = int8_value >= fp32_value - max_drop
+
+    gate = {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "source": os.path.basename(onnx_path),
+        "source_mtime": os.path.getmtime(onnx_path),  # FP32 模型重新导出后校验记录失效
+        "metric": metric,
+        "max_drop": max_drop,
+        "fp32": fp32_value,
+        "int8": int8_value,
+        "fp32_bands_ms": round(fp32_ms, 3),
+        "int8_bands_ms": round(int8_ms, 3),
+        "images": len(samples),
+        "resistors": fp32_summary["resistors"],
+        "calibration_crops": len(crops),
+        "preprocess": PREPROCESS_VERSION,  # 校准和校验共用的预处理，运行时不一致则不使用 INT8 模型
+        "imgsz": imgsz,
+        "accepted": accepted
+    }
+    gate_path = os.path.splitext(int8_path)[0] + ".json"
+    with open(gate_path, 'w', encoding='utf-8') as f:
+        json.dump(gate, f, ensure_ascii=False, indent=4)
+
+    print(f"{metric}: FP32 {fp32_value:.4f}，INT8 {int8_value:.4f}（允许下降 {max_drop}）")
+    print(f"色环检测耗时: FP32 {fp32_ms:.1f} ms/张，INT8 {int8_ms:.1f} ms/张")
+    if accepted:
+        print(f"INT8 模型校验通过，onnx 后端将自动使用: {int8_path}")
+    else:
+        print("INT8 模型准确率下降超出阈值，运行时继续使用 FP32 模型")
+    return gate
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="色环模型 INT8 静态量化与精度校验")
+    parser.add_argument("tht_model", help="色环模型路径（.pt 或 .onnx）")
+    parser.add_argument("images", help="带标注配置的电路板图像文件夹（用于精度校验）")
+    parser.add_argument("-m", "--model", required=True, help="电阻定位模型路径")
+    parser.add_argument("-c", "--config-dir", default="AnnotationConfig", help="标注配置文件夹")
+    parser.add_argument("--crops", default="CropResult", help="校准用裁剪图像文件夹")
+    parser.add_argument("--calib-size", type=int, default=200, help="校准图像数量上限")
+    parser.add_argument("--max-drop", type=float, default=0.01, help="允许的最大准确率下降")
+    parser.add_argument("--metric", default="band_accuracy",
+                        choices=["band_accuracy", "resistor_accuracy", "resistance_accuracy"], help="校验指标")
+    parser.add_argument("--method", default="minmax", choices=list(CALIBRATION_METHODS), help="校准方法")
+    parser.add_argument("--imgsz", type=int, default=640, help="色环检测统一输入尺寸")
+    parser.add_argument("--conf", type=float, default=0.05, help="电阻定位置信度阈值")
+    args = parser.parse_args()
+    quantize_and_validate(args.tht_model, args.model, args.images, args.config_dir, args.crops, args.max_drop,
+                          args.metric, args.calib_size, args.imgsz, args.conf, args.method)
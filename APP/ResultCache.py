@@ -0,0 +1,189 @@
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from DetectionCache import image_hash
+
+DEFAULT_CACHE_PATH = Path("Cache") / "result_cache.db"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 检测结果的二进制格式：类型（0 检测框 / 1 旋转框）、行数、列数 + float32 数据
+HEADER = struct.Struct("<BII")
+BOXES, OBB = 0, 1
+
+_digests = {}  # {(绝对路径, 修改时间, 大小): 内容哈希}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """计算权重文件（或 OpenVINO 导出目录）的内容哈希，文件未修改时不重复计算"""
+    path = os.path.abspath(path)
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    stats = tuple((os.path.getmtime(file), os.path.getsize(file)) for file in files)
+    key = (path, stats)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is not None:
+        return digest
+
+    hasher = hashlib.blake2b(digest_size=16)
+    for file in files:
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+    digest = hasher.hexdigest()
+    with _digests_lock:
+        _digests[key] = digest
+    return digest
+
+
+def model_digest(model):
+    """模型权重哈希，无法确定权重文件时返回 None（此时不使用缓存）"""
+    path = getattr(model, "path", None) or getattr(model, "ckpt_path", None)
+    if not path or not os.path.exists(path):
+        return None
+    return file_digest(path)
+
+
+class ResultCache:
+    """
+    磁盘检测结果缓存（SQLite 单文件，多进程可同时读写）
+    以 (图像内容哈希, 模型权重哈希, 推理参数) 为键，保存检测框和色环结果的紧凑二进制数据；
+    总大小超过上限时按最近最少使用淘汰
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = None  # 首次使用时再打开，导入模块不会创建文件
+
+    def connect(self):
+        if self.conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            with self.conn:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        payload BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        last_used REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+                """)
+        return self.conn
+
+    @staticmethod
+    def make_key(*parts):
+        """由各部分（图像哈希、权重哈希、参数等）生成缓存键"""
+        return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """命中时返回数据并更新最近使用时间，否则返回 None"""
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute("SELECT payload FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with conn:
+                conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            return bytes(row[0])
+
+    def put(self, key, payload):
+        """写入数据，总大小超过上限时淘汰最久未使用的记录"""
+        with self.lock:
+            conn = self.connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                             (key, sqlite3.Binary(payload), len(payload), time.time()))
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    stale = []
+                    for stale_key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((stale_key,))
+                        total -= size
+                    conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def detection_key(self, image_key, model, **params):
+        """检测结果的缓存键，无法确定模型权重时返回 None"""
+        digest = model_digest(model)
+        if digest is None:
+            return None
+        return self.make_key("detect", image_key, digest, tuple(sorted(params.items())))
+
+    def load_detections(self, key, image, names):
+        """读取缓存的检测结果并还原为 ultralytics Results"""
+        payload = self.get(key)
+        if payload is None:
+            return None
+        # 只在命中时导入，页面导入缓存模块不会加载 torch/ultralytics
+        import torch
+        from ultralytics.engine.results import Results
+
+        kind, rows, cols = HEADER.unpack_from(payload)
+        data = torch.from_numpy(np.frombuffer(payload, np.float32, rows * cols, HEADER.size).reshape(rows, cols).copy())
+        if kind == OBB:
+            return Results(image, path="", names=names, obb=data)
+        return Results(image, path="", names=names, boxes=data)
+
+    def save_detections(self, key, results):
+        """保存检测结果（检测框：xyxy/置信度/类别；旋转框：xywhr/置信度/类别）"""
+        kind, boxes = (BOXES, results.boxes) if results.boxes is not None else (OBB, results.obb)
+        data = boxes.data.cpu().numpy().astype(np.float32) if boxes is not None else np.zeros((0, 6), np.float32)
+        self.put(key, HEADER.pack(kind, *data.shape) + data.tobytes())
+
+    def detect(self, model, image, predict, image_key=None, force=False, **params):
+        """
+        获取检测结果，未命中或 force=True 时执行推理并写入缓存
+        :param model: 检测模型（用于确定权重哈希和类别名称）
+        :param predict: 推理函数 predict(image) -> 单张图像的检测结果
+        :param params: 推理参数（同时作为缓存键的一部分）
+        """
+        key = self.detection_key(image_key or image_hash(image), model, **params)
+        if key is not None and not force:
+            results = self.load_detections(key, image, model.names)
+            if results is not None:
+                return results
+        results = predict(image)
+        if key is not None:
+            self.save_detections(key, results)
+        return results
+
+    def load_bands(self, key):
+        """读取缓存的色环结果（每个电阻一个字符串）"""
+        payload = self.get(key)
+        if payload is None:
+            return None
+        count = struct.unpack_from("<I", payload)[0]
+        return payload[4:].decode("utf-8").split("\n") if count else []
+
+    def save_bands(self, key, tht_colors):
+        self.put(key, struct.pack("<I", len(tht_colors)) + "\n".join(tht_colors).encode("utf-8"))
+
+    def stats(self):
+        """返回 (记录数量, 总字节数)"""
+        with self.lock:
+            return tuple(self.connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone())
+
+    def clear(self):
+        with self.lock, self.connect():
+            self.conn.execute("DELETE FROM entries")
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+# 全局共享的磁盘结果缓存（检测页面使用）
+result_cache = ResultCache()
@@ -0,0 +1,206 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+CSV_HEADERS = ["编号", "坐标", "类名", "置信度", "电阻阻值"]  # 与输出窗口保存的CSV一致
+DEFAULT_STORE_PATH = Path("DetectResult") / "results.db"
+
+
+def next_indexed_path(directory, prefix, suffix):
+    """
+    获取下一个可用的编号文件名（如 Log12.txt）
+    编号保存在目录下的 .{prefix}_index 文件中，每次只需一次读写；
+    索引文件缺失或与实际文件不一致时扫描一次目录重建
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    index_file = directory / f".{prefix}_index"
+
+    try:
+        index = int(index_file.read_text())
+    except (OSError, ValueError):
+        index = None
+
+    if index is None or (directory / f"{prefix}{index}{suffix}").exists():
+        # 扫描一次目录找到当前最大编号
+        pattern = re.compile(rf"^{re.escape(prefix)}(\d+){re.escape(suffix)}$")
+        index = 1 + max((int(m.group(1)) for m in map(pattern.match, os.listdir(directory)) if m), default=0)
+
+    try:
+        index_file.write_text(str(index + 1))
+    except OSError:
+        pass
+    return directory / f"{prefix}{index}{suffix}"
+
+
+class ResultStore:
+    """
+    检测结果库（SQLite）：所有检测记录写入同一个文件，
+    每次检测为一条运行记录（运行ID、电路板、图像哈希、时间等），按电路板和日期建立索引
+    """
+
+    def __init__(self, db_path=DEFAULT_STORE_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.create_tables()
+
+    def create_tables(self):
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")  # 多进程批量检测时读写互不阻塞
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    board TEXT,
+                    image_path TEXT,
+                    image_hash TEXT,
+                    mode INTEGER,
+                    model TEXT,
+                    created_at REAL NOT NULL,
+                    resistor_count INTEGER,
+                    passed INTEGER,
+                    failed INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS results (
+                    run_id TEXT NOT NULL,
+                    resistor_id INTEGER NOT NULL,
+                    x REAL,
+                    y REAL,
+                    class TEXT,
+                    confidence REAL,
+                    bands TEXT,
+                    resistance TEXT,
+                    comparison TEXT,
+                    text TEXT,
+                    PRIMARY KEY (run_id, resistor_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_runs_board_time ON runs (board, created_at);
+                CREATE INDEX IF NOT EXISTS idx_runs_time ON runs (created_at);
+                CREATE INDEX IF NOT EXISTS idx_runs_hash ON runs (image_hash);
+            """)
+
+    def add_run(self, rows, board=None, image_path=None, image_hash=None, mode=None, model=None):
+        """
+        写入一次检测的全部结果
+        :param rows: 结果列表，每项包含 coords/class/confidence/text，可选 bands/resistance/comparison
+        :param board: 电路板名称（默认取图像文件名）
+        :return: 运行ID
+        """
+        run_id = uuid.uuid4().hex
+        created_at = time.time()
+        if board is None and image_path:
+            board = Path(image_path).stem
+
+        records = [
+            (run_id, index, float(row["coords"][0]), float(row["coords"][1]), row["class"],
+             float(row["confidence"]), row.get("bands"), row.get("resistance"), row.get("comparison"), row["text"])
+            for index, row in enumerate(rows, start=1)
+        ]
+        passed = sum(1 for row in rows if row.get("comparison") == " ✔")
+        failed = sum(1 for row in rows if (row.get("comparison") or "").startswith(" ✘"))
+
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, board, str(image_path) if image_path else None, image_hash, mode, model,
+                 created_at, len(records), passed, failed))
+            self.conn.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+        return run_id
+
+    def query_runs(self, board=None, start=None, end=None, image_hash=None, limit=None):
+        """
+        按电路板、时间范围或图像哈希查询检测记录（按时间倒序）
+        :param start: 起始时间（时间戳或 "YYYY-MM-DD"）
+        :param end: 结束时间（时间戳或 "YYYY-MM-DD"，包含当天）
+        """
+        conditions, params = [], []
+        if board is not None:
+            conditions.append("board = ?")
+            params.append(board)
+        if start is not None:
+            conditions.append("created_at >= ?")
+            params.append(self.to_timestamp(start))
+        if end is not None:
+            conditions.append("created_at < ?")
+            params.append(self.to_timestamp(end, end_of_day=True))
+        if image_hash is not None:
+            conditions.append("image_hash = ?")
+            params.append(image_hash)
+
+        sql = "SELECT * FROM runs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def get_results(self, run_id):
+        """读取一次检测的全部电阻结果"""
+        with self.lock:
+            cursor = self.conn.execute("SELECT * FROM results WHERE run_id = ? ORDER BY resistor_id", (run_id,))
+            return [dict(row) for row in cursor]
+
+    def export_csv(self, run_id, csv_path):
+        """按输出窗口的格式导出一次检测的CSV"""
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADERS)
+            for row in self.get_results(run_id):
+                writer.writerow([
+                    row["resistor_id"],
+                    f"({row['x']:.1f}, {row['y']:.1f})",
+                    row["class"],
+                    f"{row['confidence']:.2f}",
+                    row["text"]
+                ])
+        return csv_path
+
+    @staticmethod
+    def to_timestamp(value, end_of_day=False):
+        """将日期字符串转换为时间戳，end_of_day=True 时返回次日零点"""
+        if isinstance(value, (int, float)):
+            return float(value)
+        timestamp = time.mktime(time.strptime(value, "%Y-%m-%d"))
+        return timestamp + 86400 if end_of_day else timestamp
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="检测结果库查询与CSV导出")
+    parser.add_argument("--db", default=str(DEFAULT_STORE_PATH), help="结果库路径")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="查询检测记录")
+    list_parser.add_argument("--board", help="电路板名称")
+    list_parser.add_argument("--since", help="起始日期 YYYY-MM-DD")
+    list_parser.add_argument("--until", help="结束日期 YYYY-MM-DD（包含当天）")
+    list_parser.add_argument("--limit", type=int, default=50, help="最多显示条数")
+
+    export_parser = subparsers.add_parser("export", help="导出一次检测的CSV")
+    export_parser.add_argument("run_id", help="运行ID")
+    export_parser.add_argument("-o", "--output", help="CSV输出路径（默认按编号生成）")
+
+    args = parser.parse_args()
+    store = ResultStore(args.db)
+    if args.command == "list":
+        for run in store.query_runs(args.board, args.since, args.until, limit=args.limit):
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["created_at"]))
+            print(f"{run['run_id']}  {created}  {run['board'] or '-'}  "
+                  f"电阻 {run['resistor_count']}  通过 {run['passed']}  不符 {run['failed']}")
+    else:
+        output = args.output or next_indexed_path(store.db_path.parent, "DetectResult", ".csv")
+        print(f"已导出: {store.export_csv(args.run_id, output)}")
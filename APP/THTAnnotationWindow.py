@@ -3,10 +3,13 @@ import cv2
 import copy
 import os
 import json
+from DetectionCache import detection_cache
+from AnnotationStore import annotation_store
 
 
 class AnnotationWindow(QtWidgets.QDialog):
-    def __init__(self, yolo_model, input_image, logger, detect_mode, filename, parent=None):
+    def __init__(self, yolo_model, input_image, logger, detect_mode, filename, parent=None, image_key=None,
+                 pipeline=None):
         super().__init__(parent)
         # 定义颜色配置
         self.base_colors = ["黑", "棕", "红", "橙", "黄", "绿", "蓝", "紫", "灰", "白"]  # 基础颜色环（数字）
@@ -15,6 +18,8 @@ class AnnotationWindow(QtWidgets.QDialog):
 
         self.model = yolo_model
         self.original_image = copy.deepcopy(input_image)
+        self.image_key = image_key  # 图片内容哈希，为空时由检测缓存自动计算
+        self.pipeline = pipeline  # 检测页面的检测流程，保证编号与检测页面一致（含分块检测设置）
         self.results = None
         self.annotations = {}
         self.setup_ui()
@@ -65,7 +70,7 @@ class AnnotationWindow(QtWidgets.QDialog):
 
         # 操作按钮
         self.btn_retry = QtWidgets.QPushButton("🔄 重新检测")
-        self.btn_retry.clicked.connect(self.perform_detection)
+        self.btn_retry.clicked.connect(lambda: self.perform_detection(force=True))
 
         self.btn_calculate = QtWidgets.QPushButton("💡 计算阻值")
         self.btn_calculate.clicked.connect(self.calculate_resistance)
@@ -102,14 +107,13 @@ class AnnotationWindow(QtWidgets.QDialog):
     def load_annotations(self):
         """从配置文件加载标注数据"""
         config_path = self.get_config_path()
-        if not config_path or not os.path.exists(config_path):
+        saved_annotations = annotation_store.get(config_path)
+        if saved_annotations is None:
             return
 
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                saved_annotations = json.load(f)
-                self.apply_saved_annotations(saved_annotations)
-                self.logger.log(f"成功加载配置文件：{config_path}", "INFO")
+            self.apply_saved_annotations(saved_annotations)
+            self.logger.log(f"成功加载配置文件：{config_path}", "INFO")
         except Exception as e:
             self.logger.log(f"加载配置文件失败：{str(e)}", "ERROR")
 
@@ -143,11 +147,15 @@ class AnnotationWindow(QtWidgets.QDialog):
                         if index >= 0:
                             combo.setCurrentIndex(index)
 
-    def perform_detection(self):
-        """执行YOLO检测并更新界面"""
+    def perform_detection(self, force=False):
+        """执行YOLO检测并更新界面（优先复用检测页面已有的结果，force=True 时强制重新检测）"""
         try:
             # 执行检测
-            self.results = self.model(self.original_image, conf=0.05)[0]
+            if self.pipeline:
+                self.results = self.pipeline.detect_board(self.original_image, self.image_key, force=force)
+            else:
+                self.results = detection_cache.detect(self.model, self.original_image, self.image_key,
+                                                      force=force, conf=0.05)
             self.draw_annotations()  # 初始化绘制
             self.update_table()
             self.load_annotations()  # 检测完成后加载配置
@@ -375,14 +383,14 @@ class AnnotationWindow(QtWidgets.QDialog):
             try:
                 with open(config_path, 'w', encoding='utf-8') as f:
                     json.dump(self.annotations, f, ensure_ascii=False, indent=4)
+                # 写入共享缓存，后续检测比对无需重新读取文件
+                annotation_store.put(config_path, self.annotations)
                 self.logger.log(f"配置文件已保存：{config_path}", "INFO")
             except Exception as e:
+                annotation_store.invalidate(config_path)
                 self.logger.log(f"保存配置文件失败：{str(e)}", "ERROR")
                 QtWidgets.QMessageBox.warning(self, "保存失败", f"文件保存失败：{str(e)}")
 
-        # 将保存的阻值传递并保存到detect_mode中
-        self.detect_mode.refresh_annotations()
-
         if validation_errors > 0:
             self.logger.log(f"存在 {validation_errors} 个未完整填写的电阻数据", "WARNING")
             QtWidgets.QMessageBox.warning(self, "保存警告", f"有 {validation_errors} 个电阻数据未完整填写！")
@@ -0,0 +1,116 @@
+import os
+import time
+import cv2
+from ultralytics import YOLO
+from THTColorDetectNew import plot_predictions, predict_batch
+
+
+def load_crops(input_folder):
+    """
+    读取文件夹中的所有裁剪图像
+    :param input_folder: 裁剪图像文件夹
+    :return: (文件名列表, 图像列表)
+    """
+    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
+    names, crops = [], []
+    for img_file in sorted(os.listdir(input_folder)):
+        if os.path.splitext(img_file)[1].lower() not in image_extensions:
+            continue
+        img = cv2.imread(os.path.join(input_folder, img_file))
+        if img is not None:
+            names.append(img_file)
+            crops.append(img)
+    return names, crops
+
+
+def run_per_crop(model, crops, colors):
+    """逐张裁剪图像进行色环检测（原始方式）"""
+    color_infos = []
+    for crop in crops:
+        results = model.predict(crop, verbose=False)
+        _, color_info = plot_predictions(crop, results, colors)
+        color_infos.append(color_info)
+    return color_infos
+
+
+def run_batched(model, crops, colors, imgsz, batch_size):
+    """统一填充后分批进行色环检测"""
+    color_infos = []
+    for result in predict_batch(model, crops, imgsz, batch_size, verbose=False):
+        _, color_info = plot_predictions(result.orig_img, [result], colors)
+        color_infos.append(color_info)
+    return color_infos
+
+
+def benchmark(model_path, input_folder, colors, imgsz=640, batch_size=16, repeats=3):
+    """
+    对比逐张检测与批量检测的耗时及输出一致性
+    :param model_path: 色环模型路径
+    :param input_folder: 裁剪图像文件夹
+    :param colors: 颜色字典
+    :param imgsz: 批量检测时统一的输入尺寸
+    :param batch_size: 每批图像数量
+    :param repeats: 重复测试次数
+    """
+    model = YOLO(model_path)
+    names, crops = load_crops(input_folder)
+    if not crops:
+        print(f"警告: 在文件夹 {input_folder} 中未找到图像文件")
+        return
+
+    # 预热，避免首次推理的初始化开销影响计时
+    run_per_crop(model, crops[:1], colors)
+    run_batched(model, crops[:1], colors, imgsz, batch_size)
+
+    per_crop_times, batched_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        per_crop_infos = run_per_crop(model, crops, colors)
+        per_crop_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        batched_infos = run_batched(model, crops, colors, imgsz, batch_size)
+        batched_times.append(time.perf_counter() - start)
+
+    per_crop_best = min(per_crop_times)
+    batched_best = min(batched_times)
+    mismatches = [(name, a, b) for name, a, b in zip(names, per_crop_infos, batched_infos) if a != b]
+
+    print(f"\n裁剪图像数量: {len(crops)}，批大小: {batch_size}，输入尺寸: {imgsz}")
+    print(f"逐张检测: {per_crop_best * 1000:.1f} ms（{per_crop_best * 1000 / len(crops):.1f} ms/张）")
+    print(f"批量检测: {batched_best * 1000:.1f} ms（{batched_best * 1000 / len(crops):.1f} ms/张）")
+    print(f"加速比: {per_crop_best / batched_best:.2f}x")
+    print(f"色环结果不一致数量: {len(mismatches)}")
+    for name, a, b in mismatches:
+        print(f"  {name}: 逐张 {' '.join(a)} / 批量 {' '.join(b)}")
+
+
+if __name__ == '__main__':
+    # 颜色映射字典 {class_id: color_name}
+    COLOR_MAP = {
+        0: "red",
+        1: "yellow",
+        2: "black",
+        3: "gold",
+        4: "orange",
+        5: "blue",
+        6: "brown",
+        7: "green",
+        8: "purple",
+        9: "white",
+        10: "gray"
+    }
+
+    # 模型路径
+    MODEL_PATH = r'/Users/wfcy/Dev/PycharmProj/YOLOTrain/APP/Module/THTColorDetect/New/best.pt'  # 替换为你的模型路径
+
+    # 裁剪图像文件夹路径
+    INPUT_FOLDER = r'/Users/wfcy/Dev/PycharmProj/YOLOTrain/APP/CropResult'  # 替换为你的输入文件夹路径
+
+    benchmark(
+        model_path=MODEL_PATH,
+        input_folder=INPUT_FOLDER,
+        colors=COLOR_MAP,
+        imgsz=640,
+        batch_size=16
+    )
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from ModelRegistry import get_model
+from BandOrdering import extract_detections, box_centers, order_left_to_right, draw_detections
 
 def plot_predictions(image, results, colors):
     """
@@ -10,83 +11,17 @@ def plot_predictions(image, results, colors):
     :param colors: 颜色字典 {class_id: color_name}
     :return: 绘制后的图像和颜色信息
     """
-    img = image.copy()
-    color_info = []
-    boxes = results[0].boxes
-
-    # 收集所有检测框的中心点坐标和颜色信息
-    detections = []
-    for box in boxes:
-        class_id = int(box.cls)
-        color_name = colors.get(class_id, f"Unknown_{class_id}")
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
-        conf = float(box.conf)
-
-        # Skip boxes with very low confidence
-        if conf < 0.5:
-            continue
-
-        detections.append({
-            'box': (x1, y1, x2, y2),
-            'center': (center_x, center_y),
-            'color': color_name,
-            'class_id': class_id,
-            'conf': conf
-        })
-
-    if not detections:
-        return img, []
-
-    # 计算所有检测框之间的间距
-    distances = []
-    n = len(detections)
-    for i in range(n):
-        for j in range(i + 1, n):
-            x1, y1 = detections[i]['center']
-            x2, y2 = detections[j]['center']
-            distance = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-            distances.append(distance)
-
-    # 排除位置偏差大的检测框
-    ref_points = []
-    for i, det in enumerate(detections):
-        total_dist = 0
-        for j, other in enumerate(detections):
-            if i != j:
-                x1, y1 = det['center']
-                x2, y2 = other['center']
-                total_dist += np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-        ref_points.append((i, total_dist))
-
-    # 通过距离计算框的离群程度，按总距离排序，移除异常框
-    ref_points.sort(key=lambda x: -x[1])
-    sorted_indices = [x[0] for x in ref_points]
-    valid_detections = [detections[i] for i in sorted_indices if detections[i]['conf'] >= 0.5]
-
-    # 根据中心位置对框进行排序
-    valid_detections.sort(key=lambda x: x['center'][0])
+    xyxy, conf, cls = extract_detections(results[0].boxes)
+    if len(conf) == 0:
+        return image.copy(), []
 
-    # 绘制检测框和标签
-    for det in valid_detections:
-        x1, y1, x2, y2 = det['box']
-        color_name = det['color']
-        conf = det['conf']
-
-        # 绘制矩形框
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-        # 绘制标签背景
-        label = f"{color_name} {conf:.2f}"
-        (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-        cv2.rectangle(img, (x1, y1 - 20), (x1 + w, y1), (0, 255, 0), -1)
-
-        # 绘制标签文本
-        cv2.putText(img, label, (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
-
-        color_info.append(color_name)
+    # 根据中心位置从左到右排序（x 相同时离群程度大的在前）
+    order = order_left_to_right(box_centers(xyxy))
+    xyxy, conf, cls = xyxy[order], conf[order], cls[order]
 
+    # 绘制检测框和标签
+    img = draw_detections(image, xyxy, conf, cls, colors)
+    color_info = [colors.get(class_id, f"Unknown_{class_id}") for class_id in cls.tolist()]
     return img, color_info
 
 
@@ -98,8 +33,8 @@ def predict_and_visualize(model_path, img_path, colors):
     :param colors: 颜色字典 {class_id: color_name}
     :return: 绘制后的图像和颜色信息
     """
-    # 加载模型
-    model = YOLO(model_path)
+    # 加载模型（重复调用时复用已加载的模型）
+    model = get_model(model_path)
 
     # 读取图像
     img = cv2.imread(img_path)
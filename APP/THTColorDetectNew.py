@@ -1,223 +1,221 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from ModelRegistry import get_model
+from BandOrdering import plot_predictions
+from InferenceBackend import letterbox
 import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from tqdm import tqdm
 
+# 检测进程中的模型和颜色字典（每个进程各自加载）
+_model = None
+_colors = None
 
-def plot_predictions(image, results, colors):
+
+def predict_batch(model, images, imgsz=640, batch_size=16, stride=32, **predict_kwargs):
+    """
+    将多张裁剪图像按单张推理时的输入尺寸分组后分批送入模型
+    每张图像先填充为单张 model.predict 的矩形输入，同组图像尺寸相同，
+    ultralytics 对整批不再缩放填充，模型输入与逐张推理逐像素一致，
+    结果只可能因批量推理的浮点误差在置信度/NMS 阈值附近的框上不同
+    :param model: YOLO模型
+    :param images: 图像列表
+    :param imgsz: 输入尺寸（与逐张推理使用的尺寸相同时结果一致）
+    :param batch_size: 每批图像数量
+    :param stride: 模型步长
+    :param predict_kwargs: 透传给 model.predict 的其他参数
+    :return: 与输入顺序一致的结果列表（坐标基于填充后的图像）
+    """
+    padded = [letterbox(img, imgsz, stride=stride) for img in images]
+    groups = {}
+    for index, img in enumerate(padded):
+        groups.setdefault(img.shape[:2], []).append(index)
+
+    results = [None] * len(images)
+    for indices in groups.values():
+        for start in range(0, len(indices), batch_size):
+            chunk = indices[start:start + batch_size]
+            for index, result in zip(chunk, model.predict([padded[i] for i in chunk], imgsz=imgsz, **predict_kwargs)):
+                results[index] = result
+    return results
+
+
+def init_worker(model_path, colors, threads=0):
+    """检测进程初始化：每个进程加载一份模型"""
+    global _model, _colors
+    _model = get_model(model_path, threads=threads or None)
+    _colors = colors
+
+
+def detect_image(img_file, data):
     """
-    在图像上绘制预测框和颜色标签，并按照色环顺序排序
-    增加异常框处理逻辑：
-    - 处理过于接近的相邻框
-    - 处理过于分散的异常框
+    解码、检测单张图像并把结果图像编码为文件内容（在检测进程中运行，只有编码后的数据传回主进程）
+    :return: (文件名, 结果图像文件内容, 颜色信息, 错误信息)
     """
-    img = image.copy()
-    color_info = []
-    boxes = results[0].boxes
-
-    # 收集所有检测框的中心点坐标和颜色信息
-    detections = []
-    for box in boxes:
-        class_id = int(box.cls)
-        color_name = colors.get(class_id, f"Unknown_{class_id}")
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        center_x, center_y = (x1 + x2) // 2, (y1 + y2) // 2
-        conf = float(box.conf)
-
-        # 跳过置信度低的框
-        if conf < 0.5:
-            continue
-
-        detections.append({
-            'box': (x1, y1, x2, y2),
-            'center': (center_x, center_y),
-            'color': color_name,
-            'class_id': class_id,
-            'conf': conf
-        })
-
-    if not detections:
-        return img, []
-
-    # 1. 异常框处理 - 过滤过于接近或分散的框
-    filtered_detections = []
-    if len(detections) > 1:
-        # 计算所有相邻框的距离
-        distances = []
-        for i in range(len(detections) - 1):
-            p1 = detections[i]['center']
-            p2 = detections[i + 1]['center']
-            distance = np.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
-            distances.append(distance)
-
-        # 计算平均距离和标准差
-        avg_distance = np.mean(distances)
-        std_distance = np.std(distances)
-
-        # 距离阈值设置
-        min_threshold = avg_distance * 0.3  # 小于平均距离30%视为过近
-        max_threshold = avg_distance * 2.0  # 大于平均距离200%视为过远
-
-        # 保留有效框的索引
-        valid_indices = set(range(len(detections)))
-
-        # 处理过近的框对
-        for i in range(len(distances)):
-            if distances[i] < min_threshold:
-                # 保留置信度较高的框
-                if detections[i]['conf'] > detections[i + 1]['conf']:
-                    valid_indices.discard(i + 1)
-                else:
-                    valid_indices.discard(i)
-
-        # 处理过远的异常框
-        for i in range(len(detections)):
-            if i == 0:
+    try:
+        img = cv2.imdecode(data, cv2.IMREAD_COLOR) if data is not None and data.size else None
+        if img is None:
+            return img_file, None, None, "无法读取图像"
+
+        # 进行预测
+        results = _model.predict(img, verbose=False)
+
+        # 绘制预测结果并按原图格式编码
+        plotted_img, color_info = plot_predictions(img, results, _colors)
+        ok, encoded = cv2.imencode(os.path.splitext(img_file)[1], plotted_img)
+        if not ok:
+            return img_file, None, None, "无法编码结果图像"
+        return img_file, encoded.tobytes(), color_info, None
+    except Exception as e:
+        return img_file, None, None, str(e)
+
+
+def read_images(input_folder, image_files, read_queue):
+    """I/O 线程：按顺序预读图像文件内容，队列满时等待（解码在检测进程中进行）"""
+    for index, img_file in enumerate(image_files):
+        try:
+            data = np.fromfile(os.path.join(input_folder, img_file), dtype=np.uint8)
+        except OSError:
+            data = None
+        read_queue.put((index, img_file, data))
+    read_queue.put(None)
+
+
+def detect_stream(read_queue, model_path, colors, workers=1, threads=0):
+    """
+    按输入顺序逐个产出检测结果
+    多进程时每个进程持有独立的模型，同时在途（检测中和等待排序）的图像数量不超过进程数的两倍
+    """
+    if workers <= 1:
+        init_worker(model_path, colors, threads)
+        for _, img_file, data in iter(read_queue.get, None):
+            yield detect_image(img_file, data)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(model_path, colors, threads)) as executor:
+        items = iter(read_queue.get, None)
+        running, done = {}, {}
+        next_index = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(running) + len(done) < workers * 2:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, img_file, data = item
+                running[executor.submit(detect_image, img_file, data)] = index
+
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done[running.pop(future)] = future.result()
+
+            # 先完成的结果等待前面的图像，保证输出顺序与输入一致
+            while next_index in done:
+                yield done.pop(next_index)
+                next_index += 1
+
+
+def write_results(output_folder, txt_file, write_queue):
+    """写出线程：保存已编码的结果图像并逐行追加检测结果，中途退出时已完成的结果不会丢失"""
+    for img_file, image_data, color_info, error in iter(write_queue.get, None):
+        if error is None:
+            try:
+                # 保存结果图像
+                with open(os.path.join(output_folder, f"result_{img_file}"), 'wb') as f:
+                    f.write(image_data)
+                result_line = f"{img_file}: {', '.join(color_info)}"
+            except Exception as e:
+                error = str(e)
+
+        if error is not None:
+            result_line = f"处理 {img_file} 时出错: {error}"
+            print(result_line)
+
+        # 先保存图像再记录结果，断点续跑时只跳过两者都存在的图像
+        txt_file.write(result_line + "\n")
+        txt_file.flush()
+
+
+def load_finished(txt_path, output_folder):
+    """读取已有的检测结果，返回 {已成功处理且结果图像存在的文件名: 结果行}"""
+    finished = {}
+    if not os.path.exists(txt_path):
+        return finished
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or (line.startswith("处理 ") and " 时出错: " in line):
                 continue
-            prev_dist = distances[i - 1] if i < len(distances) else distances[-1]
-            next_dist = distances[i] if i < len(distances) else distances[-1]
-            if (prev_dist > max_threshold and next_dist > max_threshold):
-                valid_indices.discard(i)
-
-        # 创建过滤后的检测列表
-        filtered_detections = [detections[i] for i in sorted(valid_indices)]
-    else:
-        filtered_detections = detections.copy()
-
-    # 如果没有有效检测框，返回空结果
-    if not filtered_detections:
-        return img, []
-
-    # 2. 判断图像方向（横向或纵向）
-    x_coords = [d['center'][0] for d in filtered_detections]
-    y_coords = [d['center'][1] for d in filtered_detections]
-    x_span = max(x_coords) - min(x_coords)
-    y_span = max(y_coords) - min(y_coords)
-    horizontal = x_span > y_span  # True表示横向，False表示纵向
-
-    # 3. 根据图像方向进行初步排序
-    if horizontal:
-        filtered_detections.sort(key=lambda x: x['center'][0])
-        print("检测到横向电阻，按X坐标排序")
-    else:
-        filtered_detections.sort(key=lambda x: x['center'][1])
-        print("检测到纵向电阻，按Y坐标排序")
-
-    # 4. 计算相邻色环的距离
-    distances = []
-    for i in range(len(filtered_detections) - 1):
-        x1, y1 = filtered_detections[i]['center']
-        x2, y2 = filtered_detections[i + 1]['center']
-        distance = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-        distances.append(distance)
-
-    # 5. 确定色环顺序
-    if len(distances) > 0:
-        # 找到最大间隔的位置
-        max_dist_idx = np.argmax(distances)
-
-        # 判断是顺序还是逆序情况
-        if max_dist_idx == 0:
-            # 最大间隔在最前面 - 顺序情况
-            ordered_detections = list(reversed(filtered_detections))
-            print("检测到顺序排列的色环")
-        elif max_dist_idx == len(distances) - 1:
-            # 最大间隔在最后面 - 逆序情况
-            ordered_detections = filtered_detections
-            print("检测到逆序排列的色环")
-        else:
-            # 其他情况（非常规排列）
-            ordered_detections = filtered_detections[max_dist_idx + 1:] + filtered_detections[:max_dist_idx + 1]
-            print("检测到非常规排列的色环，已尝试调整")
-    else:
-        ordered_detections = filtered_detections
-
-    # 6. 绘制检测框和标签
-    for det in ordered_detections:
-        x1, y1, x2, y2 = det['box']
-        color_name = det['color']
-        conf = det['conf']
-
-        # 绘制矩形框
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-        # 绘制标签背景
-        label = f"{color_name} {conf:.2f}"
-        (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-        cv2.rectangle(img, (x1, y1 - 20), (x1 + w, y1), (0, 255, 0), -1)
-
-        # 绘制标签文本
-        cv2.putText(img, label, (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
-
-        color_info.append(color_name)
-
-    return img, color_info
-
-
-
-
-def process_folder(input_folder, output_folder, model_path, colors):
+            img_file = line.split(": ", 1)[0]
+            if os.path.exists(os.path.join(output_folder, f"result_{img_file}")):
+                finished[img_file] = line
+    return finished
+
+
+def process_folder(input_folder, output_folder, model_path, colors, workers=1, threads=0, resume=True,
+                   prefetch=8):
     """
-    处理文件夹中的所有图像
+    处理文件夹中的所有图像：I/O 线程预读 -> 检测（单进程或多进程） -> 写出线程保存图像并逐行记录结果
     :param input_folder: 输入文件夹路径
     :param output_folder: 输出文件夹路径
     :param model_path: 模型路径
     :param colors: 颜色字典
+    :param workers: 检测进程数量（1 表示在当前进程中检测）
+    :param threads: 每个检测进程的 CPU 推理线程数（0 表示自动，多进程时建议设为 核心数/进程数）
+    :param resume: 是否跳过已有检测结果的图像（中断后继续处理）
+    :param prefetch: 预读和待写出队列的长度
     """
-    # 加载模型
-    model = YOLO(model_path)
-
     # 确保输出文件夹存在
     os.makedirs(output_folder, exist_ok=True)
-
-    # 准备保存结果的文本文件
     txt_path = os.path.join(output_folder, "detection_results.txt")
-    txt_content = []
 
     # 获取所有图像文件
     image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-    image_files = [f for f in os.listdir(input_folder)
-                   if os.path.splitext(f)[1].lower() in image_extensions]
+    image_files = sorted(f for f in os.listdir(input_folder)
+                         if os.path.splitext(f)[1].lower() in image_extensions)
 
     if not image_files:
         print(f"警告: 在文件夹 {input_folder} 中未找到图像文件")
         return
 
-    # 处理每张图像
-    for img_file in tqdm(image_files, desc="处理图像"):
-        img_path = os.path.join(input_folder, img_file)
+    finished = load_finished(txt_path, output_folder) if resume else {}
+    image_files = [f for f in image_files if f not in finished]
+    if finished:
+        print(f"跳过已有检测结果的图像 {len(finished)} 张")
+    if not image_files:
+        print(f"所有图像均已处理，检测结果位于 {txt_path}")
+        return
 
+    # 只保留已完成图像的结果（出错或结果图像缺失的图像重新处理后追加），
+    # 先写入临时文件再替换，重写过程中被中断也不会丢失已有结果
+    tmp_path = txt_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as tmp_file:
+        for result_line in finished.values():
+            tmp_file.write(result_line + "\n")
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_path, txt_path)
+
+    read_queue = queue.Queue(maxsize=prefetch)
+    write_queue = queue.Queue(maxsize=prefetch)
+    with open(txt_path, 'a', encoding='utf-8') as txt_file:
+        reader = threading.Thread(target=read_images, args=(input_folder, image_files, read_queue), daemon=True)
+        writer = threading.Thread(target=write_results, args=(output_folder, txt_file, write_queue))
+        reader.start()
+        writer.start()
         try:
-            # 读取图像
-            img = cv2.imread(img_path)
-            if img is None:
-                print(f"无法读取图像: {img_path}")
-                continue
-
-            # 进行预测
-            results = model.predict(img)
-
-            # 绘制预测结果
-            plotted_img, color_info = plot_predictions(img, results, colors)
-
-            # 保存结果图像
-            output_img_path = os.path.join(output_folder, f"result_{img_file}")
-            cv2.imwrite(output_img_path, plotted_img)
-
-            # 记录结果
-            result_line = f"{img_file}: {', '.join(color_info)}"
-            txt_content.append(result_line)
-
-        except Exception as e:
-            error_msg = f"处理 {img_file} 时出错: {str(e)}"
-            print(error_msg)
-            txt_content.append(error_msg)
-
-    # 保存文本结果
-    with open(txt_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(txt_content))
+            for result in tqdm(detect_stream(read_queue, model_path, colors, workers, threads),
+                               total=len(image_files), desc="处理图像"):
+                write_queue.put(result)
+        finally:
+            write_queue.put(None)
+            writer.join()
     print(f"\n检测结果已保存到 {txt_path}")
 
 
@@ -258,10 +256,16 @@ if __name__ == '__main__':
     # 输出文件夹路径
     OUTPUT_FOLDER = r'/Users/wfcy/Dev/PycharmProj/YOLOTrain/APP/THTColorDetectResult'  # 替换为你想要的输出文件夹路径
 
-    # 处理整个文件夹
+    # 检测进程数量和每个进程的推理线程数（0 表示自动）
+    WORKERS = max(1, (os.cpu_count() or 1) // 4)
+    THREADS = 4 if WORKERS > 1 else 0
+
+    # 处理整个文件夹（已有结果的图像会被跳过）
     process_folder(
         input_folder=INPUT_FOLDER,
         output_folder=OUTPUT_FOLDER,
         model_path=MODEL_PATH,
-        colors=COLOR_MAP
+        colors=COLOR_MAP,
+        workers=WORKERS,
+        threads=THREADS
     )
\ No newline at end of file
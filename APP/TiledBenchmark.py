@@ -0,0 +1,114 @@
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+from BandOrdering import to_numpy
+from ModelRegistry import get_model
+from TiledInference import TiledDetector, box_overlap
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+
+def load_labels(label_path, width, height):
+    """读取 YOLO 格式标注（class cx cy w h，归一化坐标），返回像素坐标 N×4"""
+    if not os.path.exists(label_path):
+        return np.zeros((0, 4))
+    values = np.loadtxt(label_path, ndmin=2)
+    if values.size == 0:
+        return np.zeros((0, 4))
+    cx, cy, w, h = values[:, 1] * width, values[:, 2] * height, values[:, 3] * width, values[:, 4] * height
+    return np.stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2), axis=1)
+
+
+def match_boxes(pred, conf, truth, iou_threshold=0.5):
+    """按置信度贪心匹配预测框与标注框，返回匹配上的标注框数量"""
+    matched = np.zeros(len(truth), dtype=bool)
+    for i in np.argsort(-conf):
+        if matched.all():
+            break
+        candidates = np.flatnonzero(~matched)
+        iou = box_overlap(pred[i], truth[candidates], metric="iou")
+        best = int(iou.argmax())
+        if iou[best] >= iou_threshold:
+            matched[candidates[best]] = True
+    return int(matched.sum())
+
+
+def evaluate(detector, samples, conf, iou_threshold=0.5):
+    """
+    在样本集上评估一种检测配置
+    :return: (召回率, 精确率, 平均每张耗时秒)
+    """
+    matched = total_truth = total_pred = 0
+    elapsed = 0.0
+    for image, truth in samples:
+        start = time.perf_counter()
+        result = detector(image, conf=conf, verbose=False)[0]
+        elapsed += time.perf_counter() - start
+
+        data = to_numpy(result.boxes.data) if result.boxes is not None else np.zeros((0, 6))
+        total_truth += len(truth)
+        total_pred += len(data)
+        if len(data) and len(truth):
+            matched += match_boxes(data[:, :4], data[:, -2], truth, iou_threshold)
+
+    recall = matched / total_truth if total_truth else 0.0
+    precision = matched / total_pred if total_pred else 0.0
+    return recall, precision, elapsed / max(len(samples), 1)
+
+
+def benchmark(model_path, image_folder, label_folder=None, tile_sizes=(0, 1280, 1024, 640),
+              overlap=0.25, batch_size=8, conf=0.05, iou_threshold=0.5):
+    """
+    对比整图检测与不同分块尺寸的召回率和耗时
+    :param model_path: 电阻定位模型路径
+    :param image_folder: 电路板图像文件夹
+    :param label_folder: YOLO 格式标注文件夹，为空时使用与 images 同级的 labels 文件夹
+    :param tile_sizes: 待比较的分块边长（0 表示整图检测）
+    :param overlap: 相邻分块重叠比例
+    :param batch_size: 每批推理的分块数量
+    :param conf: 置信度阈值
+    :param iou_threshold: 预测框与标注框匹配的IoU阈值
+    """
+    if label_folder is None:
+        label_folder = os.path.join(os.path.dirname(os.path.normpath(image_folder)), "labels")
+
+    samples = []
+    for name in sorted(os.listdir(image_folder)):
+        if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        image = cv2.imread(os.path.join(image_folder, name))
+        if image is None:
+            continue
+        label_path = os.path.join(label_folder, os.path.splitext(name)[0] + ".txt")
+        samples.append((image, load_labels(label_path, image.shape[1], image.shape[0])))
+    if not samples:
+        print(f"警告: 在文件夹 {image_folder} 中未找到图像文件")
+        return []
+
+    model = get_model(model_path)
+    print(f"图像数量: {len(samples)}，标注框数量: {sum(len(truth) for _, truth in samples)}")
+    print(f"{'检测方式':<16}{'召回率':>8}{'精确率':>8}{'耗时(ms/张)':>14}")
+    report = []
+    for tile_size in tile_sizes:
+        detector = TiledDetector(model, tile_size, overlap, batch_size) if tile_size else model
+        detector(samples[0][0], conf=conf, verbose=False)  # 预热
+        recall, precision, seconds = evaluate(detector, samples, conf, iou_threshold)
+        label = f"分块 {tile_size}px" if tile_size else "整图"
+        print(f"{label:<16}{recall:>10.3f}{precision:>10.3f}{seconds * 1000:>14.1f}")
+        report.append({"tile_size": tile_size, "recall": recall, "precision": precision, "seconds": seconds})
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="分块检测召回率与耗时对比")
+    parser.add_argument("images", help="电路板图像文件夹")
+    parser.add_argument("-m", "--model", required=True, help="电阻定位模型路径 (*.pt)")
+    parser.add_argument("-l", "--labels", help="YOLO 格式标注文件夹（默认与 images 同级的 labels）")
+    parser.add_argument("--tiles", type=int, nargs="+", default=[0, 1280, 1024, 640], help="分块边长列表（0 表示整图）")
+    parser.add_argument("--overlap", type=float, default=0.25, help="相邻分块重叠比例")
+    parser.add_argument("--batch", type=int, default=8, help="每批推理的分块数量")
+    parser.add_argument("--conf", type=float, default=0.05, help="置信度阈值")
+    args = parser.parse_args()
+    benchmark(args.model, args.images, args.labels, args.tiles, args.overlap, args.batch, args.conf)
@@ -0,0 +1,121 @@
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+from BandOrdering import to_numpy
+
+
+def make_tiles(height, width, tile_size=1024, overlap=0.25):
+    """
+    将图像划分为相互重叠的正方形分块，末尾分块向内对齐以保证尺寸一致
+    :param height: 图像高度
+    :param width: 图像宽度
+    :param tile_size: 分块边长（像素）
+    :param overlap: 相邻分块的重叠比例
+    :return: [(x1, y1, x2, y2), ...]
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        positions.append(length - tile_size)
+        return positions
+
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+
+def box_overlap(box, boxes, metric="ios"):
+    """
+    计算一个框与多个框的重叠度
+    :param metric: "iou" 为交并比，"ios" 为交集与较小框面积之比（可合并被分块边界截断的框）
+    """
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    if metric == "iou":
+        return inter / np.maximum(area + areas - inter, 1e-9)
+    return inter / np.maximum(np.minimum(area, areas), 1e-9)
+
+
+def merge_detections(data, threshold=0.5, metric="ios"):
+    """
+    跨分块非极大值抑制（按类别进行）
+    :param data: N×6 数组 [x1, y1, x2, y2, conf, cls]
+    :return: 保留的检测框，按置信度降序排列
+    """
+    data = data[np.argsort(-data[:, 4], kind="stable")]
+    keep = []
+    suppressed = np.zeros(len(data), dtype=bool)
+    for i in range(len(data)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        rest = np.flatnonzero(~suppressed[i + 1:]) + i + 1
+        rest = rest[data[rest, 5] == data[i, 5]]
+        if len(rest):
+            suppressed[rest[box_overlap(data[i], data[rest], metric) > threshold]] = True
+    return data[keep]
+
+
+class TiledDetector:
+    """
+    分块检测：将高分辨率图像切成重叠分块后批量推理，
+    再把各分块的检测框映射回原图并做跨分块NMS，结果格式与 model(image)[0] 一致
+    """
+
+    def __init__(self, model, tile_size=1024, overlap=0.25, batch_size=8, imgsz=None,
+                 merge_threshold=0.5, merge_metric="ios", full_image=False):
+        self.model = model
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.imgsz = imgsz or tile_size  # 分块推理尺寸，默认与分块相同即不缩放
+        self.merge_threshold = merge_threshold
+        self.merge_metric = merge_metric
+        self.full_image = full_image  # 是否额外进行整图推理，用于检出跨越多个分块的大目标
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def settings(self):
+        """分块参数（用作检测缓存键的一部分）"""
+        return (self.tile_size, self.overlap, self.imgsz, self.merge_threshold, self.merge_metric, self.full_image)
+
+    def __call__(self, image, conf=0.25, **predict_kwargs):
+        predict_kwargs.setdefault("verbose", False)
+        height, width = image.shape[:2]
+        # 图像不大于单个分块时直接整图推理
+        if max(height, width) <= self.tile_size:
+            return self.model(image, conf=conf, **predict_kwargs)
+
+        tiles = make_tiles(height, width, self.tile_size, self.overlap)
+        detections = []
+        for start in range(0, len(tiles), self.batch_size):
+            chunk = tiles[start:start + self.batch_size]
+            batch = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in chunk]
+            results = self.model.predict(batch, imgsz=self.imgsz, conf=conf, **predict_kwargs)
+            for (x1, y1, _, _), result in zip(chunk, results):
+                if result.boxes is None or len(result.boxes) == 0:
+                    continue
+                data = to_numpy(result.boxes.data)[:, [0, 1, 2, 3, -2, -1]].astype(np.float32)
+                data[:, [0, 2]] += x1
+                data[:, [1, 3]] += y1
+                detections.append(data)
+
+        if self.full_image:
+            result = self.model(image, conf=conf, **predict_kwargs)[0]
+            if result.boxes is not None and len(result.boxes):
+                detections.append(to_numpy(result.boxes.data)[:, [0, 1, 2, 3, -2, -1]].astype(np.float32))
+
+        merged = merge_detections(np.concatenate(detections), self.merge_threshold, self.merge_metric) \
+            if detections else np.zeros((0, 6), dtype=np.float32)
+        return [Results(image, path="", names=self.model.names, boxes=torch.from_numpy(merged))]
+
+    predict = __call__
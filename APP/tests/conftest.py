@@ -0,0 +1,6 @@
+import os
+import sys
+
+# 程序模块按文件名直接导入（与在 APP 目录下运行一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
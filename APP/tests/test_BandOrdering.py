@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+import THTColorDetect
+from BandOrdering import plot_predictions
+from BandOrderingBenchmark import FakeBoxes, FakeResult, legacy_plot_predictions, random_case
+
+COLORS = {i: name for i, name in enumerate(
+    ["red", "yellow", "black", "gold", "orange", "blue", "brown", "green", "purple", "white", "gray"])}
+IMAGE = np.zeros((640, 640, 3), dtype=np.uint8)
+
+
+def make_results(centers, conf=None, cls=None, size=(10, 40)):
+    """由中心点构造检测结果（框宽高固定）"""
+    centers = np.asarray(centers, dtype=np.float32)
+    n = len(centers)
+    conf = np.full(n, 0.9) if conf is None else np.asarray(conf)
+    cls = np.arange(n) % len(COLORS) if cls is None else np.asarray(cls)
+    half = np.array(size, dtype=np.float32) / 2
+    data = np.concatenate((centers - half, centers + half, conf[:, None], cls[:, None]), axis=1).astype(np.float32)
+    return [FakeResult(FakeBoxes(data))]
+
+
+def vectorized(results):
+    return plot_predictions(IMAGE, results, COLORS, draw=False)[1]
+
+
+def test_random_layouts_match_legacy():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        results = random_case(rng)
+        assert vectorized(results) == legacy_plot_predictions(results, COLORS)
+
+
+@pytest.mark.parametrize("bands", [3, 4, 5])
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("vertical", [False, True])
+def test_band_counts_match_legacy(bands, reverse, vertical):
+    # 色环 i 的类别为 i，误差环（最后一环）前间隔较大；reverse 时电阻反向放置
+    positions = np.array([100 + 30 * i for i in range(bands)])
+    positions[-1] += 30
+    if reverse:
+        positions = 400 - positions
+    centers = [(320, p) if vertical else (p, 320) for p in positions]
+    order = np.random.default_rng(bands).permutation(bands)  # 检测输出顺序随机
+    results = make_results(np.asarray(centers)[order], cls=order)
+
+    assert vectorized(results) == legacy_plot_predictions(results, COLORS)
+    assert vectorized(results) == [COLORS[i] for i in range(bands)]
+
+
+@pytest.mark.parametrize("centers", [
+    [(100, 320), (100, 320), (130, 320), (160, 320)],  # 中心完全重合
+    [(100, 300), (100, 340), (130, 320), (160, 320)],  # x 相同、y 不同
+    [(100, 320), (130, 320), (160, 320), (190, 320)],  # 等间隔，最大间隔并列
+    [(100, 320), (130, 320), (160, 320), (190, 320), (220, 320)],
+    [(100, 100), (130, 130), (160, 160)],  # 45 度，横纵跨度相同
+])
+@pytest.mark.parametrize("conf", ["equal", "rising"])
+def test_ties_match_legacy(centers, conf):
+    n = len(centers)
+    scores = np.full(n, 0.8) if conf == "equal" else np.linspace(0.6, 0.9, n)
+    for permutation in (np.arange(n), np.arange(n)[::-1], np.roll(np.arange(n), 1)):
+        results = make_results(np.asarray(centers)[permutation], scores[permutation], permutation)
+        assert vectorized(results) == legacy_plot_predictions(results, COLORS)
+
+
+def legacy_tht_order(results):
+    """THTColorDetect 原逐框实现（只保留排序部分）：按到其他框的总距离从大到小排列后，按中心 x 稳定排序"""
+    detections = []
+    for box in results[0].boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        conf = float(box.conf.item())
+        if conf < 0.5:
+            continue
+        detections.append({'center': ((x1 + x2) // 2, (y1 + y2) // 2), 'color': COLORS[int(box.cls.item())]})
+
+    ref_points = []
+    for i, det in enumerate(detections):
+        total_dist = 0
+        for j, other in enumerate(detections):
+            if i != j:
+                x1, y1 = det['center']
+                x2, y2 = other['center']
+                total_dist += np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+        ref_points.append((i, total_dist))
+    ref_points.sort(key=lambda x: -x[1])
+    valid_detections = [detections[x[0]] for x in ref_points]
+    valid_detections.sort(key=lambda x: x['center'][0])
+    return [det['color'] for det in valid_detections]
+
+
+def tht_order(results):
+    return THTColorDetect.plot_predictions(IMAGE, results, COLORS)[1]
+
+
+@pytest.mark.parametrize("bands", [3, 4, 5])
+def test_tht_order_matches_legacy(bands):
+    rng = np.random.default_rng(bands)
+    for _ in range(300):
+        centers = np.stack((rng.permutation(np.arange(bands) * 30 + 100), rng.integers(300, 340, bands)), axis=1)
+        results = make_results(centers, rng.uniform(0.3, 1.0, bands))
+        assert tht_order(results) == legacy_tht_order(results)
+
+
+@pytest.mark.parametrize("centers", [
+    [(100, 320), (100, 200), (160, 320)],  # x 相同，离群程度不同
+    [(100, 320), (100, 320), (130, 320), (160, 320)],  # 中心完全重合
+    [(100, 100), (100, 130), (100, 160), (100, 220)],  # 竖直电阻，x 全部相同
+    [(100, 100), (101, 130), (100, 160), (101, 190), (100, 250)],  # 接近竖直
+    [(100, 100), (130, 100), (100, 130), (130, 130)],  # 总距离并列
+])
+def test_tht_order_ties_match_legacy(centers):
+    n = len(centers)
+    for permutation in (np.arange(n), np.arange(n)[::-1], np.roll(np.arange(n), 1)):
+        results = make_results(np.asarray(centers)[permutation], cls=permutation)
+        assert tht_order(results) == legacy_tht_order(results)
+
+
+def test_tht_order_random_near_vertical_matches_legacy():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = int(rng.integers(1, 7))
+        centers = np.stack((rng.integers(100, 104, n), rng.integers(0, 8, n) * 30 + 100), axis=1)
+        results = make_results(centers, rng.uniform(0.3, 1.0, n), rng.integers(0, 11, n))
+        assert tht_order(results) == legacy_tht_order(results)
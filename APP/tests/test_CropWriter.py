@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+from CropWriter import CropWriter
+
+
+class ListLogger:
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, level="INFO"):
+        self.messages.append((level, message))
+
+
+def make_crops(image, boxes):
+    """与 crop_resistors 返回格式一致：(编号, 坐标, 类别, 置信度, 裁剪视图)"""
+    return [(i, (x1, y1), "resistor", 0.9, image[y1:y2, x1:x2]) for i, (x1, y1, x2, y2) in enumerate(boxes)]
+
+
+def test_writes_views_of_each_board(tmp_path):
+    image = np.random.default_rng(0).integers(0, 256, (50, 80, 3), dtype=np.uint8)
+    writer = CropWriter(str(tmp_path / "crops"))
+    crops = make_crops(image, [(0, 0, 20, 10), (30, 5, 70, 45)])
+    writer.save("board", crops)
+    writer.save("other", crops[:1])
+    writer.flush()
+
+    assert writer.written == 3 and writer.failed == 0
+    assert sorted(p.name for p in (tmp_path / "crops").iterdir()) == ["board_1.png", "board_2.png", "other_1.png"]
+    for i, _, _, _, crop in crops:
+        assert np.array_equal(cv2.imread(str(tmp_path / "crops" / f"board_{i + 1}.png")), crop)
+    writer.close()
+    assert writer.thread is None
+
+
+def test_nothing_is_created_until_saving(tmp_path):
+    writer = CropWriter(str(tmp_path / "crops"))
+    writer.flush()
+    writer.close()
+    assert not (tmp_path / "crops").exists()
+
+
+def test_failed_writes_are_counted_and_logged(tmp_path):
+    logger = ListLogger()
+    writer = CropWriter(str(tmp_path / "crops"), logger=logger)
+    image = np.zeros((10, 10, 3), np.uint8)
+    writer.save("missing/board", make_crops(image, [(0, 0, 5, 5)]))  # 子文件夹不存在
+    writer.close()
+
+    assert (writer.written, writer.failed) == (0, 1)
+    assert logger.messages and logger.messages[0][0] == "ERROR"
@@ -0,0 +1,80 @@
+import gc
+import os
+import weakref
+import numpy as np
+from DetectionCache import DetectionCache, image_hash, model_key
+from ModelRegistry import SharedModel
+
+
+class FakeModel:
+    def __init__(self, path=None):
+        self.path = path
+        self.calls = 0
+
+    def __call__(self, image, **params):
+        self.calls += 1
+        return [("results", self.calls)]
+
+
+IMAGE = np.zeros((8, 8, 3), np.uint8)
+
+
+def test_image_hash_depends_on_content_and_shape():
+    assert image_hash(IMAGE) == image_hash(IMAGE.copy())
+    assert image_hash(IMAGE) != image_hash(np.zeros((8, 8, 1), np.uint8))
+    assert image_hash(IMAGE) != image_hash(IMAGE + 1)
+
+
+def test_models_with_same_weights_share_entries(tmp_path):
+    weights = tmp_path / "det.pt"
+    weights.write_bytes(b"weights")
+    cache = DetectionCache()
+    first, second = FakeModel(str(weights)), FakeModel(str(weights))
+
+    results = cache.detect(first, IMAGE, conf=0.5)
+    assert cache.detect(second, IMAGE, conf=0.5) is results
+    assert cache.detect(second, IMAGE, conf=0.25) is not results
+    assert (first.calls, second.calls) == (1, 1)
+
+
+def test_rewritten_weights_miss(tmp_path):
+    weights = tmp_path / "det.pt"
+    weights.write_bytes(b"old")
+    cache = DetectionCache()
+    model = FakeModel(str(weights))
+    cache.detect(model, IMAGE)
+    os.utime(weights, (1, 1))
+    cache.detect(model, IMAGE)
+    assert model.calls == 2
+
+
+def test_cache_does_not_keep_models_alive(tmp_path):
+    weights = tmp_path / "det.pt"
+    weights.write_bytes(b"weights")
+    cache = DetectionCache()
+    model = SharedModel(FakeModel(str(weights)), str(weights), (str(weights), 0.0, 0))
+    ref = weakref.ref(model)
+    cache.detect(model, IMAGE)
+    assert model_key(model) == (str(weights), 0.0, 0)
+
+    del model
+    gc.collect()
+    assert ref() is None
+
+
+def test_model_without_weights_is_not_cached():
+    cache = DetectionCache()
+    model = FakeModel()
+    cache.detect(model, IMAGE)
+    cache.detect(model, IMAGE)
+    assert model.calls == 2 and not cache.entries
+
+
+def test_lru_bound():
+    cache = DetectionCache(max_entries=2)
+    model = SharedModel(FakeModel(), "det.pt", ("det.pt", 0.0, 0))
+    for value in range(3):
+        cache.detect(model, IMAGE + value)
+    assert len(cache.entries) == 2
+    assert cache.get(image_hash(IMAGE), model) is None
+    assert cache.get(image_hash(IMAGE + 2), model) is not None
@@ -0,0 +1,75 @@
+import threading
+import numpy as np
+import cv2
+import pytest
+from PySide6 import QtWidgets
+import DetectionMode1
+from InferenceWorker import InferenceJob
+from InspectionPipeline import ConsoleLogger
+from OutputWindow import OutputWindow
+
+
+@pytest.fixture
+def page(tmp_path, monkeypatch):
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    monkeypatch.chdir(tmp_path)
+    gate = threading.Event()
+
+    def slow_get_model(path, backend=None):
+        assert gate.wait(5)  # 色环检测模型预加载中
+        return f"model:{path}"
+
+    monkeypatch.setattr(DetectionMode1, "get_model", slow_get_model)
+    page = DetectionMode1.DetectionModePage1(ConsoleLogger())
+    output_window = OutputWindow(ConsoleLogger())
+    output_window.store_path = tmp_path / "results.db"
+    page.set_output_window(output_window, 0)
+    for name, value in (("a.png", 0), ("b.png", 255)):
+        cv2.imwrite(str(tmp_path / name), np.full((16, 16, 3), value, np.uint8))
+    yield page, tmp_path
+    gate.set()
+    page.engine.wait_for_done()
+
+
+def detection_job(page):
+    job = InferenceJob(lambda job: None)
+    job.context = {"image_path": page.image_path, "image_key": page.image_key, "model": "det.pt"}
+    job.mode_id = page.mode_id
+    return job
+
+
+def test_load_image_clears_rows_while_preloading(page):
+    page, folder = page
+    assert page.engine.is_busy()
+    page.load_image(str(folder / "a.png"))
+    page.output_window.add_detection_result((1, 1), "resistor", 0.9, mode_id=0)
+
+    page.load_image(str(folder / "b.png"))
+    assert page.output_window.row_count(0) == 0
+
+
+def test_results_of_previous_image_are_dropped(page):
+    page, folder = page
+    page.load_image(str(folder / "a.png"))
+    job = detection_job(page)
+    page.load_image(str(folder / "b.png"))
+
+    page.on_board_detected(job, "old results", np.zeros((8, 8, 3), np.uint8))
+    page.on_resistor_result(job, {"coords": (1, 1), "class": "resistor", "confidence": 0.9, "text": "1k"})
+    page.on_detection_finished(job)
+
+    assert page.results is None and page.base_result_image is None
+    assert page.output_window.row_count(0) == 0
+
+
+def test_opening_another_image_cancels_its_queued_job(page):
+    page, folder = page
+    page.load_image(str(folder / "a.png"))
+    job = detection_job(page)
+    page.engine.jobs.append(job)  # 排队中的检测任务（预加载任务仍在执行）
+    preload = [other for other in page.engine.jobs if other is not job]
+
+    page.load_image(str(folder / "b.png"))
+    assert job.is_cancelled()
+    assert not any(other.is_cancelled() for other in preload)
+    page.engine.jobs.remove(job)
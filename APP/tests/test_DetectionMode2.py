@@ -0,0 +1,34 @@
+import numpy as np
+import torch
+from PySide6 import QtWidgets
+from ultralytics.engine.results import Results
+import DetectionMode2
+from InferenceWorker import InferenceJob
+from InspectionPipeline import ConsoleLogger
+
+
+class RecordingCache:
+    def __init__(self):
+        self.image_keys = []
+
+    def detect(self, model, image, predict, image_key=None, **params):
+        self.image_keys.append(image_key)
+        return predict(image)
+
+
+def test_detection_reuses_image_key_from_load(tmp_path, monkeypatch):
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    monkeypatch.chdir(tmp_path)
+    hashed = []
+    monkeypatch.setattr(DetectionMode2, "image_hash", lambda image: hashed.append(image) or "key")
+    page = DetectionMode2.DetectionModePage2(ConsoleLogger())
+    page.result_cache = cache = RecordingCache()
+
+    assert page.load_image(str(tmp_path / "board.png"), np.zeros((16, 16, 3), np.uint8))
+    model = lambda img: [Results(img, path="", names={0: "r"}, boxes=torch.zeros((0, 6)))]
+    for _ in range(2):
+        job = InferenceJob(page.run_detection, page.current_image, page.image_key, model)
+        job.run()
+
+    assert len(hashed) == 1
+    assert cache.image_keys == ["key", "key"]
@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+from PySide6 import QtWidgets
+import DetectionMode3
+from InspectionPipeline import ConsoleLogger
+
+
+class FakeInspector:
+    joining = threading.Event()  # 模拟检测线程仍在处理一帧
+    joining.set()
+
+    def __init__(self, source, pipeline):
+        self.source = source
+        self.pipeline = pipeline
+        self.started = False
+        self.joined = False
+        self.error = None
+        self.latest_frame = None
+
+    def start(self):
+        self.started = True
+
+    def request_stop(self):
+        self.started = False
+
+    def join(self):
+        assert FakeInspector.joining.wait(5)
+        self.source.release()
+        self.joined = True
+
+    def is_running(self):
+        return self.started
+
+
+@pytest.fixture
+def page(tmp_path, monkeypatch):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    monkeypatch.chdir(tmp_path)
+    gate = threading.Event()
+
+    def slow_get_model(path):
+        assert gate.wait(5)  # 模拟耗时的加载和预热
+        return f"model:{path}"
+
+    monkeypatch.setattr(DetectionMode3, "get_model", slow_get_model)
+    monkeypatch.setattr(DetectionMode3, "InspectionPipeline", lambda model, tht_model, *args, **kwargs: (model, tht_model))
+    monkeypatch.setattr(DetectionMode3, "LiveInspector", FakeInspector)
+    page = DetectionMode3.DetectionModePage3(ConsoleLogger())
+    page.combo_source.setCurrentText("模拟画面")
+    page.model_file = "det.pt"
+    page.model_path = "det.pt"
+    yield app, page, gate
+    gate.set()
+    page.stop_inspection()
+    page.engine.wait_for_done()
+
+
+def wait_until(app, condition, timeout=5.0):
+    end = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_start_loads_models_off_the_ui_thread(page):
+    app, page, gate = page
+    start = time.perf_counter()
+    page.start_inspection()
+    assert time.perf_counter() - start < 1
+    assert page.inspector is None and page.start_job is not None
+
+    gate.set()
+    assert wait_until(app, lambda: page.inspector is not None)
+    assert page.inspector.started
+    assert page.inspector.pipeline == ("model:det.pt", f"model:{page.tht_model_path}")
+    assert page.model == "model:det.pt"
+
+
+def test_stop_while_loading_releases_source(page, monkeypatch):
+    app, page, gate = page
+    events = []
+    monkeypatch.setattr(DetectionMode3.SyntheticSource, "__init__", lambda self: events.append("open"))
+    monkeypatch.setattr(DetectionMode3.SyntheticSource, "release", lambda self: events.append("release"), raising=False)
+    page.start_inspection()
+    assert wait_until(app, lambda: events)  # 帧来源已在后台打开，正在加载模型
+    page.stop_inspection()
+    gate.set()
+
+    assert wait_until(app, lambda: events == ["open", "release"] and not page.engine.is_busy())
+    assert page.inspector is None
+
+
+def test_stop_does_not_wait_for_running_inspection(page, monkeypatch):
+    app, page, gate = page
+    events = []
+    monkeypatch.setattr(DetectionMode3.SyntheticSource, "__init__", lambda self: events.append("open"))
+    monkeypatch.setattr(DetectionMode3.SyntheticSource, "release", lambda self: events.append("release"), raising=False)
+    monkeypatch.setattr(FakeInspector, "joining", threading.Event())
+    gate.set()
+    page.start_inspection()
+    assert wait_until(app, lambda: page.inspector is not None)
+    inspector = page.inspector
+
+    start = time.perf_counter()
+    page.stop_inspection()
+    page.start_inspection()
+    assert time.perf_counter() - start < 1
+    assert page.inspector is None and not inspector.joined
+
+    # 新的帧来源在上一次停止完成（旧来源释放）之后才打开
+    FakeInspector.joining.set()
+    assert wait_until(app, lambda: page.inspector is not None)
+    assert inspector.joined
+    assert events == ["open", "release", "open"]
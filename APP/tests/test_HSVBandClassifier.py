@@ -0,0 +1,92 @@
+import os
+import cv2
+import numpy as np
+import pytest
+import HSVBandClassifier as hsv_module
+from HSVBandClassifier import HSVBandClassifier, UNKNOWN, build_bgr_lut, label_pixels, lut_cache_path, lut_order
+from THTColorDefine import color_ranges
+
+BOARD, BODY = (40, 90, 30), (170, 200, 220)
+
+
+def hsv_to_bgr(h, s, v):
+    return tuple(int(c) for c in cv2.cvtColor(np.uint8([[[h, s, v]]]), cv2.COLOR_HSV2BGR)[0, 0])
+
+
+BAND_COLORS = {"红": hsv_to_bgr(0, 220, 200), "绿": hsv_to_bgr(55, 200, 200), "蓝": hsv_to_bgr(112, 200, 200),
+               "黄": hsv_to_bgr(30, 200, 220), "金": hsv_to_bgr(27, 180, 150), "棕": hsv_to_bgr(15, 100, 60)}
+
+
+@pytest.fixture(scope="module")
+def cache_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("lut"))
+
+
+def in_range_labels(image, ranges=color_ranges):
+    """逐颜色 inRange 的参考实现（后写入的颜色优先）"""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    reference = np.full(image.shape[:2], UNKNOWN, dtype=np.uint8)
+    for index, name in enumerate(lut_order(ranges)):
+        spec = ranges[name]
+        for lower, upper in (spec if isinstance(spec[0], list) else [spec]):
+            reference[cv2.inRange(hsv, np.array(lower), np.array(upper)) > 0] = index
+    return reference
+
+
+def make_resistor(bands, positions, width=8):
+    """电路板背景上的水平电阻，色环按 positions 放置"""
+    image = np.full((60, 200, 3), BOARD, dtype=np.uint8)
+    image[15:45, 20:180] = BODY
+    for color, x in zip(bands, positions):
+        image[15:45, x:x + width] = BAND_COLORS[color]
+    return image
+
+
+def test_bgr_lut_matches_in_range(cache_dir):
+    lut, labels = build_bgr_lut(cache_dir=cache_dir)
+    image = np.random.default_rng(0).integers(0, 256, (256, 256, 3), dtype=np.uint8)
+    np.testing.assert_array_equal(label_pixels(image, lut), in_range_labels(image))
+    assert labels[lut_order(color_ranges).index("gold")] == "金"
+
+
+def test_bgr_lut_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(hsv_module, "_lut_cache", {})
+    ranges = {"red": [(0, 50, 50), (10, 255, 255)], "blue": [(100, 50, 50), (124, 255, 255)]}
+    lut, _ = build_bgr_lut(ranges, bits=6, cache_dir=str(tmp_path))
+    path = lut_cache_path(ranges, bits=6, cache_dir=str(tmp_path))
+    assert lut.shape == (64, 64, 64) and os.path.exists(path)
+
+    # 进程内缓存清空后从磁盘读取
+    monkeypatch.setattr(hsv_module, "_lut_cache", {})
+    monkeypatch.setattr(hsv_module, "build_hsv_lut", lambda *args: pytest.fail("should load from disk"))
+    np.testing.assert_array_equal(build_bgr_lut(ranges, bits=6, cache_dir=str(tmp_path))[0], lut)
+
+    # 颜色范围修改后生成新文件并删除旧文件
+    monkeypatch.undo()
+    monkeypatch.setattr(hsv_module, "_lut_cache", {})
+    changed = dict(ranges, blue=[(100, 60, 50), (124, 255, 255)])
+    build_bgr_lut(changed, bits=6, cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == [os.path.basename(lut_cache_path(changed, bits=6, cache_dir=str(tmp_path)))]
+
+
+@pytest.mark.parametrize("bands", [["红", "绿", "蓝", "金"], ["黄", "蓝", "红", "金"], ["红", "绿", "蓝", "棕"]])
+def test_reads_bands_in_order_from_either_end(cache_dir, bands):
+    # 误差环前间隔更大：无论电阻朝哪个方向放置都按读数顺序输出
+    classifier = HSVBandClassifier(cache_dir=cache_dir)
+    image = make_resistor(bands, [45, 65, 85, 140])
+    for view in (image, image[:, ::-1], np.rot90(image), np.rot90(image, -1)):
+        colors, confidence = classifier.classify(np.ascontiguousarray(view))
+        assert colors == bands
+        assert confidence == pytest.approx(1.0)
+
+
+def test_gold_first_is_reversed(cache_dir):
+    classifier = HSVBandClassifier(cache_dir=cache_dir)
+    image = make_resistor(["金", "红", "绿", "蓝"], [45, 70, 100, 125])  # 金在开头且最大间距不在开头
+    assert classifier.classify(image)[0] == ["蓝", "绿", "红", "金"]
+
+
+def test_plain_body_has_no_bands(cache_dir):
+    classifier = HSVBandClassifier(cache_dir=cache_dir)
+    assert classifier.classify(make_resistor([], [])) == ([], 0.0)
+    assert classifier.classify(np.zeros((2, 50, 3), np.uint8)) == ([], 0.0)
@@ -0,0 +1,42 @@
+import os
+import cv2
+import numpy as np
+import pytest
+from ImageSource import ImageSource, list_images
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for i in range(12):
+        cv2.imwrite(str(tmp_path / f"{i:02d}.png"), np.full((4, 6, 3), i, np.uint8))
+    (tmp_path / "notes.txt").write_text("not an image")
+    (tmp_path / "broken.jpg").write_bytes(b"not a jpeg")
+    return tmp_path
+
+
+def test_list_images_sorted_and_filtered(folder):
+    names = [os.path.basename(path) for path in list_images(str(folder))]
+    assert names == [f"{i:02d}.png" for i in range(12)] + ["broken.jpg"]
+
+
+def test_yields_in_input_order(folder):
+    paths = [str(folder / f"{i:02d}.png") for i in reversed(range(12))]
+    with ImageSource(paths, workers=4, prefetch=3) as source:
+        items = list(source)
+    assert [path for path, _ in items] == paths
+    assert [int(image[0, 0, 0]) for _, image in items] == list(reversed(range(12)))
+    assert items[0][1].shape == (4, 6, 3)  # 原分辨率解码
+
+
+def test_unreadable_image_is_none(folder):
+    items = dict(ImageSource(str(folder)))
+    assert items[str(folder / "broken.jpg")] is None
+    assert sum(image is not None for image in items.values()) == 12
+
+
+def test_prefetch_is_bounded(folder):
+    source = ImageSource(str(folder), workers=2, prefetch=3)
+    next(source)
+    assert source._next == 4  # 已取出 1 张，最多 3 张在途
+    source.close()
+    assert next(source, None) is None
@@ -0,0 +1,126 @@
+import json
+import os
+import numpy as np
+import pytest
+from ultralytics.data.augment import LetterBox
+from InferenceBackend import OnnxModel, PREPROCESS_VERSION, letterbox, quantized_model_path, resolve_model_path
+
+SHAPES = [(6, 24), (60, 200), (160, 40), (300, 300), (700, 90)]
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_letterbox_matches_ultralytics(shape):
+    image = np.random.default_rng(sum(shape)).integers(0, 256, (*shape, 3), dtype=np.uint8)
+    assert np.array_equal(letterbox(image, 640, stride=32), LetterBox(640, auto=True, stride=32)(image=image))
+    assert np.array_equal(letterbox(image, 640), LetterBox(640, auto=False)(image=image))
+    assert np.array_equal(letterbox(image, (320, 640)), LetterBox((320, 640), auto=False)(image=image))
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """best.pt 旁边已导出 FP32 和通过校验的 INT8 模型"""
+    for name in ("best.pt", "best.onnx", "best_int8.onnx"):
+        (tmp_path / name).write_bytes(b"model")
+    gate = {"accepted": True, "source_mtime": os.path.getmtime(tmp_path / "best.onnx"),
+            "preprocess": PREPROCESS_VERSION, "imgsz": 640}
+    return tmp_path, gate
+
+
+def write_gate(tmp_path, gate):
+    (tmp_path / "best_int8.json").write_text(json.dumps(gate), encoding="utf-8")
+
+
+def test_accepted_gate_selects_int8(exported):
+    tmp_path, gate = exported
+    write_gate(tmp_path, gate)
+    onnx_path = str(tmp_path / "best.onnx")
+    assert quantized_model_path(onnx_path) == str(tmp_path / "best_int8.onnx")
+    assert resolve_model_path(str(tmp_path / "best.pt"), "onnx") == str(tmp_path / "best_int8.onnx")
+    assert resolve_model_path(str(tmp_path / "best.pt"), "onnx", quantized=False) == onnx_path
+    assert resolve_model_path(str(tmp_path / "best.pt")) == str(tmp_path / "best.pt")
+
+
+@pytest.mark.parametrize("change", [
+    {"accepted": False},
+    {"source_mtime": 0.0},
+    {"preprocess": PREPROCESS_VERSION - 1},
+    {"preprocess": None},
+    {"imgsz": 320},
+])
+def test_gate_mismatch_falls_back_to_fp32(exported, change):
+    tmp_path, gate = exported
+    gate.update(change)
+    write_gate(tmp_path, {key: value for key, value in gate.items() if value is not None})
+    assert quantized_model_path(str(tmp_path / "best.onnx")) is None
+    assert resolve_model_path(str(tmp_path / "best.pt"), "onnx") == str(tmp_path / "best.onnx")
+
+
+def test_gate_checks_runtime_imgsz(exported):
+    tmp_path, gate = exported
+    gate["imgsz"] = 320
+    write_gate(tmp_path, gate)
+    assert quantized_model_path(str(tmp_path / "best.onnx"), imgsz=320) == str(tmp_path / "best_int8.onnx")
+
+
+class RawOutputSession:
+    """推理会话：记录输入并返回给定的原始输出（(4+类别数)×锚点数，坐标为输入图像的中心点宽高）"""
+
+    def __init__(self, output):
+        self.output = output
+        self.batches = []
+
+    def run(self, output_names, feeds):
+        batch = feeds["images"]
+        self.batches.append(batch)
+        return [np.repeat(self.output[None], len(batch), axis=0)]
+
+
+class RawOutputModel(OnnxModel):
+    """不加载 ONNX 文件，使用返回固定原始输出的推理会话"""
+
+    def __init__(self, output, fixed_imgsz=None, fixed_batch=None):
+        self.names = {0: "red", 1: "gold"}
+        self.stride = 32
+        self.end2end = False
+        self.fixed_imgsz = fixed_imgsz
+        self.fixed_batch = fixed_batch
+        self.default_imgsz = (640, 640)
+        self.input_name = "images"
+        self.session = RawOutputSession(output)
+
+
+def raw_output(anchors):
+    """anchors: [(cx, cy, w, h, 类别, 置信度)]"""
+    output = np.zeros((6, len(anchors)), np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(anchors):
+        output[:4, i] = (cx, cy, w, h)
+        output[4 + cls, i] = score
+    return output
+
+
+def test_postprocess_runs_nms_and_maps_back_to_image():
+    image = np.zeros((100, 200, 3), np.uint8)
+    model = RawOutputModel(raw_output([
+        (320, 160, 64, 32, 0, 0.9),
+        (322, 160, 64, 32, 0, 0.8),   # 与上一个框重叠，被 NMS 去掉
+        (322, 160, 64, 32, 1, 0.6),   # 其他类别保留
+        (100, 100, 32, 32, 0, 0.1),   # 低于置信度阈值
+    ]))
+
+    result, = model(image, conf=0.25, iou=0.7)
+    assert model.session.batches[0].shape == (1, 3, 320, 640)  # 矩形推理：长边 640，短边填充到步长整数倍
+    assert result.orig_img is image and result.names == model.names
+    np.testing.assert_allclose(result.boxes.conf.numpy(), [0.9, 0.6], rtol=1e-6)
+    np.testing.assert_array_equal(result.boxes.cls.numpy(), [0, 1])
+    np.testing.assert_allclose(result.boxes.xyxy.numpy()[0], [90, 45, 110, 55], atol=1e-4)
+
+
+def test_fixed_size_model_letterboxes_to_export_size():
+    image = np.zeros((100, 200, 3), np.uint8)
+    model = RawOutputModel(raw_output([(320, 320, 64, 32, 0, 0.9)]), fixed_imgsz=(640, 640), fixed_batch=1)
+
+    first, second = model([image, image])
+    assert [batch.shape for batch in model.session.batches] == [(1, 3, 640, 640)] * 2  # 固定批大小逐张运行
+    # 上下各填充 160 像素：输入中心 (320, 320) 对应原图中心
+    np.testing.assert_allclose(first.boxes.xyxy.numpy()[0], [90, 45, 110, 55], atol=1e-4)
+    np.testing.assert_allclose(second.boxes.xyxy.numpy(), first.boxes.xyxy.numpy())
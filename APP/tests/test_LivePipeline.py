@@ -0,0 +1,48 @@
+import threading
+import time
+import pytest
+from LivePipeline import FrameSource, LiveInspector, SyntheticSource
+
+
+class SlowPipeline:
+    """检测一帧需要等待外部放行"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def inspect(self, frame):
+        self.entered.set()
+        assert self.gate.wait(5)
+        raise RuntimeError("stopped")
+
+
+class RecordingSource(SyntheticSource):
+    def __init__(self):
+        super().__init__(width=64, height=48, fps=200.0, resistors=1)
+        self.released = threading.Event()
+
+    def release(self):
+        self.released.set()
+
+
+def test_frame_source_requires_read():
+    with pytest.raises(TypeError):
+        FrameSource()
+
+
+def test_request_stop_releases_source_without_waiting_for_inference():
+    source, pipeline = RecordingSource(), SlowPipeline()
+    inspector = LiveInspector(source, pipeline)
+    inspector.start()
+    assert pipeline.entered.wait(5)
+
+    start = time.perf_counter()
+    inspector.request_stop()
+    assert time.perf_counter() - start < 0.5
+    assert source.released.wait(1)  # 采集线程退出时自行释放
+    assert inspector.threads[1].is_alive()  # 检测线程仍在处理当前帧
+
+    pipeline.gate.set()
+    inspector.join()
+    assert inspector.threads == []
@@ -0,0 +1,98 @@
+import re
+import threading
+import pytest
+from PySide6 import QtCore, QtWidgets
+from PySide6.QtTest import QAbstractItemModelTester
+from LogWindow import LogModel, LogWidget, Logger
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def record_inserts(model):
+    """记录 rowsAboutToBeInserted 时的行数和插入范围"""
+    inserts = []
+    model.rowsAboutToBeInserted.connect(
+        lambda parent, first, last: inserts.append((model.rowCount(), first, last)))
+    return inserts
+
+
+@pytest.mark.parametrize("level_filter", ["ALL", "ERROR", "WARNING"])
+def test_model_tester_with_filter(app, level_filter):
+    model = LogModel(capacity=20)
+    model.set_filter(level_filter)
+    QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+
+    levels = ["INFO", "ERROR", "WARNING", "ERROR", "SUCCESS"]
+    for i in range(40):
+        model.append_entries([(f"{i}-{j}", level) for j, level in enumerate(levels[i % 3:])])
+        model.append_entries([(f"{i}", levels[i % len(levels)])])
+    expected = [text for text, level in model.entries if level_filter in ("ALL", level)]
+    assert [model.data(model.index(row)) for row in range(model.rowCount())] == expected
+
+
+def test_insert_range_starts_at_end_of_filtered_view(app):
+    model = LogModel()
+    model.set_filter("ERROR")
+    inserts = record_inserts(model)
+
+    model.append_entries([("a", "INFO"), ("b", "ERROR"), ("c", "ERROR")])
+    model.append_entries([("d", "INFO")])
+    model.append_entries([("e", "ERROR")])
+
+    # 通知时模型尚未改变，插入范围从当前末尾开始
+    assert inserts == [(0, 0, 1), (2, 2, 2)]
+    assert [model.data(model.index(row)) for row in range(model.rowCount())] == ["b", "c", "e"]
+
+
+def test_widget_keeps_view_model_accessor(app):
+    widget = LogWidget(capacity=10)
+    widget.append_log("hello", "INFO")
+    assert isinstance(widget.model(), LogModel)
+    assert widget.model() is widget.log_model
+    assert widget.model().data(widget.model().index(0)) == "hello"
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger = Logger(queue_size=1)
+    yield logger
+    logger.close()
+
+
+def test_dropped_count_is_exact_under_threads(logger):
+    # 生产线程并发累加、写入线程取出清零，写入条数加丢弃条数必须等于调用次数
+    def produce():
+        for _ in range(2000):
+            logger.log("x", "INFO")
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.close()
+
+    text = logger.log_file.read_text(encoding="utf-8")
+    written = text.count("INFO: x")
+    dropped = sum(int(n) for n in re.findall(r"丢弃 (\d+) 条日志", text))
+    assert written + dropped + logger.dropped == 8000
+
+
+def test_disabled_level_skips_formatting(logger):
+    class Message:
+        formatted = 0
+
+        def __format__(self, spec):
+            Message.formatted += 1
+            return "m"
+
+    message = Message()
+    logger.set_level("WARNING")
+    if logger.enabled("DEBUG"):
+        logger.log(f"{message}", "DEBUG")
+    if logger.enabled("ERROR"):
+        logger.log(f"{message}", "ERROR")
+    assert Message.formatted == 1
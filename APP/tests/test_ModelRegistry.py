@@ -0,0 +1,101 @@
+import threading
+import time
+import pytest
+import ModelRegistry
+from ModelRegistry import ModelRegistry as Registry
+
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+
+
+@pytest.fixture
+def weights(tmp_path):
+    paths = {}
+    for name in ("a", "b", "c"):
+        paths[name] = tmp_path / f"{name}.pt"
+        paths[name].write_bytes(name.encode())
+    return paths
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """记录加载次数，路径在 gates 中时等待对应事件后才返回"""
+    calls = []
+    gates = {}
+
+    def load_model(path, threads=0):
+        calls.append(path)
+        gate = gates.get(path)
+        if gate is not None:
+            assert gate.wait(5)
+        return FakeModel(path)
+
+    monkeypatch.setattr(ModelRegistry, "load_model", load_model)
+    return calls, gates
+
+
+def test_cached_model_not_blocked_by_other_load(weights, loads):
+    calls, gates = loads
+    registry = Registry()
+    cached = registry.get(weights["a"], warmup=False)
+
+    gate = gates[str(weights["b"])] = threading.Event()
+    loader = threading.Thread(target=registry.get, args=(weights["b"], False))
+    loader.start()
+    while str(weights["b"]) not in calls:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    assert registry.get(weights["a"], warmup=False) is cached
+    assert time.perf_counter() - start < 1
+    gate.set()
+    loader.join()
+
+
+def test_concurrent_requests_share_one_load(weights, loads):
+    calls, gates = loads
+    registry = Registry()
+    gate = gates[str(weights["a"])] = threading.Event()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get(weights["a"], warmup=False)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [str(weights["a"])]
+    assert len(results) == 4 and all(model is results[0] for model in results)
+    assert not registry.loading
+
+
+def test_failed_load_is_retried(weights, monkeypatch):
+    registry = Registry()
+
+    def broken(path, threads=0):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(ModelRegistry, "load_model", broken)
+    with pytest.raises(RuntimeError):
+        registry.get(weights["a"], warmup=False)
+    assert not registry.loading
+
+    monkeypatch.setattr(ModelRegistry, "load_model", lambda path, threads=0: FakeModel(path))
+    assert registry.get(weights["a"], warmup=False).path == str(weights["a"])
+
+
+def test_memory_pressure_evicts_lru_one_at_a_time(weights, loads, monkeypatch):
+    registry = Registry(max_models=4)
+    for name in ("a", "b", "c"):
+        registry.get(weights[name], warmup=False)
+    registry.get(weights["a"], warmup=False)  # a 变为最近使用
+
+    tight = [True]  # 只有淘汰一个模型之前内存不足
+    monkeypatch.setattr(registry, "memory_tight", lambda: tight.pop() if tight else False)
+    registry.evict()
+
+    assert [key[0] for key in registry.models] == [str(weights["c"]), str(weights["a"])]
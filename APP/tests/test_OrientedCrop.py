@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+import pytest
+from HSVBandClassifier import HSVBandClassifier
+from OrientedCrop import STRIP_SIZE, obb_strip, oriented_strip, strip_transform
+
+BANDS = ["红", "绿", "蓝", "金"]
+BAND_HSV = {"红": (0, 220, 200), "绿": (55, 200, 200), "蓝": (112, 200, 200), "金": (27, 180, 150)}
+CENTER = np.array([120.0, 120.0])
+
+
+def tilted_resistor(angle):
+    """电路板上按 angle（弧度）倾斜放置的电阻，本体长 160、宽 30，误差环前间隔更大"""
+    image = np.full((240, 240, 3), (40, 90, 30), dtype=np.uint8)
+    direction = np.array([np.cos(angle), np.sin(angle)])
+    normal = np.array([-direction[1], direction[0]])
+
+    def fill(start, end, color):
+        corners = [CENTER + start * direction - 15 * normal, CENTER + end * direction - 15 * normal,
+                   CENTER + end * direction + 15 * normal, CENTER + start * direction + 15 * normal]
+        cv2.fillPoly(image, [np.round(corners).astype(np.int32)], color)
+
+    fill(-80, 80, (170, 200, 220))
+    for name, offset in zip(BANDS, (-50, -30, -10, 40)):
+        bgr = cv2.cvtColor(np.uint8([[BAND_HSV[name]]]), cv2.COLOR_HSV2BGR)[0, 0]
+        fill(offset - 4, offset + 4, tuple(int(c) for c in bgr))
+    return image
+
+
+@pytest.fixture(scope="module")
+def classifier(tmp_path_factory):
+    return HSVBandClassifier(cache_dir=str(tmp_path_factory.mktemp("lut")))
+
+
+def test_strip_center_maps_to_resistor_center():
+    direction = np.array([np.cos(0.3), np.sin(0.3)])
+    matrix = strip_transform(CENTER, direction, 80, 15)
+    width, height = STRIP_SIZE
+    np.testing.assert_allclose(matrix @ [width / 2, height / 2, 1], CENTER)
+    # 条带水平方向沿主轴，等比例缩放
+    np.testing.assert_allclose(matrix[:, 0] / np.linalg.norm(matrix[:, 0]), direction)
+    assert np.linalg.norm(matrix[:, 0]) == pytest.approx(np.linalg.norm(matrix[:, 1]))
+
+
+@pytest.mark.parametrize("degrees", [0, 20, -35, 60, 90, 135])
+def test_tilted_resistor_becomes_readable_strip(classifier, degrees):
+    angle = np.deg2rad(degrees)
+    image = tilted_resistor(angle)
+
+    strip = oriented_strip(image)
+    assert strip.shape == (STRIP_SIZE[1], STRIP_SIZE[0], 3)
+    assert classifier.classify(strip)[0] == BANDS
+
+    # 旋转框宽高任意给出时以长边为主轴
+    for xywhr in ((*CENTER, 160, 30, angle), (*CENTER, 30, 160, angle - np.pi / 2)):
+        obb = obb_strip(image, xywhr)
+        assert obb.shape == strip.shape
+        assert classifier.classify(obb)[0] == BANDS
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from PySide6 import QtCore, QtWidgets
+from InferenceWorker import InferenceJob
+from InspectionPipeline import ConsoleLogger
+from OutputWindow import OutputWindow
+from ResultStore import ResultStore
+
+
+@pytest.fixture
+def output_window(tmp_path, monkeypatch):
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    monkeypatch.chdir(tmp_path)
+    window = OutputWindow(ConsoleLogger())
+    window.store_path = tmp_path / "results.db"
+    yield window
+    if window.store is not None:
+        window.store.close()
+
+
+def test_job_results_stay_in_submitting_mode(output_window):
+    from DetectionMode2 import DetectionModePage2
+
+    page = DetectionModePage2(ConsoleLogger())
+    page.set_output_window(output_window, 1)
+    output_window.add_detection_result((1, 1), "other", 0.5, mode_id=0)
+
+    job = InferenceJob(lambda job: None)
+    job.mode_id = page.mode_id
+    job.context = {"image_path": "board.jpg", "model": "det.pt"}
+
+    # 检测进行中切换到模式0的页面
+    output_window.switch_mode_cache(0)
+    page.on_board_detected(job, None, np.zeros((8, 8, 3), np.uint8))
+    page.on_object_result(job, {"coords": (2, 3), "class": "resistor", "confidence": 0.9})
+    page.on_detection_finished(job)
+
+    assert output_window.row_count(0) == 1
+    assert output_window.row_count() == 1
+    assert output_window.row_count(1) == 1
+    assert output_window.mode_model(1).row_values(0)[2] == "resistor"
+
+    runs = ResultStore(output_window.store_path).query_runs()
+    assert [(run["mode"], run["resistor_count"]) for run in runs] == [(1, 1)]
+
+
+def test_clear_results_defaults_to_current_mode(output_window):
+    output_window.add_detection_result((1, 1), "a", 0.5, mode_id=0)
+    output_window.add_detection_result((1, 1), "b", 0.5, mode_id=2)
+    output_window.switch_mode_cache(2)
+    output_window.btn_float.click()
+    assert output_window.row_count(2) == 0
+    assert output_window.row_count(0) == 1
+
+
+def test_mode_switches_do_not_pile_up_selection_models(output_window):
+    app = QtWidgets.QApplication.instance()
+    selections = []
+    output_window.logger.verbose = True
+    output_window.logger.log = lambda message, level="INFO": selections.append(message) if "选中" in message else None
+    for _ in range(5):
+        for mode_id in (1, 2, 0):
+            output_window.switch_mode_cache(mode_id)
+    output_window.switch_mode_cache(0)  # 切换到当前模式不重建
+    app.sendPostedEvents(None, QtCore.QEvent.Type.DeferredDelete.value)
+
+    table = output_window.table
+    direct = QtCore.Qt.FindChildOption.FindDirectChildrenOnly
+    for owner in (table, table.horizontalHeader(), table.verticalHeader()):
+        assert owner.findChildren(QtCore.QItemSelectionModel, options=direct) in ([], [table.selectionModel()])
+
+    output_window.add_detection_result((1, 1), "a", 0.5)
+    table.selectRow(0)
+    assert len(selections) == 1
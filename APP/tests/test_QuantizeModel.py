@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from InferenceBackend import OnnxModel
+from THTColorDetectNew import predict_batch
+
+pytest.importorskip("onnxruntime.quantization")
+from QuantizeModel import CropCalibrationReader
+
+
+class RecordingOnnxModel(OnnxModel):
+    """不加载 ONNX 文件，只记录送入推理会话的张量"""
+
+    def __init__(self, fixed_imgsz=None):
+        self.names = {0: "red"}
+        self.stride = 32
+        self.end2end = False
+        self.fixed_imgsz = fixed_imgsz
+        self.fixed_batch = None
+        self.default_imgsz = (640, 640)
+        self.input_name = "images"
+        self.inputs = []
+
+    def run(self, batch):
+        self.inputs.extend(batch)
+        return np.zeros((len(batch), 4 + len(self.names), 8), np.float32)
+
+
+@pytest.mark.parametrize("fixed_imgsz", [None, (640, 640)])
+def test_calibration_matches_runtime_batched_input(fixed_imgsz):
+    rng = np.random.default_rng(0)
+    crops = [rng.integers(0, 256, shape + (3,), dtype=np.uint8) for shape in [(6, 24), (48, 150), (70, 260), (160, 40)]]
+    model = RecordingOnnxModel(fixed_imgsz)
+    predict_batch(model, crops, 640, batch_size=1)
+
+    reader = CropCalibrationReader(crops, model, 640)
+    calibration = [item["images"][0] for item in iter(reader.get_next, None)]
+
+    assert len(calibration) == len(model.inputs) == len(crops)
+    for runtime, calibrated in zip(model.inputs, calibration):
+        assert np.array_equal(runtime, calibrated)
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+import ResultCache as result_cache_module
+from ResultCache import ResultCache
+
+NAMES = {0: "resistor", 1: "capacitor"}
+IMAGE = np.zeros((64, 64, 3), np.uint8)
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeModel:
+    names = NAMES
+
+    def __init__(self, path, results):
+        self.path = path
+        self.results = results
+        self.calls = 0
+
+    def __call__(self, image):
+        self.calls += 1
+        return [self.results]
+
+
+def make_results(**kwargs):
+    return Results(IMAGE, path="", names=NAMES, **kwargs)
+
+
+def test_boxes_round_trip(tmp_path):
+    cache = ResultCache(tmp_path / "cache.db")
+    data = torch.tensor([[1.5, 2.0, 30.25, 40.0, 0.9, 0.0], [5.0, 6.0, 7.0, 8.0, 0.3, 1.0]])
+    cache.save_detections("k", make_results(boxes=data))
+
+    restored = cache.load_detections("k", IMAGE, NAMES)
+    assert restored.obb is None
+    assert torch.equal(restored.boxes.data, data)
+    assert restored.names == NAMES and restored.orig_img is IMAGE
+    assert cache.load_detections("missing", IMAGE, NAMES) is None
+    cache.close()
+
+
+def test_obb_and_empty_round_trip(tmp_path):
+    cache = ResultCache(tmp_path / "cache.db")
+    data = torch.tensor([[20.0, 30.0, 16.0, 6.0, 0.5, 0.8, 1.0]])
+    cache.save_detections("obb", make_results(obb=data))
+    cache.save_detections("empty", make_results(boxes=torch.zeros((0, 6))))
+
+    restored = cache.load_detections("obb", IMAGE, NAMES)
+    assert restored.boxes is None
+    assert torch.equal(restored.obb.data, data)
+    assert len(cache.load_detections("empty", IMAGE, NAMES).boxes) == 0
+    cache.close()
+
+
+def test_bands_round_trip(tmp_path):
+    cache = ResultCache(tmp_path / "cache.db")
+    cache.save_bands("bands", ["红 红 黑 金", "未识别到色环"])
+    cache.save_bands("none", [])
+    assert cache.load_bands("bands") == ["红 红 黑 金", "未识别到色环"]
+    assert cache.load_bands("none") == []
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(result_cache_module.time, "time", lambda: next(clock))
+    cache = ResultCache(tmp_path / "cache.db", max_bytes=250)
+    for key in "abc":
+        cache.put(key, bytes(100))
+        if key == "b":
+            assert cache.get("a") is not None  # a 比 b 更近使用
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats() == (2, 200)
+    cache.close()
+
+
+def test_detect_reuses_entries_and_given_image_key(tmp_path, monkeypatch):
+    weights = tmp_path / "det.pt"
+    weights.write_bytes(b"weights")
+    cache = ResultCache(tmp_path / "cache.db")
+    model = FakeModel(str(weights), make_results(boxes=torch.tensor([[1.0, 2.0, 3.0, 4.0, 0.9, 0.0]])))
+    predict = lambda image: model(image)[0]
+
+    monkeypatch.setattr(result_cache_module, "image_hash", lambda image: "hashed")
+    first = cache.detect(model, IMAGE, predict, conf=0.5)
+    assert cache.detect(model, IMAGE, predict, conf=0.5).boxes.data.tolist() == first.boxes.data.tolist()
+    assert model.calls == 1
+    cache.detect(model, IMAGE, predict, conf=0.25)
+    assert model.calls == 2
+
+    # 调用方已知图像哈希时不再重新计算
+    monkeypatch.setattr(result_cache_module, "image_hash", fail_image_hash)
+    cache.detect(model, IMAGE, predict, image_key="hashed", conf=0.5)
+    assert model.calls == 2
+    cache.close()
+
+
+def fail_image_hash(image):
+    raise AssertionError("image_hash should not be called")
+
+
+def test_import_does_not_load_torch():
+    code = "import sys, ResultCache; print('torch' in sys.modules, 'ultralytics' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["False", "False"]
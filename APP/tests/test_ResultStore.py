@@ -0,0 +1,68 @@
+import csv
+import time
+import pytest
+import ResultStore as result_store_module
+from ResultStore import CSV_HEADERS, ResultStore, next_indexed_path
+
+
+def make_rows():
+    return [
+        {"coords": (10, 20), "class": "resistor", "confidence": 0.91, "text": "红 红 黑 金 (22Ω) ✔",
+         "bands": "红 红 黑 金", "resistance": "22Ω", "comparison": " ✔"},
+        {"coords": (30.5, 40), "class": "resistor", "confidence": 0.5, "text": "棕 黑 红 金 (1kΩ) ✘",
+         "comparison": " ✘ (应为 2.2kΩ)"},
+        {"coords": (50, 60), "class": "capacitor", "confidence": 0.7, "text": "capacitor"},
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    yield store
+    store.close()
+
+
+def test_run_round_trip_and_csv(store, tmp_path):
+    run_id = store.add_run(make_rows(), image_path="/boards/board_a.jpg", image_hash="h1", mode=0, model="det.pt")
+
+    run, = store.query_runs()
+    assert (run["run_id"], run["board"], run["image_hash"], run["mode"], run["model"]) == \
+           (run_id, "board_a", "h1", 0, "det.pt")
+    assert (run["resistor_count"], run["passed"], run["failed"]) == (3, 1, 1)
+
+    results = store.get_results(run_id)
+    assert [row["resistor_id"] for row in results] == [1, 2, 3]
+    assert (results[0]["bands"], results[0]["resistance"]) == ("红 红 黑 金", "22Ω")
+    assert results[2]["bands"] is None
+
+    with open(store.export_csv(run_id, tmp_path / "run.csv"), newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_HEADERS
+    assert rows[2] == ["2", "(30.5, 40.0)", "resistor", "0.50", "棕 黑 红 金 (1kΩ) ✘"]
+
+
+def test_query_by_board_hash_and_date(store, monkeypatch):
+    day = time.mktime(time.strptime("2024-05-02", "%Y-%m-%d"))
+    for board, offset in (("a", -3600), ("a", 3600), ("b", 7200), ("a", 86400 + 60)):
+        monkeypatch.setattr(result_store_module.time, "time", lambda: day + offset)
+        store.add_run(make_rows()[:1], board=board, image_hash=f"{board}{offset}")
+
+    assert len(store.query_runs(board="a")) == 3
+    assert [run["image_hash"] for run in store.query_runs(start="2024-05-02", end="2024-05-02")] == ["b7200", "a3600"]
+    assert [run["image_hash"] for run in store.query_runs(board="a", start="2024-05-02")] == ["a86460", "a3600"]
+    assert [run["image_hash"] for run in store.query_runs(image_hash="b7200")] == ["b7200"]
+    assert len(store.query_runs(limit=2)) == 2
+
+
+def test_next_indexed_path_uses_and_repairs_index(tmp_path):
+    assert next_indexed_path(tmp_path, "Log", ".txt").name == "Log1.txt"
+    (tmp_path / "Log1.txt").touch()
+    assert next_indexed_path(tmp_path, "Log", ".txt").name == "Log2.txt"
+
+    # 索引文件与实际文件不一致（或被删除）时扫描目录重建
+    (tmp_path / "Log2.txt").touch()
+    (tmp_path / "Log7.txt").touch()
+    (tmp_path / ".Log_index").write_text("2")
+    assert next_indexed_path(tmp_path, "Log", ".txt").name == "Log8.txt"
+    (tmp_path / ".Log_index").unlink()
+    assert next_indexed_path(tmp_path, "Log", ".txt").name == "Log8.txt"
@@ -0,0 +1,155 @@
+import os
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+from BandOrdering import plot_predictions
+import THTColorDetectNew
+from THTColorDetectNew import predict_batch
+
+# 类别 -> (颜色名称, BGR)，颜色远离背景和填充灰
+BANDS = {0: ("红", (0, 0, 255)), 1: ("绿", (0, 255, 0)), 2: ("蓝", (255, 0, 0)), 3: ("黄", (0, 255, 255))}
+COLORS = {class_id: name for class_id, (name, _) in BANDS.items()}
+SHAPES = [(6, 24), (20, 80), (48, 150), (60, 200), (70, 260), (160, 40), (300, 300), (700, 90)]
+
+
+def make_crop(shape, order):
+    """构造按 order 从左到右排列色环的裁剪图像"""
+    h, w = shape
+    crop = np.full((h, w, 3), (180, 200, 220), dtype=np.uint8)
+    step = w / (len(order) + 1)
+    for i, class_id in enumerate(order):
+        x = round(step * (i + 1))
+        crop[:, max(0, x - max(1, w // 20)):x + max(1, w // 20)] = BANDS[class_id][1]
+    return crop
+
+
+class StripeModel:
+    """按颜色直接找出色环位置的假模型，坐标基于收到的图像"""
+
+    def predict(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        return [self.detect(image) for image in images]
+
+    @staticmethod
+    def detect(image):
+        boxes = []
+        for class_id, (_, bgr) in BANDS.items():
+            mask = (np.abs(image.astype(np.int16) - bgr) < 60).all(axis=2)
+            ys, xs = np.nonzero(mask)
+            if len(xs):
+                boxes.append([xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, class_id])
+        data = torch.tensor(boxes, dtype=torch.float32).reshape(-1, 6)
+        return Results(image, path="", names=COLORS, boxes=data)
+
+
+def test_batched_model_input_matches_per_crop():
+    # 逐张与批量推理送入网络的张量应逐像素一致（包括被放大的小裁剪图）
+    from ultralytics import YOLO
+
+    model = YOLO("yolov8n.yaml")
+    model.predict(np.zeros((32, 32, 3), np.uint8), verbose=False)
+    inputs = []
+    model.predictor.model.model.register_forward_pre_hook(lambda module, args: inputs.extend(args[0].clone()))
+
+    rng = np.random.default_rng(0)
+    crops = [rng.integers(0, 256, (*shape, 3), dtype=np.uint8) for shape in SHAPES[:5] * 2]
+    for crop in crops:
+        model.predict(crop, verbose=False)
+    per_crop, inputs[:] = list(inputs), []
+    predict_batch(model, crops, 640, batch_size=3, verbose=False)
+
+    assert len(inputs) == len(per_crop)
+    for tensor in per_crop:
+        assert any(tensor.shape == batched.shape and torch.equal(tensor, batched) for batched in inputs)
+
+
+def test_batched_bands_match_per_crop():
+    # 色环裁剪图为水平条带
+    shapes = [(h, w) for h, w in SHAPES if w > h] * 2
+    rng = np.random.default_rng(1)
+    orders = [list(rng.permutation(4)) for _ in shapes]
+    crops = [make_crop(shape, order) for shape, order in zip(shapes, orders)]
+    model = StripeModel()
+
+    per_crop = [plot_predictions(crop, model.predict(crop), COLORS, draw=False)[1] for crop in crops]
+    batched = [plot_predictions(result.orig_img, [result], COLORS, draw=False)[1]
+               for result in predict_batch(model, crops, 640, batch_size=3)]
+
+    assert batched == per_crop
+    # 等间距色环的读取方向由排序规则决定，这里只要求顺序相同或整体反向
+    for colors, order in zip(batched, orders):
+        expected = [COLORS[class_id] for class_id in order]
+        assert colors in (expected, expected[::-1])
+
+
+class CountingStripeModel(StripeModel):
+    def __init__(self, on_predict=None):
+        self.images = []
+        self.on_predict = on_predict
+
+    def predict(self, source, **kwargs):
+        self.images.append(source)
+        if self.on_predict:
+            self.on_predict()
+        return super().predict(source, **kwargs)
+
+
+def write_inputs(folder, names):
+    folder.mkdir()
+    crops = {}
+    for i, name in enumerate(names):
+        crops[name] = make_crop((40, 160), [i % 4, (i + 1) % 4, (i + 2) % 4])
+        cv2.imwrite(str(folder / name), crops[name])
+    (folder / "broken.png").write_bytes(b"not an image")
+    return crops
+
+
+def read_lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_worker_returns_encoded_image(monkeypatch):
+    monkeypatch.setattr(THTColorDetectNew, "get_model", lambda path, threads=None: StripeModel())
+    THTColorDetectNew.init_worker("fake.pt", COLORS)
+    crop = make_crop((40, 160), [0, 1, 2])
+    ok, data = cv2.imencode(".png", crop)
+
+    img_file, image_data, color_info, error = THTColorDetectNew.detect_image("a.png", data)
+    assert error is None and isinstance(image_data, bytes)
+    plotted = plot_predictions(crop, StripeModel().predict(crop), COLORS)[0]
+    assert np.array_equal(cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR), plotted)
+
+
+def test_resume_keeps_finished_results(tmp_path, monkeypatch):
+    input_folder, output_folder = tmp_path / "in", tmp_path / "out"
+    crops = write_inputs(input_folder, ["a.png", "b.png", "c.png"])
+    txt_path = output_folder / "detection_results.txt"
+    model = CountingStripeModel()
+    monkeypatch.setattr(THTColorDetectNew, "get_model", lambda path, threads=None: model)
+
+    THTColorDetectNew.process_folder(str(input_folder), str(output_folder), "fake.pt", COLORS)
+    first = read_lines(txt_path)
+    assert len(model.images) == 3
+    assert [line.split(": ", 1)[0] for line in first] == ["a.png", "b.png", "处理 broken.png 时出错", "c.png"]
+    for name, crop in crops.items():
+        saved = cv2.imread(str(output_folder / f"result_{name}"))
+        assert np.array_equal(saved, plot_predictions(crop, StripeModel().predict(crop), COLORS)[0])
+
+    # 模拟上次中断：b 的结果图像缺失；续跑时已完成的结果在检测开始前就已写回磁盘
+    (output_folder / "result_b.png").unlink()
+    kept = [first[0], first[3]]
+    model.images.clear()
+    model.on_predict = lambda: assert_kept(txt_path, kept)
+    THTColorDetectNew.process_folder(str(input_folder), str(output_folder), "fake.pt", COLORS)
+
+    assert len(model.images) == 1  # 只重新检测 b，出错的 broken.png 重新尝试但无法解码
+    second = read_lines(txt_path)
+    assert second[:2] == kept
+    assert sorted(second[2:]) == sorted([first[1], first[2]])
+    assert (output_folder / "result_b.png").exists()
+    assert not os.path.exists(str(txt_path) + ".tmp")
+
+
+def assert_kept(txt_path, kept):
+    assert read_lines(txt_path)[:len(kept)] == kept
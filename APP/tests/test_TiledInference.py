@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import torch
+from ultralytics.engine.results import Results
+from TiledInference import TiledDetector, box_overlap, make_tiles, merge_detections
+
+
+class WhiteBoxModel:
+    """
+    把图像中的白色区域检测为一个框（坐标基于收到的图像），记录每次推理的图像尺寸；
+    被图像边界截断的框置信度较低
+    """
+    names = {0: "resistor"}
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        self.calls.append([image.shape[:2] for image in images])
+        results = []
+        for image in images:
+            ys, xs = np.nonzero(image[..., 0] == 255)
+            data = torch.zeros((0, 6))
+            if len(xs):
+                x1, y1, x2, y2 = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+                truncated = x1 == 0 or y1 == 0 or x2 == image.shape[1] or y2 == image.shape[0]
+                data = torch.tensor([[x1, y1, x2, y2, 0.5 if truncated else 0.9, 0]], dtype=torch.float32)
+            results.append(Results(image, path="", names=self.names, boxes=data))
+        return results
+
+    __call__ = predict
+
+
+@pytest.mark.parametrize("height, width", [(500, 500), (1024, 1024), (1500, 2300), (1025, 3000)])
+def test_tiles_cover_image_with_equal_size(height, width):
+    tiles = make_tiles(height, width, tile_size=1024, overlap=0.25)
+    covered = np.zeros((height, width), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        assert (x2 - x1, y2 - y1) == (min(1024, width), min(1024, height))
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+
+
+def test_overlap_metrics():
+    box = np.array([0, 0, 10, 10], np.float32)
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [0, 0, 5, 5], [20, 20, 30, 30]], np.float32)
+    np.testing.assert_allclose(box_overlap(box, boxes, "iou"), [1, 50 / 150, 0.25, 0])
+    np.testing.assert_allclose(box_overlap(box, boxes, "ios"), [1, 0.5, 1, 0])
+
+
+def test_merge_suppresses_per_class_by_confidence():
+    data = np.array([
+        [0, 0, 100, 20, 0.6, 0],   # 被分块边界截断的部分框
+        [0, 0, 200, 20, 0.9, 0],   # 完整框
+        [0, 0, 200, 20, 0.8, 1],   # 同位置的其他类别不抑制
+        [300, 0, 400, 20, 0.7, 0],
+    ], np.float32)
+    merged = merge_detections(data, threshold=0.5, metric="ios")
+    np.testing.assert_array_equal(merged[:, 4], np.float32([0.9, 0.8, 0.7]))
+    np.testing.assert_array_equal(merged[:, 5], [0, 1, 0])
+
+    # 交并比只有 0.5，不超过阈值时截断框被保留
+    assert len(merge_detections(data, threshold=0.5, metric="iou")) == 4
+
+
+def test_box_across_tile_border_merges_in_image_coordinates():
+    image = np.zeros((600, 1000, 3), np.uint8)
+    image[280:320, 400:600] = 255  # 被相邻分块截断、只完整出现在中间分块的电阻
+    model = WhiteBoxModel()
+    detector = TiledDetector(model, tile_size=512, overlap=0.25, batch_size=2)
+
+    result = detector(image)[0]
+    assert [len(call) for call in model.calls] == [2, 2, 2]
+    np.testing.assert_array_equal(result.boxes.xyxy.numpy(), [[400, 280, 600, 320]])
+    assert result.boxes.conf.tolist() == pytest.approx([0.9])
+    assert result.orig_img is image
+
+
+def test_small_image_runs_whole_image():
+    image = np.zeros((300, 400, 3), np.uint8)
+    image[10:20, 30:60] = 255
+    model = WhiteBoxModel()
+    result = TiledDetector(model, tile_size=512)(image)[0]
+    assert model.calls == [[(300, 400)]]
+    np.testing.assert_array_equal(result.boxes.xyxy.numpy(), [[30, 10, 60, 20]])